@@ -0,0 +1,321 @@
+import heapq
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from carga_datos import bloques_articulos, obtener_años
+from instrumentacion import instrumentar
+from motor_sentimiento import VERSION_MOTOR, puntuar_textos
+
+RUTA_AGREGADOS_CITAS = 'dashboard_citas.json'
+TOP_K = 10
+PERCENTILES = (50, 90, 99)
+COLUMNAS = ['id_articulo', 'titulo', 'resumen', 'fecha_publicacion', 'pais_autor', 'citas']
+
+
+def _compound_1e4(df, cache=None):
+    # 'compound' en unidades enteras de 1e-4, como en generar_dashboard.calcular_agregados.
+    if 'compound_1e4' in df.columns:
+        return df['compound_1e4'].to_numpy().astype(np.int64)
+    if 'compound' in df.columns:
+        compound = df['compound'].to_numpy()
+    else:
+        puntuaciones = cache.puntuar(df['resumen']) if cache is not None else puntuar_textos(df['resumen'])
+        compound = puntuaciones['compound'].to_numpy()
+    return (compound * 10_000).round().astype(np.int64)
+
+
+def _codificar(valores):
+    """Códigos enteros de cada fila y la clave (texto, como en el JSON) de cada código."""
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        codigos, claves = valores.cat.codes.to_numpy(), valores.cat.categories
+    else:
+        codigos, claves = pd.factorize(valores.to_numpy())
+    return codigos.astype(np.int64), [str(c) for c in claves]
+
+
+def _histogramas(codigos, citas, m):
+    """
+    Histograma de citas de cada grupo como pares (valor, cuenta) con cuenta > 0, ordenados
+    por grupo y valor, y los límites de cada grupo en ellos (`limites[i]:limites[i + 1]`).
+
+    Con la tabla densa grupos × (máximo de citas + 1) de `np.bincount` la memoria dependería
+    del número de citas más alto (un solo valor atípico reservaría millones de celdas), así
+    que sólo se usa cuando no supera unas pocas celdas por fila; si no, se cuentan los pares
+    presentes ordenando una clave entera, con memoria proporcional a las filas.
+    """
+    ancho = int(citas.max()) + 1 if len(citas) else 1
+    clave = codigos * ancho + citas
+    if m * ancho <= 4 * len(citas) + 1_024:
+        tabla = np.bincount(clave, minlength=m * ancho)
+        presentes = np.flatnonzero(tabla)
+        cuentas = tabla[presentes]
+    else:
+        presentes, cuentas = np.unique(clave, return_counts=True)
+    grupos, valores = np.divmod(presentes, ancho)
+    return valores, cuentas, np.searchsorted(grupos, np.arange(m + 1))
+
+
+def _agregar(codigos, claves, citas, compound_1e4):
+    """
+    Totales por grupo en una sola pasada de `np.bincount` por medida: artículos, citas,
+    suma del compound y suma del compound ponderado por citas (ambas en unidades de 1e-4),
+    más el histograma de citas, del que salen los percentiles exactos.
+
+    El histograma sólo guarda los valores presentes de cada grupo (ver `_histogramas`).
+    """
+    m = len(claves)
+    validos = codigos >= 0  # Los valores nulos (código -1) no cuentan en ningún grupo.
+    if not validos.all():
+        codigos, citas, compound_1e4 = codigos[validos], citas[validos], compound_1e4[validos]
+    articulos = np.bincount(codigos, minlength=m)
+    suma_citas = np.bincount(codigos, weights=citas, minlength=m)
+    suma_compound = np.bincount(codigos, weights=compound_1e4, minlength=m)
+    ponderado = np.bincount(codigos, weights=citas * compound_1e4, minlength=m)
+    valores, cuentas, limites = _histogramas(codigos, citas, m)
+
+    grupos = {}
+    for i in np.flatnonzero(articulos):
+        desde, hasta = limites[i], limites[i + 1]
+        grupos[claves[i]] = {
+            'articulos': int(articulos[i]),
+            'citas': int(round(suma_citas[i])),
+            'compound_1e4': int(round(suma_compound[i])),
+            'compound_citas_1e4': int(round(ponderado[i])),
+            'histograma': dict(zip(map(str, valores[desde:hasta].tolist()), cuentas[desde:hasta].tolist())),
+        }
+    return grupos
+
+
+def _clave_top(citas, ids):
+    # Orden total para el top: más citas primero y, a igualdad, el menor id_articulo.
+    return citas.astype(np.int64) * 2 ** 32 + (2 ** 32 - 1 - ids.astype(np.int64))
+
+
+def _actualizar_top(heap, elementos, k):
+    """Mantiene en `heap` (montículo mínimo por clave) los `k` mejores elementos vistos."""
+    for elemento in elementos:
+        if len(heap) < k:
+            heapq.heappush(heap, elemento)
+        elif elemento > heap[0]:
+            heapq.heapreplace(heap, elemento)
+    return heap
+
+
+@instrumentar('citas.agregados')
+def calcular_agregados_citas(df, k=TOP_K, cache=None):
+    """
+    Calcula los agregados parciales (combinables) de citas de un conjunto de artículos:
+    totales por país, año y clúster (si `df` trae la columna 'cluster') con el sentimiento
+    ponderado por citas y el histograma de citas de cada grupo, y el top-`k` de artículos
+    más citados como montículo.
+
+    Como `generar_dashboard.calcular_agregados`, reutiliza las columnas 'año' y
+    'compound' (o 'compound_1e4') si `df` ya las trae, y acepta el formato compacto.
+    """
+    citas = df['citas'].to_numpy().astype(np.int64)
+    compound_1e4 = _compound_1e4(df, cache)
+    años = obtener_años(df)
+    dimensiones = {'pais': df['pais_autor'], 'año': años}
+    if 'cluster' in df.columns:
+        dimensiones['cluster'] = df['cluster']
+
+    agregados = {'filas': len(df), 'k': k, 'dimensiones': {}}
+    for nombre, valores in dimensiones.items():
+        agregados['dimensiones'][nombre] = _agregar(*_codificar(valores), citas, compound_1e4)
+    agregados['total'] = _agregar(np.zeros(len(df), dtype=np.int64), [''], citas, compound_1e4).get('', None)
+
+    # Top-k: sólo los k mejores del bloque (argpartition) llegan al montículo.
+    clave = _clave_top(citas, df['id_articulo'].to_numpy())
+    candidatos = np.argpartition(clave, len(clave) - k)[len(clave) - k:] if len(clave) > k else np.arange(len(clave))
+    ids, titulos = df['id_articulo'].to_numpy(), df['titulo'].to_numpy()
+    paises, años = df['pais_autor'].to_numpy(), años.to_numpy()
+    agregados['top'] = _actualizar_top([], [
+        [int(clave[i]), int(ids[i]), str(titulos[i]), str(paises[i]), int(años[i]), int(citas[i]),
+         int(compound_1e4[i])]
+        for i in candidatos
+    ], k)
+    return agregados
+
+
+def _combinar_grupo(a, b):
+    if a is None or b is None:
+        return a or b
+    combinado = {medida: a[medida] + b[medida] for medida in ('articulos', 'citas', 'compound_1e4',
+                                                             'compound_citas_1e4')}
+    combinado['histograma'] = dict(a['histograma'])
+    for valor, cuenta in b['histograma'].items():
+        combinado['histograma'][valor] = combinado['histograma'].get(valor, 0) + cuenta
+    return combinado
+
+
+def combinar_agregados_citas(a, b):
+    """Combina dos agregados parciales de citas (p. ej. de dos bloques consecutivos del CSV)."""
+    combinado = {'filas': a['filas'] + b['filas'], 'k': a['k'], 'dimensiones': {},
+                 'total': _combinar_grupo(a['total'], b['total'])}
+    for nombre in a['dimensiones'].keys() | b['dimensiones'].keys():
+        grupos_a, grupos_b = a['dimensiones'].get(nombre, {}), b['dimensiones'].get(nombre, {})
+        combinado['dimensiones'][nombre] = {clave: _combinar_grupo(grupos_a.get(clave), grupos_b.get(clave))
+                                            for clave in grupos_a.keys() | grupos_b.keys()}
+    combinado['top'] = _actualizar_top(list(a['top']), b['top'], a['k'])
+    return combinado
+
+
+def _percentiles(histograma, percentiles=PERCENTILES):
+    # Percentil exacto por rango (como np.percentile(..., method='inverted_cdf')).
+    valores = np.array(sorted(int(v) for v in histograma))
+    acumulado = np.cumsum([histograma[str(v)] for v in valores])
+    rangos = np.maximum(np.ceil(np.array(percentiles) / 100 * acumulado[-1]), 1)
+    return {f'p{p}': int(valores[np.searchsorted(acumulado, r)]) for p, r in zip(percentiles, rangos)}
+
+
+def _fila(clave, grupo, percentiles):
+    return {
+        'clave': clave,
+        'articulos': grupo['articulos'],
+        'citas': grupo['citas'],
+        'citas_media': grupo['citas'] / grupo['articulos'],
+        'sentimiento_medio': grupo['compound_1e4'] / 10_000 / grupo['articulos'],
+        'sentimiento_ponderado': (grupo['compound_citas_1e4'] / 10_000 / grupo['citas']
+                                  if grupo['citas'] else None),
+        **_percentiles(grupo['histograma'], percentiles),
+    }
+
+
+def tablas_citas(agregados, percentiles=PERCENTILES):
+    """
+    Tablas listas para el dashboard a partir de los agregados (sin volver a los artículos):
+    el total, una tabla por dimensión (países por citas totales, años y clústeres en orden)
+    y el top de artículos más citados, de más a menos citas.
+    """
+    tablas = {'total': _fila('Total', agregados['total'], percentiles) if agregados['total'] else None}
+    for nombre, grupos in agregados['dimensiones'].items():
+        filas = [_fila(clave, grupo, percentiles) for clave, grupo in grupos.items()]
+        if nombre == 'pais':
+            filas.sort(key=lambda f: (-f['citas'], f['clave']))
+        else:
+            filas.sort(key=lambda f: int(f['clave']))
+        tablas[f'por_{nombre}'] = filas
+    tablas['top'] = [dict(zip(('id_articulo', 'titulo', 'pais_autor', 'año', 'citas', 'compound'),
+                              elemento[1:6] + [elemento[6] / 10_000]))
+                     for elemento in sorted(agregados['top'], reverse=True)]
+    return tablas
+
+
+def guardar_agregados_citas(agregados, ruta=RUTA_AGREGADOS_CITAS, filas_csv=None):
+    """
+    Persiste los agregados de citas junto con la versión del motor de sentimiento.
+
+    `filas_csv` es el número de filas del CSV ya incorporadas, desde donde continúa el modo
+    incremental. Es independiente de agregados['filas']: unos agregados que no salen de las
+    primeras filas del CSV tal cual (p. ej. sin casi duplicados) se guardan sin él y el modo
+    incremental los recalcula en lugar de seguir desde un punto equivocado.
+    """
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_MOTOR, 'filas_csv': filas_csv, **agregados}, f, ensure_ascii=False)
+
+
+def cargar_agregados_citas(ruta=RUTA_AGREGADOS_CITAS):
+    """
+    Carga los agregados de citas persistidos (con su 'filas_csv', ver `guardar_agregados_citas`).
+    Devuelve None si no existen o se calcularon con otra versión del motor de sentimiento.
+    """
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            guardado = json.load(f)
+    except FileNotFoundError:
+        return None
+    if guardado.pop('version', None) != VERSION_MOTOR:
+        return None
+    heapq.heapify(guardado['top'])
+    guardado.setdefault('filas_csv', None)
+    return guardado
+
+
+@instrumentar('citas.streaming')
+def agregados_citas_por_bloques(ruta_csv, tamano_bloque=100_000, saltar_filas=0, k=TOP_K, cache=None):
+    """
+    Agregados de citas de un CSV leído por bloques (a partir de la fila `saltar_filas`),
+    sin cargarlo entero en memoria: cada bloque se agrega y se combina con lo acumulado.
+    """
+    agregados = None
+    for bloque in bloques_articulos(saltar_filas, COLUMNAS, ruta_csv, tamano_bloque):
+        parcial = calcular_agregados_citas(bloque, k=k, cache=cache)
+        agregados = parcial if agregados is None else combinar_agregados_citas(agregados, parcial)
+    return agregados
+
+
+def actualizar_agregados_citas(ruta_csv, ruta_agregados=RUTA_AGREGADOS_CITAS, cache=None):
+    """
+    Modo incremental (ver `generar_dashboard.actualizar_agregados`): incorpora sólo las
+    filas añadidas al final del CSV desde la última ejecución y guarda el estado combinado.
+    """
+    agregados = cargar_agregados_citas(ruta_agregados)
+    # Sin 'filas_csv' no se sabe desde qué fila del CSV seguir: se recalcula todo.
+    filas_csv = agregados.pop('filas_csv') if agregados is not None else None
+    nuevos = None
+    if filas_csv is None:
+        agregados = None
+    else:
+        nuevos = agregados_citas_por_bloques(ruta_csv, saltar_filas=filas_csv, k=agregados['k'], cache=cache)
+        # Si el CSV tiene menos filas que las ya procesadas, no es el mismo corpus.
+        if nuevos is None and len(pd.read_csv(ruta_csv, usecols=[0])) < filas_csv:
+            agregados = None
+
+    if agregados is None:
+        agregados = agregados_citas_por_bloques(ruta_csv, cache=cache)
+        filas_csv = agregados['filas']
+    elif nuevos is not None:
+        agregados = combinar_agregados_citas(agregados, nuevos)
+        filas_csv += nuevos['filas']
+
+    guardar_agregados_citas(agregados, ruta_agregados, filas_csv)
+    return agregados
+
+
+def _agregados_con_pandas(df, k=TOP_K, percentiles=PERCENTILES):
+    # Referencia para el benchmark: un groupby por dimensión, cuantiles y nlargest.
+    df = df.assign(año=obtener_años(df), ponderado=df['citas'] * df['compound'])
+    resultado = {}
+    for nombre, columna in (('pais', 'pais_autor'), ('año', 'año'), ('cluster', 'cluster')):
+        grupos = df.groupby(columna, observed=True)
+        tabla = grupos.agg(articulos=('citas', 'size'), citas=('citas', 'sum'),
+                           sentimiento_medio=('compound', 'mean'), ponderado=('ponderado', 'sum'))
+        tabla['sentimiento_ponderado'] = tabla['ponderado'] / tabla['citas']
+        for p in percentiles:
+            tabla[f'p{p}'] = grupos['citas'].quantile(p / 100, interpolation='lower')
+        resultado[nombre] = tabla
+    resultado['top'] = df.sort_values(['citas', 'id_articulo'], ascending=[False, True]).head(k)
+    return resultado
+
+
+if __name__ == "__main__":
+    # Benchmark: una pasada vectorizada (más combinación por bloques) frente a groupby de
+    # pandas por dimensión, y comprobación de que el modo por bloques da lo mismo.
+    from generar_dataset import generar_datos
+
+    rng = np.random.default_rng(0)
+    for n in (100_000, 1_000_000):
+        df = generar_datos(n, semilla=0)
+        df['compound'] = np.round(rng.uniform(-1, 1, n), 4)
+        df['cluster'] = rng.integers(0, 4, n)
+
+        inicio = time.perf_counter()
+        completo = calcular_agregados_citas(df)
+        tablas = tablas_citas(completo)
+        t_motor = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        _agregados_con_pandas(df)
+        t_pandas = time.perf_counter() - inicio
+
+        por_bloques = calcular_agregados_citas(df.iloc[:0])
+        for i in range(0, n, 100_000):
+            por_bloques = combinar_agregados_citas(por_bloques, calcular_agregados_citas(df.iloc[i:i + 100_000]))
+        iguales = tablas_citas(por_bloques) == tablas
+
+        print(f"{n:>9} artículos: una pasada {t_motor * 1000:8.1f} ms | groupby pandas {t_pandas * 1000:8.1f} ms | "
+              f"por bloques idéntico: {iguales}")
+
+    print("\nArtículos más citados:")
+    print(pd.DataFrame(tablas['top']).to_string(index=False))
@@ -1,13 +1,23 @@
+import sys
+
 import pandas as pd
+import graficos
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+from carga_datos import cargar_articulos
+from clustering_escalable import (
+    ajustar_clustering_escalable, muestra_estratificada, proyectar_2d, terminos_por_cluster, transformar
+)
+from instrumentacion import guardar_informe, instrumentar, medir
 
+@instrumentar('exploratorio')
 def analisis_exploratorio(df):
     """Realiza y visualiza un análisis exploratorio básico."""
     print("--- Análisis Exploratorio Básico ---")
+    if not graficos.activados():
+        return
     
     # Publicaciones por país
     plt.figure(figsize=(12, 6))
@@ -16,8 +26,7 @@ def analisis_exploratorio(df):
     plt.xlabel('Cantidad de Artículos')
     plt.ylabel('País')
     plt.tight_layout()
-    plt.savefig('publicaciones_por_pais.png')
-    plt.show()
+    graficos.guardar('publicaciones_por_pais.png')
     
     # Publicaciones por año
     df['año'] = pd.to_datetime(df['fecha_publicacion']).dt.year
@@ -27,9 +36,9 @@ def analisis_exploratorio(df):
     plt.xlabel('Año')
     plt.ylabel('Cantidad de Artículos')
     plt.tight_layout()
-    plt.savefig('publicaciones_por_año.png')
-    plt.show()
+    graficos.guardar('publicaciones_por_año.png')
 
+@instrumentar('clustering')
 def clustering_tematico(df, num_clusters=4):
     """
     Aplica clustering K-Means para identificar temas en los resúmenes.
@@ -39,11 +48,13 @@ def clustering_tematico(df, num_clusters=4):
     # Vectorización TF-IDF de los resúmenes
     # Se ignoran "stop words" comunes en español y palabras que aparecen en menos de 5 documentos.
     vectorizer = TfidfVectorizer(stop_words='english', max_df=0.95, min_df=5, ngram_range=(1,2))
-    X = vectorizer.fit_transform(df['resumen'])
+    with medir('clustering.tfidf', filas=len(df)):
+        X = vectorizer.fit_transform(df['resumen'])
     
     # Aplicar K-Means
     kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10)
-    df['cluster'] = kmeans.fit_predict(X)
+    with medir('clustering.kmeans', filas=len(df)):
+        df['cluster'] = kmeans.fit_predict(X)
     
     # Analizar los términos más importantes por clúster
     print("\n--- Términos más relevantes por clúster ---")
@@ -55,55 +66,91 @@ def clustering_tematico(df, num_clusters=4):
         
     return df, X
 
-def visualizar_clusters(df, X):
+@instrumentar('clustering.escalable')
+def clustering_tematico_escalable(df, num_clusters=4, **opciones):
+    """
+    Variante de `clustering_tematico` para corpus grandes: TF-IDF por hashing (sin
+    vocabulario en memoria) y MiniBatchKMeans ajustado lote a lote con `partial_fit`.
+    Las opciones (tamano_lote, n_features, n_epocas...) se pasan a `ajustar_clustering_escalable`.
+    Devuelve el DataFrame con la columna 'cluster' y el modelo ajustado.
+    """
+    print(f"\n--- Realizando Clustering Temático (modo escalable) con {num_clusters} clústeres ---")
+    
+    modelo, df['cluster'] = ajustar_clustering_escalable(df['resumen'], num_clusters=num_clusters, **opciones)
+    
+    # Analizar los términos más importantes por clúster
+    print("\n--- Términos más relevantes por clúster ---")
+    for i, top_terms in enumerate(terminos_por_cluster(modelo)):
+        print(f"Cluster {i}: {', '.join(top_terms)}")
+        
+    return df, modelo
+
+@instrumentar('clustering.grafico')
+def visualizar_clusters(df, X, max_puntos_por_cluster=None):
     """
-    Visualiza los clústeres de documentos usando PCA para reducir la dimensionalidad.
+    Visualiza los clústeres de documentos reduciendo la dimensionalidad con TruncatedSVD,
+    que trabaja directamente sobre la matriz TF-IDF dispersa (sin `X.toarray()`).
+    Con `max_puntos_por_cluster` sólo se dibuja una muestra estratificada de cada clúster.
     """
+    if not graficos.activados():
+        return
     print("\nGenerando visualización de clústeres...")
     # Reducción de dimensionalidad a 2D para poder graficar
-    pca = PCA(n_components=2, random_state=42)
-    coords = pca.fit_transform(X.toarray())
+    coords, indices = proyectar_2d(X, df['cluster'].to_numpy(), max_puntos_por_cluster)
     
-    df_coords = pd.DataFrame(coords, columns=['pca1', 'pca2'])
-    df_plot = pd.concat([df_coords, df['cluster']], axis=1)
+    df_plot = pd.DataFrame(coords, columns=['comp1', 'comp2'])
+    df_plot['cluster'] = df['cluster'].to_numpy()[indices]
     
     plt.figure(figsize=(12, 8))
     sns.scatterplot(
         data=df_plot,
-        x='pca1',
-        y='pca2',
+        x='comp1',
+        y='comp2',
         hue='cluster',
         palette=sns.color_palette('hsv', n_colors=len(df['cluster'].unique())),
         legend='full',
         alpha=0.7
     )
-    plt.title('Visualización de Clústeres Temáticos de Artículos (PCA)')
-    plt.xlabel('Componente Principal 1')
-    plt.ylabel('Componente Principal 2')
+    plt.title('Visualización de Clústeres Temáticos de Artículos (SVD)')
+    plt.xlabel('Componente 1')
+    plt.ylabel('Componente 2')
     plt.legend(title='Clúster')
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig('visualizacion_clusters.png')
-    plt.show()
+    graficos.guardar('visualizacion_clusters.png')
 
 
 if __name__ == "__main__":
+    # Uso: python analisis_descriptivo_clustering.py [--escalable]
     # Cargar los datos
     try:
-        df = pd.read_csv('articulos_educacion_online.csv')
+        df = cargar_articulos(['resumen', 'fecha_publicacion', 'pais_autor'])
     except FileNotFoundError:
         print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
         print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
         exit()
 
-    # 1. Análisis exploratorio
-    analisis_exploratorio(df.copy()) # Usamos copia para no modificar el df original con el año
-    
-    # 2. Clustering
-    df_clustered, X_tfidf = clustering_tematico(df, num_clusters=4)
+    # 1. Clustering (con --escalable, el modo por hashing y mini-lotes que el pipeline usa
+    # con corpus grandes; del gráfico sólo se vectoriza una muestra estratificada).
+    if '--escalable' in sys.argv:
+        df_clustered, modelo = clustering_tematico_escalable(df.copy(), num_clusters=4)
+        indices = muestra_estratificada(df_clustered['cluster'], 2_000)
+        df_grafico = df_clustered.iloc[indices]
+        X_tfidf = transformar(modelo, df_grafico['resumen'])
+    else:
+        df_clustered, X_tfidf = clustering_tematico(df.copy(), num_clusters=4)
+        df_grafico = df_clustered
     print("\n--- Muestra de datos con clúster asignado ---")
     print(df_clustered[['resumen', 'cluster']].head())
     
-    # 3. Visualización de clústeres
-    visualizar_clusters(df_clustered, X_tfidf)
-    print("Gráficos guardados como 'publicaciones_por_pais.png', 'publicaciones_por_año.png' y 'visualizacion_clusters.png'")
\ No newline at end of file
+    # 2. Análisis exploratorio y visualización de clústeres (en paralelo en modo headless).
+    # Usamos copia para no modificar el df original con el año
+    graficos.renderizar([
+        (analisis_exploratorio, (df.copy(),)),
+        (visualizar_clusters, (df_grafico, X_tfidf)),
+    ])
+    if graficos.activados():
+        print("Gráficos guardados como 'publicaciones_por_pais.png', 'publicaciones_por_año.png' y 'visualizacion_clusters.png'")
+
+    guardar_informe()
+    print("\nInforme de ejecución guardado en 'informe_ejecucion.json'")
\ No newline at end of file
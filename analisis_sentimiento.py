@@ -1,37 +1,145 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import pandas as pd
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import graficos
 import matplotlib.pyplot as plt
 import seaborn as sns
+from cache_sentimiento import CacheSentimiento
+from carga_datos import RUTA_CSV, cargar_articulos
+from instrumentacion import ejecutar_midiendo, guardar_informe, incorporar, instrumentar
+from motor_sentimiento import COLUMNAS_SENTIMIENTO, clasificar_sentimiento, obtener_vocabulario, puntuar_textos
 
-def analizar_sentimiento(df):
+@instrumentar('sentimiento')
+def analizar_sentimiento(df, cache=None):
     """
     Aplica análisis de sentimiento y devuelve un NUEVO DataFrame con los resultados.
+    Si se pasa una `CacheSentimiento`, sólo se puntúan los resúmenes que no estén en ella.
     """
     # Aunque VADER está optimizado para inglés, funciona aceptablemente para detectar
     # palabras con carga positiva/negativa en textos con cognados o anglicismos.
     # Para un análisis en español más preciso, se usarían librerías como 'pysentimiento' o modelos de Hugging Face.
-    analyzer = SentimentIntensityAnalyzer()
-    
+
     # Es una buena práctica no modificar el DataFrame de entrada directamente.
     df_resultado = df.copy()
 
-    # Aplicamos el analizador y expandimos el diccionario resultante en nuevas columnas.
-    # Esto es más eficiente que crear un DataFrame intermedio.
-    df_resultado[['neg', 'neu', 'pos', 'compound']] = df_resultado['resumen'].apply(
-        lambda res: pd.Series(analyzer.polarity_scores(res))
-    )
-    
+    # Puntuamos toda la columna de una vez con el motor por lotes (mismos scores que
+    # VADER, ver motor_sentimiento.TOLERANCIA) en lugar de llamar a VADER fila a fila.
+    if cache is not None:
+        puntuaciones = cache.puntuar(df_resultado['resumen'])
+    else:
+        puntuaciones = puntuar_textos(df_resultado['resumen'])
+    df_resultado[COLUMNAS_SENTIMIENTO] = puntuaciones.to_numpy()
+
     # Clasificamos el sentimiento general basado en el score 'compound'
-    df_resultado['sentimiento_general'] = df_resultado['compound'].apply(
-        lambda c: 'positivo' if c > 0.05 else ('negativo' if c < -0.05 else 'neutral')
-    )
+    # Como categórico: tres etiquetas repetidas ocupan un byte por fila en lugar de un objeto.
+    etiquetas = ('positivo', 'negativo', 'neutral')
+    df_resultado['sentimiento_general'] = pd.Categorical(
+        clasificar_sentimiento(df_resultado['compound'], etiquetas), categories=etiquetas)
     
     return df_resultado
 
+def _inicializar_worker():
+    """Construye el analizador (vocabulario compilado) una sola vez por proceso."""
+    obtener_vocabulario()
+
+@instrumentar('sentimiento.streaming')
+def analizar_sentimiento_streaming(ruta_entrada, ruta_salida, n_procesos=None,
+                                   tamano_bloque=50_000, ordenado=True, max_pendientes=None):
+    """
+    Analiza el sentimiento de un CSV leyéndolo por bloques y escribe los bloques
+    puntuados en `ruta_salida`, sin cargar nunca el corpus completo en memoria.
+
+    - n_procesos: número de procesos del pool (por defecto, todos los núcleos).
+      Con 1 se procesa en el propio proceso, sin pool.
+    - tamano_bloque: filas por bloque leídas del CSV.
+    - ordenado: si es True, los bloques se escriben en el mismo orden que la entrada;
+      si es False, se escriben según terminan (las filas de cada bloque siguen juntas).
+    - max_pendientes: bloques en vuelo como máximo (por defecto, 2 por proceso). Limita
+      la memoria usada independientemente del tamaño del archivo.
+
+    Devuelve un diccionario con las filas procesadas, los segundos y las filas por segundo.
+    """
+    n_procesos = n_procesos or os.cpu_count() or 1
+    max_pendientes = max_pendientes or 2 * n_procesos
+    inicio = time.perf_counter()
+    filas = 0
+    primera_escritura = True
+
+    def escribir(bloque):
+        nonlocal filas, primera_escritura
+        bloque.to_csv(ruta_salida, mode='w' if primera_escritura else 'a',
+                      header=primera_escritura, index=False, encoding='utf-8')
+        primera_escritura = False
+        filas += len(bloque)
+
+    bloques = pd.read_csv(ruta_entrada, chunksize=tamano_bloque)
+
+    if n_procesos == 1:
+        for bloque in bloques:
+            escribir(analizar_sentimiento(bloque))
+    else:
+        pendientes = deque()
+
+        def drenar(limite):
+            # Escribe bloques terminados hasta dejar como mucho `limite` en vuelo.
+            while len(pendientes) > limite:
+                # Cada bloque vuelve con las mediciones de su worker (ver `ejecutar_midiendo`).
+                if ordenado:
+                    escribir(incorporar(*pendientes.popleft().result()))
+                else:
+                    hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in hechos:
+                        pendientes.remove(futuro)
+                        escribir(incorporar(*futuro.result()))
+
+        with ProcessPoolExecutor(max_workers=n_procesos, mp_context=graficos.contexto_procesos(),
+                                 initializer=_inicializar_worker) as pool:
+            for bloque in bloques:
+                pendientes.append(pool.submit(ejecutar_midiendo, analizar_sentimiento, bloque))
+                drenar(max_pendientes - 1)
+            drenar(0)
+
+    segundos = time.perf_counter() - inicio
+    return {'filas': filas, 'segundos': segundos, 'filas_por_segundo': filas / segundos if segundos else 0.0}
+
+def benchmark_streaming(repeticiones=200):
+    """
+    Throughput del modo streaming (bloques + pool de procesos) sobre el corpus repetido
+    `repeticiones` veces, con varios números de procesos, tamaños de bloque y órdenes.
+    """
+    try:
+        df = cargar_articulos()
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, 'corpus.csv')
+        salida = os.path.join(tmp, 'corpus_sentimiento.csv')
+        pd.concat([df] * repeticiones, ignore_index=True).to_csv(entrada, index=False)
+        print(f"--- Streaming sobre {len(df) * repeticiones} filas ---")
+        for n_procesos in sorted({1, 2, os.cpu_count() or 1}):
+            for tamano_bloque in (10_000, 50_000):
+                for ordenado in (True, False):
+                    r = analizar_sentimiento_streaming(entrada, salida, n_procesos=n_procesos,
+                                                       tamano_bloque=tamano_bloque, ordenado=ordenado)
+                    print(f"  procesos={n_procesos} bloque={tamano_bloque:>6} ordenado={ordenado!s:<5}: "
+                          f"{r['filas_por_segundo']:>10,.0f} filas/s")
+
+@instrumentar('sentimiento.grafico')
 def visualizar_sentimiento_temporal(df):
     """
     Visualiza la evolución del sentimiento promedio a lo largo de los años.
     """
+    if not graficos.activados():
+        return
+
     # Trabajar con una copia para evitar modificar el DataFrame original (buena práctica)
     df_plot = df.copy()
     df_plot['fecha_publicacion'] = pd.to_datetime(df_plot['fecha_publicacion'])
@@ -39,7 +147,9 @@ def visualizar_sentimiento_temporal(df):
     
     sentimiento_por_año = df_plot.groupby('año')['compound'].mean().reset_index()
     
-    plt.style.use('seaborn-whitegrid')
+    # El estilo se llama 'seaborn-v0_8-whitegrid' desde matplotlib 3.6.
+    estilo = 'seaborn-v0_8-whitegrid'
+    plt.style.use(estilo if estilo in plt.style.available else 'seaborn-whitegrid')
     plt.figure(figsize=(12, 6))
     sns.lineplot(data=sentimiento_por_año, x='año', y='compound', marker='o', color='royalblue')
     plt.axhline(0, color='grey', linestyle='--', linewidth=0.8)
@@ -49,21 +159,22 @@ def visualizar_sentimiento_temporal(df):
     plt.xticks(sentimiento_por_año['año'])
     plt.grid(True, which='both', linestyle='--', linewidth=0.5)
     plt.tight_layout()
-    plt.savefig('evolucion_sentimiento.png')
-    plt.show()
+    graficos.guardar('evolucion_sentimiento.png')
 
 def main():
     """Main function to run the sentiment analysis workflow."""
     # Cargar los datos
     try:
-        df = pd.read_csv('articulos_educacion_online.csv')
+        df = cargar_articulos(['resumen', 'fecha_publicacion'])
     except FileNotFoundError:
         print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
         print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
         return # Exit the function
 
-    # 1. Realizar el análisis de sentimiento
-    df_con_sentimiento = analizar_sentimiento(df)
+    # 1. Realizar el análisis de sentimiento (reutilizando las puntuaciones ya calculadas)
+    with CacheSentimiento() as cache:
+        df_con_sentimiento = analizar_sentimiento(df, cache=cache)
+        print(f"Caché de sentimiento: {cache.estadisticas()}")
 
     print("--- Muestra de datos con análisis de sentimiento ---")
     print(df_con_sentimiento[['resumen', 'compound', 'sentimiento_general']].head())
@@ -74,9 +185,39 @@ def main():
     print(distribucion)
 
     # 3. Visualizar la evolución del sentimiento
-    print("\nGenerando gráfico de evolución del sentimiento...")
-    visualizar_sentimiento_temporal(df_con_sentimiento)
-    print("Gráfico guardado como 'evolucion_sentimiento.png'")
+    if graficos.activados():
+        print("\nGenerando gráfico de evolución del sentimiento...")
+        visualizar_sentimiento_temporal(df_con_sentimiento)
+        print("Gráfico guardado como 'evolucion_sentimiento.png'")
+
+    guardar_informe()
+    print("\nInforme de ejecución guardado en 'informe_ejecucion.json'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Uso: python analisis_sentimiento.py
+    #      python analisis_sentimiento.py --streaming SALIDA [--procesos N] [--bloque FILAS] [--desordenado]
+    #      python analisis_sentimiento.py --benchmark
+    parser = argparse.ArgumentParser(description="Análisis de sentimiento de los resúmenes.")
+    parser.add_argument('--streaming', metavar='SALIDA',
+                        help="puntúa el CSV por bloques, sin cargarlo entero, y escribe el resultado en SALIDA")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--bloque', type=int, default=50_000)
+    parser.add_argument('--desordenado', action='store_true',
+                        help="escribe los bloques según terminan en lugar de en el orden de entrada")
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_streaming()
+    elif args.streaming:
+        if not os.path.exists(RUTA_CSV):
+            print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+            print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        else:
+            r = analizar_sentimiento_streaming(RUTA_CSV, args.streaming, n_procesos=args.procesos,
+                                               tamano_bloque=args.bloque, ordenado=not args.desordenado)
+            print(f"{r['filas']} artículos puntuados en {r['segundos']:.2f} s "
+                  f"({r['filas_por_segundo']:,.0f} filas/s) → '{args.streaming}'")
+            guardar_informe()
+    else:
+        main()
\ No newline at end of file
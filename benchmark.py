@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from analisis_descriptivo_clustering import clustering_tematico, clustering_tematico_escalable
+from analisis_sentimiento import analizar_sentimiento
+from carga_datos import cargar_articulos
+from generar_dashboard import procesar_datos_para_dashboard
+from generar_dataset import generar_corpus
+from modelo_prediccion_temporal import preparar_serie_temporal
+from pipeline import PARAMETROS
+
+TAMANOS = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+DIRECTORIO_CORPUS = '.benchmarks'
+RUTA_RESULTADOS = 'benchmark_resultados.json'
+SEMILLA = 42
+
+# Una etapa es más lenta (o usa más memoria) que en la referencia si supera su valor en
+# más de UMBRAL_REGRESION (relativo) y, además, en más de estos mínimos absolutos: así
+# el ruido de las etapas de milisegundos no se marca como regresión.
+UMBRAL_REGRESION = 0.20
+MINIMO_SEGUNDOS = 0.05
+MINIMO_MEMORIA_MB = 5.0
+
+
+def _clustering(df):
+    # Mismo criterio que el pipeline: el TF-IDF completo no cabe en memoria en los corpus grandes.
+    if len(df) >= PARAMETROS['umbral_clustering_escalable']:
+        return clustering_tematico_escalable(df, num_clusters=PARAMETROS['num_clusters'])
+    return clustering_tematico(df, num_clusters=PARAMETROS['num_clusters'])
+
+# nombre: (columnas que necesita, función). Cada ejecución recibe su propia copia de las
+# columnas, porque algunas funciones modifican el DataFrame de entrada.
+ETAPAS = {
+    'sentimiento': (['resumen', 'fecha_publicacion'], analizar_sentimiento),
+    'clustering': (['resumen'], _clustering),
+    'serie_temporal': (['id_articulo', 'fecha_publicacion'], preparar_serie_temporal),
+    'dashboard': (['resumen', 'fecha_publicacion', 'pais_autor'], procesar_datos_para_dashboard),
+}
+
+
+def preparar_corpus(n, directorio=DIRECTORIO_CORPUS, semilla=SEMILLA):
+    """
+    Genera (o reutiliza, si ya existe) el corpus sintético de `n` artículos con
+    `generar_dataset` y devuelve las rutas de su CSV y de su copia Parquet.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta_csv = os.path.join(directorio, f'corpus-{n}-{semilla}.csv')
+    ruta_parquet = os.path.join(directorio, f'corpus-{n}-{semilla}.parquet')
+    if not os.path.exists(ruta_csv):
+        generar_corpus(n, ruta_csv, semilla=semilla)
+    return ruta_csv, ruta_parquet
+
+
+def medir(preparar, funcion, repeticiones=1, memoria=True):
+    """
+    Cronometra `funcion(preparar())` (el mejor de `repeticiones`) y, en una ejecución
+    aparte bajo tracemalloc, mide su pico de memoria en MB. `preparar` no se cronometra.
+    tracemalloc sólo ve la memoria reservada por Python y NumPy, no la de pyarrow.
+    """
+    segundos = []
+    for _ in range(repeticiones):
+        entrada = preparar()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcion(entrada)
+            segundos.append(time.perf_counter() - inicio)
+        del entrada
+
+    pico = None
+    if memoria:
+        entrada = preparar()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            funcion(entrada)
+            pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+    return {'segundos': min(segundos), 'pico_memoria_mb': pico}
+
+
+def ejecutar_benchmark(tamanos=tuple(TAMANOS), etapas=tuple(ETAPAS), repeticiones=1, memoria=True):
+    """
+    Mide la carga del corpus y cada etapa de análisis para cada tamaño de corpus.
+    Devuelve {tamaño: {etapa: {'segundos', 'pico_memoria_mb', 'filas_por_segundo'}}}.
+    """
+    resultados = {}
+    for tamano in tamanos:
+        n = TAMANOS[tamano]
+        print(f"--- {tamano} artículos ---")
+        ruta_csv, ruta_parquet = preparar_corpus(n)
+        cargar_articulos(ruta_csv=ruta_csv, ruta_parquet=ruta_parquet)  # Genera la copia Parquet.
+
+        cargar = lambda: cargar_articulos(ruta_csv=ruta_csv, ruta_parquet=ruta_parquet)
+        resultados[tamano] = {'carga': medir(lambda: None, lambda _: cargar(), repeticiones, memoria)}
+        df = cargar()
+        for nombre in etapas:
+            columnas, funcion = ETAPAS[nombre]
+            resultados[tamano][nombre] = medir(lambda: df[columnas].copy(), funcion, repeticiones, memoria)
+        del df
+
+        for nombre, r in resultados[tamano].items():
+            r['filas_por_segundo'] = n / r['segundos'] if r['segundos'] else 0.0
+            memoria_mb = f"{r['pico_memoria_mb']:10.1f} MB" if r['pico_memoria_mb'] is not None else ''
+            print(f"  {nombre:<16} {r['segundos']:9.3f} s {r['filas_por_segundo']:14,.0f} filas/s {memoria_mb}")
+    return resultados
+
+
+def comparar(resultados, referencia, umbral=UMBRAL_REGRESION):
+    """
+    Compara `resultados` con los de una ejecución anterior y devuelve la lista de
+    regresiones: etapas más lentas o con más pico de memoria por encima del umbral.
+    """
+    regresiones = []
+    for tamano, etapas in resultados.items():
+        for nombre, actual in etapas.items():
+            anterior = referencia.get(tamano, {}).get(nombre)
+            if anterior is None:
+                continue
+            for metrica, minimo in (('segundos', MINIMO_SEGUNDOS), ('pico_memoria_mb', MINIMO_MEMORIA_MB)):
+                antes, ahora = anterior.get(metrica), actual.get(metrica)
+                if antes is None or ahora is None:
+                    continue
+                if ahora > antes * (1 + umbral) and ahora - antes > minimo:
+                    regresiones.append({'tamano': tamano, 'etapa': nombre, 'metrica': metrica,
+                                        'antes': antes, 'ahora': ahora, 'cambio': ahora / antes - 1})
+    return regresiones
+
+
+def guardar_resultados(resultados, ruta=RUTA_RESULTADOS):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'resultados': resultados,
+        }, f, ensure_ascii=False, indent=2)
+
+
+def cargar_resultados(ruta=RUTA_RESULTADOS):
+    """Resultados de una ejecución anterior, o None si no existen."""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)['resultados']
+    except FileNotFoundError:
+        return None
+
+
+if __name__ == "__main__":
+    # Uso: python benchmark.py [--tamanos 1k 100k 1M 10M] [--etapas ...] [--referencia ruta.json]
+    #                          [--salida ruta.json] [--umbral 0.2] [--repeticiones N] [--sin-memoria]
+    # Sale con código 1 si hay regresiones respecto a la referencia (por defecto, la
+    # ejecución anterior guardada en --salida).
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas de análisis.")
+    parser.add_argument('--tamanos', nargs='+', choices=list(TAMANOS), default=list(TAMANOS))
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--salida', default=RUTA_RESULTADOS)
+    parser.add_argument('--referencia', default=None)
+    parser.add_argument('--umbral', type=float, default=UMBRAL_REGRESION)
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--sin-memoria', action='store_true')
+    args = parser.parse_args()
+
+    anteriores = cargar_resultados(args.salida) or {}
+    referencia = cargar_resultados(args.referencia) if args.referencia else anteriores
+    resultados = ejecutar_benchmark(args.tamanos, args.etapas, args.repeticiones, not args.sin_memoria)
+    # Los tamaños y etapas que no se han medido ahora conservan su último resultado.
+    guardar_resultados({tamano: {**anteriores.get(tamano, {}), **resultados.get(tamano, {})}
+                        for tamano in TAMANOS if tamano in anteriores or tamano in resultados}, args.salida)
+    print(f"\nResultados guardados en '{args.salida}'.")
+
+    if not referencia:
+        print("No hay ejecución de referencia con la que comparar.")
+        sys.exit(0)
+    regresiones = comparar(resultados, referencia, args.umbral)
+    if not regresiones:
+        print(f"Sin regresiones (umbral {args.umbral:.0%}).")
+        sys.exit(0)
+    print(f"\n--- {len(regresiones)} regresiones (umbral {args.umbral:.0%}) ---")
+    for r in regresiones:
+        print(f"  {r['tamano']:<5} {r['etapa']:<16} {r['metrica']:<16} {r['antes']:10.3f} -> {r['ahora']:10.3f} "
+              f"({r['cambio']:+.0%})")
+    sys.exit(1)
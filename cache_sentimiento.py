@@ -0,0 +1,148 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from motor_sentimiento import COLUMNAS_SENTIMIENTO, VERSION_MOTOR, puntuar_textos
+
+RUTA_CACHE = '.cache_sentimiento.sqlite'
+MAX_ENTRADAS = 5_000_000
+
+
+def clave_texto(texto, version=VERSION_MOTOR):
+    """Clave de contenido de un resumen: hash del texto junto con la versión del analizador."""
+    return hashlib.blake2b(f"{version}\0{texto}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheSentimiento:
+    """
+    Caché persistente en disco (SQLite) de las puntuaciones de sentimiento.
+
+    Las entradas se indexan por el hash del texto del resumen y la versión del analizador,
+    así que un resumen editado o un cambio de versión de VADER/motor nunca reutilizan
+    puntuaciones antiguas. El tamaño está acotado por `max_entradas`: al superarlo se
+    eliminan las entradas usadas hace más tiempo (LRU).
+
+    Invalidación:
+    - Automática al cambiar el texto (otra clave) o `VERSION_MOTOR` (las entradas de otras
+      versiones se purgan al abrir la caché).
+    - Manual con `invalidar()`, que vacía la caché por completo.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, max_entradas=MAX_ENTRADAS, version=VERSION_MOTOR):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.version = version
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS puntuaciones (
+                clave TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                neg REAL, neu REAL, pos REAL, compound REAL,
+                ultimo_uso INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ultimo_uso ON puntuaciones (ultimo_uso);
+        """)
+        with self.conexion:
+            self.conexion.execute("DELETE FROM puntuaciones WHERE version != ?", (self.version,))
+        # Reloj lógico para el LRU: cada llamada a `puntuar` es un instante nuevo.
+        self._reloj, self._entradas = self.conexion.execute(
+            "SELECT COALESCE(MAX(ultimo_uso), 0), COUNT(*) FROM puntuaciones").fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __len__(self):
+        # Contador mantenido en memoria: un COUNT(*) recorrería la tabla en cada lote.
+        return self._entradas
+
+    def puntuar(self, textos):
+        """
+        Devuelve un DataFrame con neg, neu, pos y compound para cada texto (mismo orden),
+        consultando la caché y puntuando con el motor por lotes sólo los textos nuevos.
+        """
+        serie = pd.Series(textos, dtype=object).fillna('').astype(str).reset_index(drop=True)
+        codigos, unicos = pd.factorize(serie)
+        claves = [clave_texto(t, self.version) for t in unicos]
+        self._reloj += 1
+
+        encontrados = self._buscar(claves)
+        faltan = [i for i, clave in enumerate(claves) if clave not in encontrados]
+        self.aciertos += len(claves) - len(faltan)
+        self.fallos += len(faltan)
+
+        valores = np.empty((len(claves), len(COLUMNAS_SENTIMIENTO)))
+        for i, clave in enumerate(claves):
+            if clave in encontrados:
+                valores[i] = encontrados[clave]
+        if faltan:
+            nuevos = puntuar_textos([unicos[i] for i in faltan]).to_numpy()
+            valores[faltan] = nuevos
+            self._guardar([claves[i] for i in faltan], nuevos)
+        self._expulsar()
+
+        return pd.DataFrame(valores[codigos], columns=COLUMNAS_SENTIMIENTO)
+
+    def _buscar(self, claves):
+        # Las claves se cargan en una tabla temporal para resolver la consulta con un único JOIN.
+        with self.conexion:
+            self.conexion.execute("CREATE TEMP TABLE IF NOT EXISTS consulta (clave TEXT PRIMARY KEY)")
+            self.conexion.execute("DELETE FROM consulta")
+            self.conexion.executemany("INSERT OR IGNORE INTO consulta VALUES (?)", ((c,) for c in claves))
+            filas = self.conexion.execute("""
+                SELECT p.clave, p.neg, p.neu, p.pos, p.compound
+                FROM puntuaciones p JOIN consulta c ON p.clave = c.clave
+            """).fetchall()
+            self.conexion.execute("""
+                UPDATE puntuaciones SET ultimo_uso = ?
+                WHERE clave IN (SELECT clave FROM consulta)
+            """, (self._reloj,))
+        return {fila[0]: fila[1:] for fila in filas}
+
+    def _guardar(self, claves, valores):
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO puntuaciones VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((clave, self.version, *map(float, fila), self._reloj) for clave, fila in zip(claves, valores))
+            )
+        # Sólo se guardan claves que `_buscar` no encontró: todas son entradas nuevas.
+        self._entradas += len(claves)
+
+    def _expulsar(self):
+        sobrantes = len(self) - self.max_entradas
+        if sobrantes > 0:
+            with self.conexion:
+                self.conexion.execute("""
+                    DELETE FROM puntuaciones WHERE clave IN (
+                        SELECT clave FROM puntuaciones ORDER BY ultimo_uso LIMIT ?
+                    )
+                """, (sobrantes,))
+            self.expulsiones += sobrantes
+            self._entradas -= sobrantes
+
+    def invalidar(self):
+        """Vacía la caché por completo (p. ej. tras cambiar el léxico a mano)."""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM puntuaciones")
+        self._reloj = self._entradas = 0
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos y expulsiones de esta sesión, y entradas almacenadas."""
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'expulsiones': self.expulsiones,
+            'entradas': len(self),
+        }
@@ -0,0 +1,215 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from instrumentacion import instrumentar
+
+# pyarrow es opcional: sin él se lee directamente el CSV (más lento, pero con los mismos tipos).
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+RUTA_CSV = 'articulos_educacion_online.csv'
+RUTA_PARQUET = 'articulos_educacion_online.parquet'
+
+# Tipos del corpus una vez cargado (fecha_publicacion se convierte aparte a fecha real).
+TIPOS = {
+    'id_articulo': 'int32',
+    'titulo': 'string',
+    'resumen': 'string',
+    'pais_autor': 'category',
+    'citas': 'int32',
+}
+
+# Formato compacto (`compactar`): textos repetidos como categóricos (cada valor distinto se
+# guarda una sola vez), la fecha como número de día int32 y los enteros con el tipo más
+# pequeño que los contiene. Objetivo: como mucho BYTES_POR_FILA_OBJETIVO bytes por artículo
+# además del texto del resumen (frente a unos 68 del formato normal, casi todos del título).
+BYTES_POR_FILA_OBJETIVO = 16
+CATEGORICAS = ('titulo', 'pais_autor', 'sentimiento_general')
+# Puntuaciones de VADER (redondeadas a 4 decimales): se guardan como int16 en unidades de 1e-4.
+PUNTUACIONES = ('neg', 'neu', 'pos', 'compound')
+EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def _parsear_fecha(df):
+    if 'fecha_publicacion' in df.columns:
+        df['fecha_publicacion'] = pd.to_datetime(df['fecha_publicacion'], format='%Y-%m-%d')
+    return df
+
+
+def _leer_csv(ruta_csv, columnas=None, desde=0, tamano_bloque=None):
+    """
+    Lee el CSV aplicando los tipos del corpus y parseando la fecha, a partir del artículo
+    `desde` (0 = el primero tras la cabecera). Con `tamano_bloque` devuelve un iterador
+    de bloques de ese número de filas.
+    """
+    lector = pd.read_csv(ruta_csv, usecols=columnas, skiprows=range(1, desde + 1), chunksize=tamano_bloque,
+                         dtype={c: t for c, t in TIPOS.items() if columnas is None or c in columnas})
+    if tamano_bloque is None:
+        return _parsear_fecha(lector)
+    return (_parsear_fecha(bloque) for bloque in lector)
+
+
+def convertir_a_parquet(ruta_csv=RUTA_CSV, ruta_parquet=RUTA_PARQUET):
+    """
+    Convierte el corpus CSV a Parquet con tipos columnares: `pais_autor` como diccionario
+    (categórico), `fecha_publicacion` como date32 y `citas`/`id_articulo` como int32.
+    """
+    df = _leer_csv(ruta_csv)
+    df['fecha_publicacion'] = df['fecha_publicacion'].dt.date
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(tabla, ruta_parquet, row_group_size=1_000_000)
+
+
+def fechas_desde_dias(dias):
+    """Convierte números de día (desde 1970-01-01) en fechas datetime64."""
+    return pd.Series(EPOCA + np.asarray(dias), index=getattr(dias, 'index', None), name='fecha_publicacion')
+
+
+def obtener_años(df):
+    """
+    Año de publicación de cada artículo, tanto en el formato normal ('fecha_publicacion')
+    como en el compacto ('dia_publicacion'); si `df` ya trae la columna 'año', se usa tal cual.
+    """
+    if 'año' in df.columns:
+        return df['año']
+    if 'dia_publicacion' in df.columns:
+        años = (EPOCA + df['dia_publicacion'].to_numpy()).astype('datetime64[Y]').astype('int32') + 1970
+        return pd.Series(años, index=df.index, name='año')
+    return pd.to_datetime(df['fecha_publicacion']).dt.year
+
+
+def compactar(df):
+    """
+    Devuelve una copia de `df` con el formato compacto en memoria:
+    - 'titulo', 'pais_autor' y 'sentimiento_general' como categóricos.
+    - 'fecha_publicacion' sustituida por 'dia_publicacion': días desde 1970-01-01 en int32
+      (ver `fechas_desde_dias` y `obtener_años`).
+    - 'neg', 'neu', 'pos' y 'compound' sustituidas por '<columna>_1e4': int16 en unidades
+      de 1e-4, sin pérdida porque VADER las redondea a 4 decimales.
+    - Las columnas enteras ('id_articulo', 'citas', ...) con el tipo más pequeño posible.
+    Las columnas que no estén en `df` se ignoran.
+    """
+    compacto = pd.DataFrame(index=df.index)
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in CATEGORICAS:
+            compacto[columna] = serie.astype('category')
+        elif columna == 'fecha_publicacion':
+            dias = pd.to_datetime(serie).to_numpy().astype('datetime64[D]') - EPOCA
+            compacto['dia_publicacion'] = dias.astype('int32')
+        elif columna in PUNTUACIONES:
+            compacto[f'{columna}_1e4'] = (serie.to_numpy() * 10_000).round().astype('int16')
+        elif pd.api.types.is_integer_dtype(serie.dtype):
+            # Con signo aunque no haya negativos: restar dos columnas sin signo desbordaría.
+            compacto[columna] = pd.to_numeric(serie, downcast='integer')
+        else:
+            compacto[columna] = serie
+    return compacto
+
+
+def memoria_por_fila(df):
+    """Bytes por fila de cada columna de `df` (incluido el contenido de los textos)."""
+    return df.memory_usage(deep=True, index=False) / max(len(df), 1)
+
+
+@instrumentar('carga', filas_del_resultado=True)
+def cargar_articulos(columnas=None, ruta_csv=RUTA_CSV, ruta_parquet=RUTA_PARQUET, compacto=False):
+    """
+    Carga el corpus de artículos leyendo sólo las `columnas` pedidas (todas por defecto).
+
+    La primera vez (o si el CSV es más reciente) se genera la copia Parquet; a partir de
+    ahí se lee con memory-map sin volver a parsear texto. `fecha_publicacion` llega ya como
+    datetime64, así que no hace falta aplicar `pd.to_datetime` en cada script.
+    Con `compacto=True` se devuelve el formato compacto en memoria (ver `compactar`).
+    Lanza FileNotFoundError si no existe el CSV ni la copia Parquet.
+    """
+    if pq is None:
+        df = _leer_csv(ruta_csv, columnas)
+        return compactar(df) if compacto else df
+
+    if not os.path.exists(ruta_parquet) or (
+            os.path.exists(ruta_csv) and os.path.getmtime(ruta_csv) > os.path.getmtime(ruta_parquet)):
+        if not os.path.exists(ruta_csv):
+            raise FileNotFoundError(ruta_csv)
+        convertir_a_parquet(ruta_csv, ruta_parquet)
+
+    tabla = pq.read_table(ruta_parquet, columns=columnas, memory_map=True)
+    df = tabla.to_pandas(date_as_object=False)
+    return compactar(df) if compacto else df
+
+
+@instrumentar('carga.filas', filas_del_resultado=True)
+def cargar_filas(desde, columnas=None, ruta_csv=RUTA_CSV, compacto=False):
+    """
+    Variante de `cargar_articulos` para los modos incrementales: sólo los artículos a partir
+    de la posición `desde` del CSV (los añadidos al final desde la última ejecución), con los
+    mismos tipos y el mismo formato compacto opcional. Se lee siempre del CSV, porque la copia
+    Parquet sólo se regenera al cargar el corpus completo.
+    """
+    df = _leer_csv(ruta_csv, columnas, desde)
+    return compactar(df) if compacto else df
+
+
+def bloques_articulos(desde=0, columnas=None, ruta_csv=RUTA_CSV, tamano_bloque=100_000, compacto=False):
+    """Como `cargar_filas`, pero por bloques de `tamano_bloque` filas sin cargar el CSV entero."""
+    for bloque in _leer_csv(ruta_csv, columnas, desde, tamano_bloque):
+        yield compactar(bloque) if compacto else bloque
+
+
+if __name__ == "__main__":
+    # Benchmark: parseo del CSV (como hacían los scripts) frente a la lectura columnar.
+    try:
+        inicio = time.perf_counter()
+        df = pd.read_csv(RUTA_CSV)
+        df['fecha_publicacion'] = pd.to_datetime(df['fecha_publicacion'])
+        t_csv = time.perf_counter() - inicio
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        exit()
+
+    cargar_articulos()  # Genera la copia Parquet si hace falta.
+    inicio = time.perf_counter()
+    cargar_articulos()
+    t_todo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    cargar_articulos(['id_articulo', 'fecha_publicacion'])
+    t_proyeccion = time.perf_counter() - inicio
+
+    print(f"CSV + pd.to_datetime:            {t_csv * 1000:8.2f} ms")
+    print(f"Parquet (todas las columnas):    {t_todo * 1000:8.2f} ms")
+    print(f"Parquet (id + fecha):            {t_proyeccion * 1000:8.2f} ms")
+
+    # Formato normal frente a compacto: memoria por fila y tiempo de agrupaciones típicas.
+    def agrupar(df):
+        años = obtener_años(df)
+        df.groupby(['pais_autor', años], observed=True)['citas'].agg(['size', 'mean'])
+        df.groupby('titulo', observed=True)['citas'].sum()
+        años.value_counts()
+
+    def mejor_tiempo(funcion, repeticiones=5):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos)
+
+    normal = cargar_articulos()
+    compacto = cargar_articulos(compacto=True)
+    memoria_normal, memoria_compacto = memoria_por_fila(normal), memoria_por_fila(compacto)
+    print("\nBytes por fila       normal  compacto")
+    for columna_normal, columna_compacto in zip(normal.columns, compacto.columns):
+        print(f"  {columna_compacto:<18} {memoria_normal[columna_normal]:7.1f}  {memoria_compacto[columna_compacto]:8.1f}")
+    print(f"  {'total':<18} {memoria_normal.sum():7.1f}  {memoria_compacto.sum():8.1f}")
+    sin_resumen = memoria_compacto.drop('resumen').sum()
+    print(f"Compacto sin el resumen: {sin_resumen:.1f} bytes por fila "
+          f"(objetivo <= {BYTES_POR_FILA_OBJETIVO}: {'cumplido' if sin_resumen <= BYTES_POR_FILA_OBJETIVO else 'NO cumplido'})")
+    t_normal, t_compacto = mejor_tiempo(lambda: agrupar(normal)), mejor_tiempo(lambda: agrupar(compacto))
+    print(f"Agrupaciones (país x año, título, año): normal {t_normal * 1000:.2f} ms, "
+          f"compacto {t_compacto * 1000:.2f} ms ({t_normal / t_compacto:.1f}x)")
@@ -0,0 +1,258 @@
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import normalize
+
+# Mismo análisis de texto que el clustering completo (TfidfVectorizer de clustering_tematico).
+OPCIONES_TEXTO = {'stop_words': 'english', 'ngram_range': (1, 2)}
+
+
+def _lotes(textos, tamano_lote):
+    """Recorre una serie de textos en trozos de `tamano_lote` filas."""
+    for inicio in range(0, len(textos), tamano_lote):
+        yield textos.iloc[inicio:inicio + tamano_lote]
+
+
+def crear_vectorizador(n_features=2 ** 18):
+    """
+    HashingVectorizer con conteos brutos: no guarda vocabulario, así que su memoria no
+    depende del tamaño del corpus. La ponderación IDF y la normalización se aplican después.
+    """
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None, **OPCIONES_TEXTO)
+
+
+def _ponderar(modelo, conteos):
+    return normalize(conteos @ sp.diags(modelo['idf']))
+
+
+def transformar(modelo, textos):
+    """Devuelve la matriz TF-IDF dispersa (normalizada L2) de `textos` en el espacio del modelo."""
+    return _ponderar(modelo, modelo['vectorizador'].transform(textos))
+
+
+def _terminos_candidatos(vectorizador, textos, max_documentos):
+    """
+    Asocia columnas del espacio hash con términos legibles a partir de una muestra de
+    documentos: para cada columna se queda con el término más frecuente de la muestra.
+    """
+    analizador = vectorizador.build_analyzer()
+    frecuencias = Counter()
+    for texto in textos.iloc[:max_documentos]:
+        frecuencias.update(analizador(texto))
+
+    terminos = [t for t, _ in frecuencias.most_common()]
+    hasher = FeatureHasher(n_features=vectorizador.n_features, input_type='string', alternate_sign=False)
+    columnas = hasher.transform([[t] for t in terminos]).indices
+
+    candidatos = {}
+    for termino, columna in zip(terminos, columnas):
+        candidatos.setdefault(int(columna), termino)  # `terminos` ya viene ordenado por frecuencia
+    return candidatos
+
+
+def ajustar_clustering_escalable(textos, num_clusters=4, tamano_lote=10_000, n_features=2 ** 18,
+                                 n_epocas=1, min_df=5, max_df=0.95, max_documentos_terminos=5_000,
+                                 random_state=42):
+    """
+    Ajusta un clustering temático sobre TF-IDF por hashing sin materializar nunca la matriz
+    documentos × términos completa:
+
+    1. Una pasada que tokeniza cada lote una sola vez, cuenta la frecuencia documental de
+       cada columna hash (IDF, min_df, max_df) y guarda los conteos del lote en disco.
+    2. `n_epocas` pasadas de `MiniBatchKMeans.partial_fit` sobre los lotes guardados.
+    3. Una pasada final que asigna el clúster de cada documento y acumula la inercia.
+
+    Devuelve el modelo (diccionario con el vectorizador, el vector IDF, el KMeans, la inercia
+    y el mapa columna → término usado para mostrar los términos más relevantes) y las
+    etiquetas de clúster de `textos`.
+    """
+    textos = pd.Series(textos).reset_index(drop=True)
+    vectorizador = crear_vectorizador(n_features)
+    with tempfile.TemporaryDirectory(prefix='clustering_') as directorio:
+        return _ajustar(textos, vectorizador, directorio, num_clusters, tamano_lote, n_epocas,
+                        min_df, max_df, max_documentos_terminos, random_state)
+
+
+def _ajustar(textos, vectorizador, directorio, num_clusters, tamano_lote, n_epocas,
+             min_df, max_df, max_documentos_terminos, random_state):
+    n_features = vectorizador.n_features
+
+    # --- Pasada 1: tokenización, frecuencia documental por columna y conteos a disco ---
+    frecuencia_doc = np.zeros(n_features, dtype=np.int64)
+    rutas = []
+    for i, lote in enumerate(_lotes(textos, tamano_lote)):
+        conteos = vectorizador.transform(lote)
+        frecuencia_doc += np.bincount(conteos.indices, minlength=n_features)
+        rutas.append(os.path.join(directorio, f'lote_{i}.npz'))
+        sp.save_npz(rutas[-1], conteos, compressed=False)
+
+    def lotes_ponderados():
+        for ruta in rutas:
+            yield _ponderar(modelo, sp.load_npz(ruta))
+
+    n = len(textos)
+    if n < num_clusters:
+        raise ValueError(f"Hacen falta al menos {num_clusters} documentos para {num_clusters} clústeres (hay {n}).")
+    # Misma fórmula que TfidfTransformer(smooth_idf=True); las columnas fuera de
+    # [min_df, max_df] quedan con peso 0, como si no estuvieran en el vocabulario.
+    idf = np.log((1 + n) / (1 + frecuencia_doc)) + 1
+    idf[(frecuencia_doc < min_df) | (frecuencia_doc > max_df * n)] = 0.0
+    modelo = {'vectorizador': vectorizador, 'idf': idf}
+
+    # --- Pasadas 2..: KMeans por mini-lotes ---
+    kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=random_state,
+                             batch_size=min(tamano_lote, n), n_init=3)
+    for _ in range(n_epocas):
+        # partial_fit necesita al menos `num_clusters` filas: los lotes más pequeños se juntan
+        # con los siguientes, así el modelo queda ajustado aunque ningún lote llegue a ese tamaño.
+        acumulado = None
+        for X in lotes_ponderados():
+            acumulado = X if acumulado is None else sp.vstack([acumulado, X], format='csr')
+            if acumulado.shape[0] >= num_clusters:
+                kmeans.partial_fit(acumulado)
+                acumulado = None
+    modelo['kmeans'] = kmeans
+
+    # --- Pasada final: etiquetas e inercia ---
+    etiquetas, modelo['inercia'] = [], 0.0
+    for X in lotes_ponderados():
+        etiquetas.append(kmeans.predict(X))
+        modelo['inercia'] -= kmeans.score(X)
+
+    modelo['terminos'] = _terminos_candidatos(vectorizador, textos, max_documentos_terminos)
+    return modelo, np.concatenate(etiquetas) if etiquetas else np.array([], dtype=np.int32)
+
+
+def predecir(modelo, textos, tamano_lote=10_000):
+    """Asigna un clúster a cada texto, lote a lote."""
+    textos = pd.Series(textos).reset_index(drop=True)
+    etiquetas = [modelo['kmeans'].predict(transformar(modelo, lote)) for lote in _lotes(textos, tamano_lote)]
+    return np.concatenate(etiquetas) if etiquetas else np.array([], dtype=np.int32)
+
+
+def terminos_por_cluster(modelo, n_terminos=10):
+    """Lista con los `n_terminos` términos de mayor peso en el centroide de cada clúster."""
+    columnas = np.array(list(modelo['terminos']))
+    nombres = np.array(list(modelo['terminos'].values()), dtype=object)
+    pesos = modelo['kmeans'].cluster_centers_[:, columnas]
+    orden = pesos.argsort(axis=1)[:, ::-1][:, :n_terminos]
+    return [nombres[fila].tolist() for fila in orden]
+
+
+def muestra_estratificada(etiquetas, max_por_cluster, random_state=42):
+    """Posiciones (ordenadas) de hasta `max_por_cluster` documentos elegidos al azar de cada clúster."""
+    etiquetas = np.asarray(etiquetas)
+    orden = np.random.default_rng(random_state).permutation(len(etiquetas))
+    orden = orden[np.argsort(etiquetas[orden], kind='stable')]
+    # Posición de cada documento dentro de su clúster (en el orden aleatorio).
+    _, inicios, cuentas = np.unique(etiquetas[orden], return_index=True, return_counts=True)
+    rango = np.arange(len(orden)) - np.repeat(inicios, cuentas)
+    return np.sort(orden[rango < max_por_cluster])
+
+
+def proyectar_2d(X, etiquetas=None, max_puntos_por_cluster=None, random_state=42):
+    """
+    Proyecta la matriz TF-IDF dispersa a 2 dimensiones con TruncatedSVD (randomizado)
+    sin densificarla. Con `max_puntos_por_cluster` sólo se proyecta una muestra
+    estratificada por clúster, de modo que la memoria no depende del tamaño del corpus.
+    Devuelve las coordenadas y las posiciones de los documentos proyectados.
+    """
+    indices = np.arange(X.shape[0])
+    if max_puntos_por_cluster is not None:
+        indices = muestra_estratificada(etiquetas, max_puntos_por_cluster, random_state)
+        X = X[indices]
+    svd = TruncatedSVD(n_components=2, algorithm='randomized', random_state=random_state)
+    return svd.fit_transform(X), indices
+
+
+def _tfidf_aleatoria(n_documentos, n_features=2 ** 18, terminos_por_documento=25, semilla=42):
+    """Matriz dispersa con la forma de un TF-IDF normalizado, para medir memoria a gran escala."""
+    rng = np.random.default_rng(semilla)
+    nnz = n_documentos * terminos_por_documento
+    X = sp.csr_matrix((rng.random(nnz), rng.integers(0, n_features, nnz, dtype=np.int32),
+                       np.arange(0, nnz + 1, terminos_por_documento)), shape=(n_documentos, n_features))
+    return normalize(X)
+
+
+def _medir(funcion):
+    """Ejecuta `funcion` dos veces: una cronometrada y otra bajo tracemalloc para el pico de memoria."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, segundos, pico / 2 ** 20
+
+
+def comparar_con_kmeans(textos, num_clusters=4, n_muestra_silueta=2_000, **opciones):
+    """
+    Compara el clustering completo (TfidfVectorizer + KMeans(n_init=10)) con el escalable:
+    tiempo, pico de memoria de Python (tracemalloc), inercia en su propio espacio y
+    silueta sobre una muestra común evaluada en el espacio TF-IDF exacto.
+    """
+    textos = pd.Series(textos).reset_index(drop=True)
+
+    def completo():
+        X = TfidfVectorizer(max_df=0.95, min_df=5, **OPCIONES_TEXTO).fit_transform(textos)
+        kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10)
+        return X, kmeans.fit_predict(X), kmeans.inertia_
+
+    def escalable():
+        modelo, etiquetas = ajustar_clustering_escalable(textos, num_clusters=num_clusters, **opciones)
+        return etiquetas, modelo['inercia']
+
+    (X, etiquetas_completo, inercia_completo), t_completo, m_completo = _medir(completo)
+    (etiquetas_escalable, inercia_escalable), t_escalable, m_escalable = _medir(escalable)
+
+    muestra = np.random.default_rng(42).choice(len(textos), size=min(n_muestra_silueta, len(textos)),
+                                               replace=False)
+
+    def silueta(etiquetas):
+        if len(np.unique(etiquetas[muestra])) < 2:
+            return float('nan')
+        return silhouette_score(X[muestra], etiquetas[muestra])
+
+    return {
+        'completo': {'segundos': t_completo, 'pico_memoria_mb': m_completo,
+                     'inercia': inercia_completo, 'silueta': silueta(etiquetas_completo)},
+        'escalable': {'segundos': t_escalable, 'pico_memoria_mb': m_escalable,
+                      'inercia': inercia_escalable, 'silueta': silueta(etiquetas_escalable)},
+    }
+
+
+if __name__ == "__main__":
+    # Benchmark: clustering completo frente al escalable sobre corpus sintéticos crecientes.
+    from generar_dataset import generar_datos
+
+    # Proyección 2D: memoria de TruncatedSVD sobre la matriz dispersa frente a lo que
+    # necesitaría X.toarray() + PCA (sólo estimado: no cabe en memoria a partir de ~10^4 docs).
+    print("--- Proyección 2D (pico de memoria) ---")
+    for n in (10_000, 100_000, 1_000_000):
+        X = _tfidf_aleatoria(n)
+        etiquetas = np.random.default_rng(0).integers(0, 4, n)
+        _, t_muestra, m_muestra = _medir(lambda: proyectar_2d(X, etiquetas, max_puntos_por_cluster=2_000))
+        _, t_completa, m_completa = _medir(lambda: proyectar_2d(X))
+        print(f"  {n:>9} docs: denso {n * X.shape[1] * 8 / 2 ** 30:8.1f} GB | "
+              f"SVD dispersa {m_completa:7.1f} MB ({t_completa:.2f} s) | "
+              f"SVD muestra 2000/clúster {m_muestra:6.1f} MB ({t_muestra:.2f} s)")
+        del X
+
+    for n in (5_000, 50_000, 200_000):
+        textos = generar_datos(n)['resumen']
+        print(f"--- {n} documentos ---")
+        for nombre, r in comparar_con_kmeans(textos).items():
+            print(f"  {nombre:<10} {r['segundos']:7.2f} s  pico {r['pico_memoria_mb']:8.1f} MB  "
+                  f"inercia {r['inercia']:10.1f}  silueta {r['silueta']:.3f}")
@@ -0,0 +1,276 @@
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from carga_datos import cargar_articulos, fechas_desde_dias
+from clustering_escalable import ajustar_clustering_escalable, terminos_por_cluster, transformar
+from instrumentacion import instrumentar
+
+RUTA_MODELO = 'modelo_clustering.pkl'
+TAMANO_MICROLOTE = 1_000
+
+# Peso máximo del historial de cada centroide: con más documentos absorbidos, los nuevos
+# siguen moviéndolo (como mucho 1/MEMORIA_CENTROIDES cada uno) en lugar de congelarlo.
+MEMORIA_CENTROIDES = 100_000
+
+# Detección de deriva: medias móviles exponenciales (factor ALFA_DERIVA por microlote) de
+# la distancia de los documentos a su centroide, relativa a la del ajuste, y de la
+# distancia de variación total entre el reparto por clústeres actual y el del ajuste.
+ALFA_DERIVA = 0.1
+UMBRAL_DISTANCIA = 1.25
+UMBRAL_REPARTO = 0.25
+
+
+def _referencia(modelo, etiquetas, n_documentos):
+    # Estado de la detección de deriva recién ajustado el modelo.
+    k = modelo['kmeans'].n_clusters
+    reparto = np.bincount(etiquetas, minlength=k) / max(n_documentos, 1)
+    modelo['conteos'] = np.bincount(etiquetas, minlength=k).astype(np.int64)
+    modelo['referencia'] = {'distancia': modelo['inercia'] / max(n_documentos, 1), 'reparto': reparto}
+    modelo['deriva'] = {'distancia': 1.0, 'reparto': reparto.copy(), 'microlotes': 0}
+    modelo['documentos'] = n_documentos
+
+
+@instrumentar('clustering.online.ajuste')
+def ajustar_modelo_online(textos, num_clusters=4, **opciones):
+    """
+    Ajuste completo del modelo online: el clustering escalable (TF-IDF por hashing +
+    MiniBatchKMeans) más el estado que necesitan las actualizaciones incrementales
+    (documentos por centroide y referencia para detectar deriva).
+    Las opciones se pasan a `ajustar_clustering_escalable`. Devuelve el modelo y las etiquetas.
+    """
+    textos = pd.Series(textos).reset_index(drop=True)
+    modelo, etiquetas = ajustar_clustering_escalable(textos, num_clusters=num_clusters, **opciones)
+    _referencia(modelo, etiquetas, len(textos))
+    return modelo, etiquetas
+
+
+def _distancias(centroides, X):
+    # Distancia euclídea al cuadrado de cada documento (filas de X, norma 1) a cada centroide.
+    return 1.0 - 2.0 * (X @ centroides.T) + (centroides ** 2).sum(axis=1)
+
+
+@instrumentar('clustering.online.microlote')
+def actualizar(modelo, textos):
+    """
+    Asigna un microlote de artículos nuevos a los clústeres existentes y mueve cada
+    centroide hacia la media de sus documentos nuevos (media incremental, con el historial
+    limitado a MEMORIA_CENTROIDES). El vectorizador y el IDF no cambian, y el coste sólo
+    depende del tamaño del microlote, no de los documentos absorbidos hasta ahora.
+
+    Modifica `modelo` y devuelve las etiquetas del microlote y un diccionario con la
+    deriva acumulada ('distancia_relativa', 'distancia_reparto') y si conviene reajustar.
+    """
+    textos = pd.Series(textos, dtype=object)
+    if len(textos) == 0:
+        # Microlote vacío (p. ej. una consulta sin artículos nuevos): el modelo no cambia.
+        return np.array([], dtype=np.int32), _estado_deriva(modelo)
+    X = transformar(modelo, textos.fillna('').astype(str))
+    centroides = modelo['kmeans'].cluster_centers_
+    k = len(centroides)
+
+    distancias = np.asarray(_distancias(centroides, X))
+    etiquetas = distancias.argmin(axis=1).astype(np.int32)
+    minimas = np.maximum(distancias[np.arange(len(etiquetas)), etiquetas], 0.0)
+
+    # Suma de los documentos nuevos de cada clúster (k x n_features) sin densificar X.
+    nuevos = np.bincount(etiquetas, minlength=k)
+    sumas = np.zeros_like(centroides)
+    for cluster in np.flatnonzero(nuevos):
+        sumas[cluster] = np.asarray(X[etiquetas == cluster].sum(axis=0)).ravel()
+    previos = np.minimum(modelo['conteos'], MEMORIA_CENTROIDES)
+    activos = nuevos > 0
+    centroides[activos] = ((centroides[activos] * previos[activos, None] + sumas[activos])
+                           / (previos[activos] + nuevos[activos])[:, None])
+    modelo['conteos'] += nuevos
+    modelo['documentos'] += len(etiquetas)
+
+    deriva = modelo['deriva']
+    relativa = minimas.mean() / modelo['referencia']['distancia'] if modelo['referencia']['distancia'] else 1.0
+    deriva['distancia'] += ALFA_DERIVA * (relativa - deriva['distancia'])
+    deriva['reparto'] += ALFA_DERIVA * (nuevos / len(etiquetas) - deriva['reparto'])
+    deriva['microlotes'] += 1
+    return etiquetas, _estado_deriva(modelo)
+
+
+def _estado_deriva(modelo):
+    deriva = modelo['deriva']
+    distancia_reparto = 0.5 * np.abs(deriva['reparto'] - modelo['referencia']['reparto']).sum()
+    motivos = []
+    if deriva['distancia'] > UMBRAL_DISTANCIA:
+        motivos.append('distancia')
+    if distancia_reparto > UMBRAL_REPARTO:
+        motivos.append('reparto')
+    return {'distancia_relativa': float(deriva['distancia']), 'distancia_reparto': float(distancia_reparto),
+            'reajustar': bool(motivos), 'motivos': motivos}
+
+
+def _alinear_etiquetas(centroides_nuevos, centroides_previos):
+    """
+    Permutación de los clústeres nuevos que maximiza la similitud coseno con los previos
+    (algoritmo húngaro): el clúster nuevo `orden[i]` hereda la etiqueta i. Si hay más
+    clústeres nuevos que previos, los sobrantes reciben las etiquetas siguientes.
+    """
+    def unitarios(c):
+        return c / np.maximum(np.linalg.norm(c, axis=1, keepdims=True), 1e-12)
+
+    similitud = unitarios(centroides_previos) @ unitarios(centroides_nuevos).T
+    filas, columnas = linear_sum_assignment(-similitud)
+    sobrantes = np.setdiff1d(np.arange(len(centroides_nuevos)), columnas)
+    return np.concatenate([columnas[np.argsort(filas)], sobrantes])
+
+
+@instrumentar('clustering.online.reajuste')
+def reajustar(modelo, textos, num_clusters=None, **opciones):
+    """
+    Reajuste completo (p. ej. cuando `actualizar` detecta deriva) sobre `textos`, que
+    pueden ser el corpus completo o una ventana reciente. Los clústeres nuevos se
+    emparejan con los del modelo anterior para conservar las etiquetas entre ajustes.
+    Devuelve el modelo nuevo y las etiquetas de `textos`.
+    """
+    previos = modelo['kmeans'].cluster_centers_
+    nuevo, etiquetas = ajustar_modelo_online(textos, num_clusters=num_clusters or len(previos), **opciones)
+    orden = _alinear_etiquetas(nuevo['kmeans'].cluster_centers_, previos)
+    nuevo['kmeans'].cluster_centers_ = nuevo['kmeans'].cluster_centers_[orden]
+    etiquetas = np.argsort(orden)[etiquetas].astype(np.int32)
+    _referencia(nuevo, etiquetas, len(etiquetas))
+    return nuevo, etiquetas
+
+
+def guardar_modelo(modelo, ruta=RUTA_MODELO):
+    """Persiste el modelo (vectorizador, IDF, centroides y estado de deriva) de forma atómica."""
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump(modelo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+
+def cargar_modelo(ruta=RUTA_MODELO):
+    """Carga el modelo persistido, o devuelve None si todavía no existe."""
+    try:
+        with open(ruta, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def procesar_flujo(modelo, textos, tamano_microlote=TAMANO_MICROLOTE):
+    """
+    Procesa `textos` en microlotes con `actualizar`. Devuelve las etiquetas, la latencia
+    de cada microlote (segundos) y el estado de deriva tras el último microlote.
+    """
+    textos = pd.Series(textos).reset_index(drop=True)
+    etiquetas, latencias, estado = [], [], _estado_deriva(modelo)
+    for inicio in range(0, len(textos), tamano_microlote):
+        t0 = time.perf_counter()
+        lote, estado = actualizar(modelo, textos.iloc[inicio:inicio + tamano_microlote])
+        latencias.append(time.perf_counter() - t0)
+        etiquetas.append(lote)
+    return (np.concatenate(etiquetas) if etiquetas else np.array([], dtype=np.int32),
+            np.array(latencias), estado)
+
+
+def asignar_articulos(modelo, ruta_csv, ruta_salida, tamano_microlote=TAMANO_MICROLOTE):
+    """
+    Asigna los artículos del CSV `ruta_csv` con `procesar_flujo` y escribe en `ruta_salida`
+    el mismo CSV con la columna 'cluster'. Se carga como el resto de scripts (copia Parquet
+    junto al CSV y formato compacto); la fecha se vuelve a escribir como 'fecha_publicacion'.
+    Devuelve el número de artículos asignados, las latencias por microlote y el estado de deriva.
+    """
+    nuevos = cargar_articulos(ruta_csv=ruta_csv, ruta_parquet=os.path.splitext(ruta_csv)[0] + '.parquet',
+                              compacto=True)
+    nuevos['cluster'], latencias, estado = procesar_flujo(modelo, nuevos['resumen'], tamano_microlote)
+    if 'dia_publicacion' in nuevos.columns:
+        posicion = nuevos.columns.get_loc('dia_publicacion')
+        nuevos.insert(posicion, 'fecha_publicacion', fechas_desde_dias(nuevos.pop('dia_publicacion')))
+    nuevos.to_csv(ruta_salida, index=False)
+    return len(nuevos), latencias, estado
+
+
+def _textos_con_deriva(n, semilla=0):
+    """Resúmenes de un tema que no aparece en el corpus sintético, para simular deriva."""
+    rng = np.random.default_rng(semilla)
+    temas = ['blockchain', 'realidad virtual', 'inteligencia artificial generativa', 'microcredenciales',
+             'analítica del aprendizaje', 'gamificación', 'chatbots', 'metaverso']
+    return pd.Series([f"Se evalúa {a} junto a {b} y {c} en universidades." for a, b, c in
+                      rng.choice(temas, size=(n, 3))])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clustering temático con actualización online.")
+    parser.add_argument('--ajustar', action='store_true',
+                        help="ajusta el modelo sobre el corpus completo y lo guarda")
+    parser.add_argument('--asignar', metavar='CSV',
+                        help="asigna los artículos nuevos del CSV por microlotes y actualiza el modelo")
+    parser.add_argument('--salida', default='articulos_nuevos_clusters.csv')
+    parser.add_argument('--microlote', type=int, default=TAMANO_MICROLOTE)
+    parser.add_argument('--modelo', default=RUTA_MODELO)
+    args = parser.parse_args()
+
+    if args.ajustar:
+        try:
+            textos = cargar_articulos(['resumen'])['resumen']
+        except FileNotFoundError:
+            print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+            print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+            exit()
+        previo = cargar_modelo(args.modelo)
+        modelo, _ = reajustar(previo, textos) if previo is not None else ajustar_modelo_online(textos)
+        guardar_modelo(modelo, args.modelo)
+        print(f"Modelo ajustado con {len(textos)} artículos y guardado en '{args.modelo}'")
+        for i, terminos in enumerate(terminos_por_cluster(modelo)):
+            print(f"Cluster {i}: {', '.join(terminos)}")
+
+    elif args.asignar:
+        modelo = cargar_modelo(args.modelo)
+        if modelo is None:
+            print(f"Error: no existe el modelo '{args.modelo}'. Ejecuta primero con --ajustar.")
+            exit()
+        try:
+            n_asignados, latencias, estado = asignar_articulos(modelo, args.asignar, args.salida, args.microlote)
+        except FileNotFoundError:
+            print(f"Error: El archivo '{args.asignar}' no fue encontrado.")
+            exit()
+        guardar_modelo(modelo, args.modelo)
+        print(f"{n_asignados} artículos asignados en {len(latencias)} microlotes "
+              f"(p50 {np.median(latencias) * 1000:.1f} ms, máx {latencias.max() * 1000:.1f} ms); "
+              f"resultado en '{args.salida}'")
+        print(f"Deriva: distancia relativa {estado['distancia_relativa']:.2f}, "
+              f"reparto {estado['distancia_reparto']:.2f}")
+        if estado['reajustar']:
+            print(f"Se recomienda un reajuste completo ({', '.join(estado['motivos'])}): ejecuta con --ajustar.")
+
+    else:
+        # Benchmark: latencia por microlote a medida que crece el número de documentos
+        # absorbidos, estabilidad de las etiquetas y detección de deriva.
+        from generar_dataset import generar_datos
+
+        inicial = generar_datos(50_000, semilla=1)['resumen']
+        flujo = generar_datos(200_000, semilla=2)['resumen']
+        modelo, _ = ajustar_modelo_online(inicial)
+        sonda = flujo.iloc[:5_000]
+        etiquetas_sonda = actualizar(modelo, sonda)[0]
+
+        _, latencias, estado = procesar_flujo(modelo, flujo.iloc[5_000:])
+        tramos = np.array_split(latencias, 4)
+        print(f"Latencia por microlote de {TAMANO_MICROLOTE} (p50 por cuartos del flujo): "
+              + ', '.join(f'{np.median(t) * 1000:.1f} ms' for t in tramos))
+        estables = (actualizar(modelo, sonda)[0] == etiquetas_sonda).mean()
+        print(f"Etiquetas de la sonda sin cambios tras {modelo['documentos']} documentos: {estables:.1%}")
+        print(f"Sin deriva: distancia relativa {estado['distancia_relativa']:.2f}, "
+              f"reparto {estado['distancia_reparto']:.2f}, reajustar={estado['reajustar']}")
+
+        _, _, estado = procesar_flujo(modelo, _textos_con_deriva(30_000))
+        print(f"Con deriva: distancia relativa {estado['distancia_relativa']:.2f}, "
+              f"reparto {estado['distancia_reparto']:.2f}, reajustar={estado['reajustar']} {estado['motivos']}")
+
+        ajuste_libre, _ = ajustar_modelo_online(flujo, random_state=7)
+        reajustado, _ = reajustar(modelo, flujo, random_state=7)
+        sin_alinear = ajuste_libre['kmeans'].predict(transformar(ajuste_libre, sonda))
+        alineadas = reajustado['kmeans'].predict(transformar(reajustado, sonda))
+        print(f"Etiquetas de la sonda conservadas tras un reajuste completo: {(alineadas == etiquetas_sonda).mean():.1%} "
+              f"(sin alinear: {(sin_alinear == etiquetas_sonda).mean():.1%})")
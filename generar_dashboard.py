@@ -1,66 +1,184 @@
+import os
+import sys
 import pandas as pd
 import json
+from functools import lru_cache
 from jinja2 import Template
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from agregados_citas import (
+    COLUMNAS as COLUMNAS_CITAS, actualizar_agregados_citas, calcular_agregados_citas, guardar_agregados_citas,
+    tablas_citas
+)
+from cache_sentimiento import CacheSentimiento
+from carga_datos import cargar_articulos, cargar_filas, obtener_años
+from instrumentacion import guardar_informe, instrumentar, resumen
+from motor_sentimiento import VERSION_MOTOR, clasificar_sentimiento, puntuar_textos
 
-def procesar_datos_para_dashboard(df):
+RUTA_AGREGADOS = 'dashboard_agregados.json'
+# Columnas del corpus que necesitan los agregados generales.
+COLUMNAS = ['resumen', 'fecha_publicacion', 'pais_autor']
+
+# Nombre de cada agregado parcial y tipo de su clave (JSON sólo guarda claves de texto).
+AGREGADOS = {'por_año': int, 'por_pais': str, 'por_sentimiento': str, 'compound_por_año': int}
+
+@instrumentar('dashboard.agregados')
+def calcular_agregados(df, cache=None):
     """
-    Procesa el DataFrame para extraer todas las métricas necesarias para el dashboard.
+    Calcula los agregados parciales (combinables) de un conjunto de artículos:
+    conteos por año, país y sentimiento, y la suma del 'compound' por año.
+
+    La suma del 'compound' se guarda como entero en unidades de 1e-4 (VADER lo redondea
+    a 4 decimales), de forma que combinar agregados es exacto y el resultado incremental
+    coincide bit a bit con un recálculo completo.
+
+    Si `df` ya trae las columnas 'año' y/o 'compound' (p. ej. desde pipeline.py), se
+    reutilizan en lugar de volver a derivar la fecha y puntuar los resúmenes. También se
+    acepta el formato compacto de carga_datos ('dia_publicacion' y 'compound_1e4').
     """
-    # --- Métricas Generales ---
-    num_articulos = len(df)
-    num_paises = df['pais_autor'].nunique()
-    
-    # --- Análisis Temporal ---
-    df['año'] = pd.to_datetime(df['fecha_publicacion']).dt.year
-    publicaciones_por_año = df.groupby('año').size().reset_index(name='cantidad')
-    
-    # --- Análisis Geográfico ---
-    publicaciones_por_pais = df['pais_autor'].value_counts().reset_index()
-    publicaciones_por_pais.columns = ['pais', 'cantidad']
-    
-    # --- Análisis de Sentimiento ---
-    analyzer = SentimentIntensityAnalyzer()
-    df['compound'] = df['resumen'].apply(lambda res: analyzer.get_polarity_scores(res)['compound'])
-    df['sentimiento_general'] = df['compound'].apply(
-        lambda c: 'Positivo' if c > 0.05 else ('Negativo' if c < -0.05 else 'Neutral')
-    )
-    distribucion_sentimiento = df['sentimiento_general'].value_counts().reset_index()
-    distribucion_sentimiento.columns = ['sentimiento', 'cantidad']
-    
-    # --- Evolución del Sentimiento ---
-    sentimiento_por_año = df.groupby('año')['compound'].mean().reset_index()
-    
-    # --- Preparar datos para JSON ---
-    # Convertimos los dataframes a formatos de diccionario que Chart.js pueda leer fácilmente.
-    chart_data = {
-        "num_articulos": num_articulos,
-        "num_paises": num_paises,
-        "fecha_min": df['año'].min(),
-        "fecha_max": df['año'].max(),
+    años = obtener_años(df)
+    if 'compound_1e4' in df.columns:
+        compound = df['compound_1e4'].to_numpy() / 10_000
+    elif 'compound' in df.columns:
+        compound = df['compound'].to_numpy()
+    else:
+        puntuaciones = cache.puntuar(df['resumen']) if cache is not None else puntuar_textos(df['resumen'])
+        compound = puntuaciones['compound'].to_numpy()
+    sentimiento = clasificar_sentimiento(compound, etiquetas=('Positivo', 'Negativo', 'Neutral'))
+    compound_1e4 = pd.Series((compound * 10_000).round().astype('int64'), index=df.index)
+
+    return {
+        'filas': len(df),
+        'por_año': {int(k): int(v) for k, v in años.value_counts().items()},
+        # Con `pais_autor` categórico value_counts incluye países sin artículos: se descartan.
+        'por_pais': {str(k): int(v) for k, v in df['pais_autor'].value_counts().items() if v},
+        'por_sentimiento': {str(k): int(v) for k, v in pd.Series(sentimiento).value_counts().items()},
+        'compound_por_año': {int(k): int(v) for k, v in compound_1e4.groupby(años).sum().items()},
+    }
+
+def combinar_agregados(a, b):
+    """Suma dos conjuntos de agregados parciales."""
+    combinado = {'filas': a['filas'] + b['filas']}
+    for nombre in AGREGADOS:
+        combinado[nombre] = dict(a[nombre])
+        for clave, valor in b[nombre].items():
+            combinado[nombre][clave] = combinado[nombre].get(clave, 0) + valor
+    return combinado
+
+def datos_desde_agregados(agregados):
+    """Construye los datos del dashboard (formato de Chart.js) a partir de los agregados."""
+    años = sorted(agregados['por_año'])
+    # Orden descendente por cantidad; a igualdad, alfabético para que el resultado sea determinista.
+    paises = sorted(agregados['por_pais'].items(), key=lambda kv: (-kv[1], kv[0]))
+    sentimientos = sorted(agregados['por_sentimiento'].items(), key=lambda kv: (-kv[1], kv[0]))
+
+    return {
+        "num_articulos": agregados['filas'],
+        "num_paises": len(agregados['por_pais']),
+        "fecha_min": años[0] if años else None,
+        "fecha_max": años[-1] if años else None,
         "publicaciones_por_año": {
-            "labels": publicaciones_por_año['año'].tolist(),
-            "data": publicaciones_por_año['cantidad'].tolist()
+            "labels": años,
+            "data": [agregados['por_año'][a] for a in años]
         },
         "publicaciones_por_pais": {
-            "labels": publicaciones_por_pais['pais'].tolist(),
-            "data": publicaciones_por_pais['cantidad'].tolist()
+            "labels": [p for p, _ in paises],
+            "data": [n for _, n in paises]
         },
         "distribucion_sentimiento": {
-            "labels": distribucion_sentimiento['sentimiento'].tolist(),
-            "data": distribucion_sentimiento['cantidad'].tolist()
+            "labels": [s for s, _ in sentimientos],
+            "data": [n for _, n in sentimientos]
         },
         "evolucion_sentimiento": {
-            "labels": sentimiento_por_año['año'].tolist(),
-            "data": sentimiento_por_año['compound'].tolist()
+            "labels": años,
+            "data": [agregados['compound_por_año'][a] / 10_000 / agregados['por_año'][a] for a in años]
         }
     }
-    
-    return chart_data
 
-def generar_html(data):
+def procesar_datos_para_dashboard(df, cache=None):
+    """
+    Procesa el DataFrame para extraer todas las métricas necesarias para el dashboard.
+    Si se pasa una `CacheSentimiento`, sólo se puntúan los resúmenes que no estén en ella.
+    """
+    return datos_desde_agregados(calcular_agregados(df, cache=cache))
+
+def guardar_agregados(agregados, ruta=RUTA_AGREGADOS, filas_csv=None):
+    """
+    Persiste los agregados junto con la versión del motor de sentimiento y `filas_csv`,
+    las filas del CSV ya incorporadas (ver `agregados_citas.guardar_agregados_citas`).
+    """
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_MOTOR, 'filas_csv': filas_csv, **agregados}, f, ensure_ascii=False)
+
+def cargar_agregados(ruta=RUTA_AGREGADOS):
     """
-    Toma los datos procesados y los inserta en una plantilla HTML.
+    Carga los agregados persistidos, con su 'filas_csv'. Devuelve None si no existen o se
+    calcularon con otra versión del motor de sentimiento (en ese caso hay que recalcular todo).
+    """
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            guardado = json.load(f)
+    except FileNotFoundError:
+        return None
+    if guardado.get('version') != VERSION_MOTOR:
+        return None
+    agregados = {'filas': guardado['filas'], 'filas_csv': guardado.get('filas_csv')}
+    for nombre, tipo in AGREGADOS.items():
+        agregados[nombre] = {tipo(k): v for k, v in guardado[nombre].items()}
+    return agregados
+
+@instrumentar('dashboard.incremental')
+def actualizar_agregados(ruta_csv, ruta_agregados=RUTA_AGREGADOS, cache=None):
+    """
+    Modo incremental: incorpora a los agregados guardados sólo las filas añadidas al
+    final del CSV desde la última ejecución y guarda el estado combinado.
+
+    Supone que el CSV sólo crece por el final. Si no hay estado previo, es de otra versión,
+    no dice desde qué fila del CSV seguir ('filas_csv') o el CSV tiene menos filas de las ya
+    procesadas, se recalcula desde cero.
+    """
+    agregados = cargar_agregados(ruta_agregados)
+    filas_csv = agregados.pop('filas_csv') if agregados is not None else None
+    if filas_csv is None:
+        agregados = None
+    else:
+        nuevas = cargar_filas(filas_csv, COLUMNAS, ruta_csv, compacto=True)
+        # Si el CSV tiene menos filas que las ya procesadas, no es el mismo corpus.
+        if len(nuevas) == 0 and len(pd.read_csv(ruta_csv, usecols=[0])) < filas_csv:
+            agregados = None
+
+    if agregados is None:
+        agregados = calcular_agregados(cargar_filas(0, COLUMNAS, ruta_csv, compacto=True), cache=cache)
+        nuevas_filas = filas_csv = agregados['filas']
+    else:
+        agregados = combinar_agregados(agregados, calcular_agregados(nuevas, cache=cache))
+        nuevas_filas = len(nuevas)
+        filas_csv += nuevas_filas
+
+    guardar_agregados(agregados, ruta_agregados, filas_csv)
+    return agregados, nuevas_filas
+
+def comprobar_incremental(df, n_lotes=5, cache=None):
+    """
+    Comprueba que combinar los agregados de `n_lotes` trozos consecutivos de `df` da
+    exactamente los mismos datos de dashboard que procesar `df` de una sola vez.
+    """
+    completo = procesar_datos_para_dashboard(df, cache=cache)
+    tamano = max(-(-len(df) // n_lotes), 1)
+    agregados = calcular_agregados(df.iloc[:0], cache=cache)
+    for inicio in range(0, len(df), tamano):
+        agregados = combinar_agregados(agregados, calcular_agregados(df.iloc[inicio:inicio + tamano], cache=cache))
+    return datos_desde_agregados(agregados) == completo
+
+@lru_cache(maxsize=1)
+def _compilar_plantilla(texto):
+    # La plantilla se compila una sola vez por proceso (el servidor la renderiza en cada petición).
+    return Template(texto)
+
+def renderizar_html(data, informe=None, citas=None):
+    """
+    Toma los datos procesados y los inserta en una plantilla HTML; devuelve el HTML.
+    Si se pasa el resumen de `instrumentacion.resumen()`, se añade una sección con el
+    tiempo, las filas y la memoria de cada etapa de la ejecución. Con las tablas de
+    `agregados_citas.tablas_citas` se añade la sección de impacto por citas.
     """
     # Usamos una plantilla HTML dentro del script para simplicidad.
     # Para proyectos más grandes, esto estaría en un archivo .html separado.
@@ -81,6 +199,12 @@ def generar_html(data):
             .kpi { background-color: #e7f1ff; padding: 15px; border-radius: 8px; width: 30%; }
             .kpi h3 { margin: 0; color: #0056b3; }
             .kpi p { font-size: 2em; margin: 5px 0 0 0; font-weight: bold; }
+            .informe { margin-top: 20px; overflow-x: auto; }
+            .informe table { width: 100%; border-collapse: collapse; }
+            .informe th, .informe td { padding: 6px 10px; border-bottom: 1px solid #e0e6eb; text-align: right; }
+            .informe th:first-child, .informe td:first-child { text-align: left; }
+            .informe .subetapa td:first-child { padding-left: 30px; color: #666; }
+            .citas { margin-top: 20px; }
         </style>
     </head>
     <body>
@@ -99,6 +223,74 @@ def generar_html(data):
             <div class="card"><h2>Evolución del Sentimiento Promedio</h2><canvas id="evolucionSentimientoChart"></canvas></div>
         </div>
 
+        {% macro tabla_citas(filas, nombre) %}
+            <table>
+                <tr><th>{{ nombre }}</th><th>Artículos</th><th>Citas</th><th>Media</th>{% for p in ['p50', 'p90', 'p99'] %}<th>{{ p|upper }}</th>{% endfor %}<th>Sentimiento medio</th><th>Ponderado por citas</th></tr>
+                {% for f in filas %}
+                <tr>
+                    <td>{{ f.clave }}</td>
+                    <td>{{ '{:,}'.format(f.articulos) }}</td>
+                    <td>{{ '{:,}'.format(f.citas) }}</td>
+                    <td>{{ '%.1f'|format(f.citas_media) }}</td>
+                    <td>{{ f.p50 }}</td>
+                    <td>{{ f.p90 }}</td>
+                    <td>{{ f.p99 }}</td>
+                    <td>{{ '%.4f'|format(f.sentimiento_medio) }}</td>
+                    <td>{{ '%.4f'|format(f.sentimiento_ponderado) if f.sentimiento_ponderado is not none else '—' }}</td>
+                </tr>
+                {% endfor %}
+            </table>
+        {% endmacro %}
+
+        {% if citas and citas.total %}
+        <div class="citas">
+            <h2>Impacto por Citas</h2>
+            <div class="kpi-container">
+                <div class="kpi"><h3>Citas Totales</h3><p>{{ '{:,}'.format(citas.total.citas) }}</p></div>
+                <div class="kpi"><h3>Citas por Artículo</h3><p>{{ '%.1f'|format(citas.total.citas_media) }}</p></div>
+                <div class="kpi"><h3>Sentimiento Ponderado</h3><p>{{ '%.3f'|format(citas.total.sentimiento_ponderado) if citas.total.sentimiento_ponderado is not none else '—' }}</p></div>
+            </div>
+            <div class="dashboard-container">
+                <div class="card"><h2>Citas por Año</h2><canvas id="citasPorAnoChart"></canvas></div>
+                <div class="card informe"><h2>Citas por País</h2>{{ tabla_citas(citas.por_pais, 'País') }}</div>
+                {% if citas.por_cluster %}
+                <div class="card informe"><h2>Citas por Clúster</h2>{{ tabla_citas(citas.por_cluster, 'Clúster') }}</div>
+                {% endif %}
+                <div class="card informe">
+                    <h2>Artículos más Citados</h2>
+                    <table>
+                        <tr><th>Título</th><th>ID</th><th>País</th><th>Año</th><th>Citas</th><th>Compound</th></tr>
+                        {% for a in citas.top %}
+                        <tr><td>{{ a.titulo }}</td><td>{{ a.id_articulo }}</td><td>{{ a.pais_autor }}</td><td>{{ a['año'] }}</td><td>{{ a.citas }}</td><td>{{ '%.4f'|format(a.compound) }}</td></tr>
+                        {% endfor %}
+                    </table>
+                </div>
+            </div>
+        </div>
+        {% endif %}
+
+        {% if informe and informe.etapas %}
+        <div class="card informe">
+            <h2>Informe de Ejecución</h2>
+            <p>Tiempo total medido: {{ '%.2f'|format(informe.segundos_totales) }} s</p>
+            <table>
+                <tr><th>Etapa</th><th>Llamadas</th><th>Tiempo (s)</th><th>CPU (s)</th><th>% del total</th><th>Filas</th><th>Filas/s</th><th>Δ Memoria (MB)</th></tr>
+                {% for e in informe.etapas %}
+                <tr{% if e.padre %} class="subetapa"{% endif %}>
+                    <td>{{ e.etapa }}</td>
+                    <td>{{ e.llamadas }}</td>
+                    <td>{{ '%.3f'|format(e.segundos) }}</td>
+                    <td>{{ '%.3f'|format(e.cpu_segundos) }}</td>
+                    <td>{{ '%.1f'|format(e.porcentaje) }}</td>
+                    <td>{{ '{:,}'.format(e.filas) if e.filas is not none else '—' }}</td>
+                    <td>{{ '{:,.0f}'.format(e.filas_por_segundo) if e.filas_por_segundo is not none else '—' }}</td>
+                    <td>{{ '%.1f'|format(e.memoria_delta_mb) if e.memoria_delta_mb is not none else '—' }}</td>
+                </tr>
+                {% endfor %}
+            </table>
+        </div>
+        {% endif %}
+
         <script>
             const chartData = {{ chart_data|tojson }};
 
@@ -122,32 +314,77 @@ def generar_html(data):
                 type: 'line',
                 data: { labels: chartData.evolucion_sentimiento.labels, datasets: [{ label: 'Sentimiento Promedio (Compound)', data: chartData.evolucion_sentimiento.data, borderColor: 'rgba(255, 159, 64, 1)', tension: 0.1 }] }
             });
+
+            const citasData = {{ citas|tojson }};
+            if (citasData && citasData.total) {
+                new Chart(document.getElementById('citasPorAnoChart'), {
+                    type: 'bar',
+                    data: {
+                        labels: citasData.por_año.map(f => f.clave),
+                        datasets: [
+                            { label: 'Citas', data: citasData.por_año.map(f => f.citas), backgroundColor: 'rgba(54, 162, 235, 0.6)', yAxisID: 'y' },
+                            { label: 'Sentimiento ponderado por citas', type: 'line', data: citasData.por_año.map(f => f.sentimiento_ponderado), borderColor: 'rgba(255, 159, 64, 1)', yAxisID: 'y1' }
+                        ]
+                    },
+                    options: { scales: { y1: { position: 'right', grid: { drawOnChartArea: false } } } }
+                });
+            }
         </script>
     </body>
     </html>
     """
-    template = Template(html_template)
-    html_content = template.render(chart_data=data, **data)
+    template = _compilar_plantilla(html_template)
+    return template.render(chart_data=data, informe=informe, citas=citas, **data)
+
+@instrumentar('dashboard.render')
+def generar_html(data, informe=None, citas=None):
+    """Genera el archivo estático 'dashboard.html' (ver `renderizar_html`)."""
+    html_content = renderizar_html(data, informe, citas)
     
     with open('dashboard.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
 
-def main():
-    """Función principal para generar el dashboard."""
-    try:
-        df = pd.read_csv('articulos_educacion_online.csv')
-    except FileNotFoundError:
+def main(incremental=False, comprobar=False):
+    """
+    Función principal para generar el dashboard.
+    Con `incremental=True` sólo se procesan los artículos añadidos desde la última ejecución.
+    Con `comprobar=True` se verifica además que los agregados por lotes coinciden con un
+    cálculo completo (ver `comprobar_incremental`).
+    """
+    ruta_csv = 'articulos_educacion_online.csv'
+    if not os.path.exists(ruta_csv):
         print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
         print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
         return
 
     print("Procesando datos para el dashboard...")
-    datos_dashboard = procesar_datos_para_dashboard(df)
+    with CacheSentimiento() as cache:
+        if incremental:
+            agregados, nuevas = actualizar_agregados(ruta_csv, cache=cache)
+            print(f"Modo incremental: {nuevas} artículos nuevos incorporados ({agregados['filas']} en total).")
+            agregados_citas = actualizar_agregados_citas(ruta_csv, cache=cache)
+        else:
+            df = cargar_articulos(COLUMNAS_CITAS, compacto=True)
+            # Se puntúa una sola vez para los agregados generales y los de citas.
+            df['compound'] = cache.puntuar(df['resumen'])['compound'].to_numpy()
+            agregados = calcular_agregados(df)
+            guardar_agregados(agregados, filas_csv=len(df))
+            agregados_citas = calcular_agregados_citas(df)
+            guardar_agregados_citas(agregados_citas, filas_csv=len(df))
+        if comprobar:
+            corpus = cargar_articulos(COLUMNAS, compacto=True) if incremental else df
+            correcto = comprobar_incremental(corpus, cache=cache)
+            print(f"Comprobación del modo incremental: {'correcta' if correcto else 'LOS AGREGADOS NO COINCIDEN'}")
+        datos_dashboard = datos_desde_agregados(agregados)
+        print(f"Caché de sentimiento: {cache.estadisticas()}")
     
     print("Generando archivo 'dashboard.html'...")
-    generar_html(datos_dashboard)
+    generar_html(datos_dashboard, informe=resumen(), citas=tablas_citas(agregados_citas))
+    guardar_informe()
     print("\n¡Dashboard generado con éxito! Abre el archivo 'dashboard.html' en tu navegador.")
+    print("Informe de ejecución guardado en 'informe_ejecucion.json'")
 
 if __name__ == "__main__":
     # Para ejecutar este script, necesitas instalar jinja2: pip install Jinja2
-    main()
\ No newline at end of file
+    # Uso: python generar_dashboard.py [--incremental] [--comprobar]
+    main(incremental='--incremental' in sys.argv, comprobar='--comprobar' in sys.argv)
\ No newline at end of file
@@ -1,8 +1,24 @@
-import pandas as pd
-import numpy as np
+import argparse
+import os
 import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+import graficos
+
+# pyarrow es opcional: hace falta para escribir Parquet y acelera el CSV (sin él se usa pandas).
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pcsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pcsv = pq = None
+
 # --- Configuración ---
 NUM_ARTICULOS = 500
 FECHA_INICIO = datetime(2014, 1, 1)
@@ -13,6 +29,29 @@ temas_positivos = ['innovación', 'flexibilidad', 'accesibilidad', 'mejora', 'é
 temas_negativos = ['deserción', 'brecha digital', 'aislamiento', 'dificultades', 'costos', 'fraude', 'limitaciones']
 temas_neutrales = ['plataformas', 'MOOCs', 'e-learning', 'metodología', 'evaluación', 'tecnología', 'modelo híbrido', 'pedagogía']
 conectores = ['además', 'sin embargo', 'por lo tanto', 'en conclusión', 'asimismo', 'en contraste']
+paises = ['España', 'México', 'Colombia', 'Argentina', 'Chile', 'Perú']
+
+# --- Tablas para la generación vectorizada ---
+# Todas las palabras en un único vocabulario: cada resumen se representa como una fila de
+# índices y el texto se compone al final indexando estas tablas.
+VOCABULARIO = np.array(temas_positivos + temas_negativos + temas_neutrales + conectores + [''], dtype=object)
+INICIO_POSITIVOS = 0
+INICIO_NEGATIVOS = INICIO_POSITIVOS + len(temas_positivos)
+INICIO_NEUTRALES = INICIO_NEGATIVOS + len(temas_negativos)
+INICIO_CONECTORES = INICIO_NEUTRALES + len(temas_neutrales)
+VACIO = len(VOCABULARIO) - 1
+# Plantillas de resumen troceadas en tres segmentos de dos palabras cada uno: el segmento de
+# un resumen se obtiene indexando la tabla con el código `palabra_a * len(VOCABULARIO) + palabra_b`.
+SEGMENTOS = [
+    np.array([f"Este estudio analiza {a} y {b} en el contexto de la educación online. "
+              for a in VOCABULARIO for b in VOCABULARIO], dtype=object),
+    np.array([f"Se investiga la {a} y su impacto en {b}. " for a in VOCABULARIO for b in VOCABULARIO], dtype=object),
+    np.array([f"{a} {b}." if b else f"{a}." for a in VOCABULARIO for b in VOCABULARIO], dtype=object),
+]
+TITULOS = np.array([f"Estudio sobre {tema} en la era digital" for tema in temas_neutrales], dtype=object)
+DIAS_RANGO = (FECHA_FIN - FECHA_INICIO).days
+FECHAS = pd.date_range(FECHA_INICIO, FECHA_FIN).strftime('%Y-%m-%d').to_numpy(dtype=object)
+TAMANO_BLOQUE = 1_000_000
 
 def generar_resumen_aleatorio():
     """Genera un resumen simulado con un sentimiento predominante."""
@@ -37,8 +76,164 @@ def generar_resumen_aleatorio():
 
     return f"Este estudio analiza {palabras[0]} y {palabras[1]} en el contexto de la educación online. Se investiga la {palabras[2]} y su impacto en {palabras[3]}. {' '.join(palabras[4:])}."
 
-def generar_datos(n):
-    """Genera el DataFrame completo."""
+def _muestras_sin_reemplazo(rng, n, tamano, k):
+    """Para cada una de las `n` filas, `k` posiciones distintas de una lista de `tamano` elementos."""
+    return np.argsort(rng.random((n, tamano), dtype=np.float32), axis=1)[:, :k]
+
+def _generar_columnas(n, rng, id_inicial):
+    """
+    Genera `n` artículos como arrays de NumPy, con las mismas distribuciones que
+    `generar_resumen_aleatorio`/`generar_datos_iterativo`: las palabras de cada resumen son
+    índices de VOCABULARIO, las fechas son días desde FECHA_INICIO y el título y el país
+    son códigos de sus tablas.
+    """
+    sentimiento = rng.integers(0, 3, n)  # 0 positivo, 1 negativo, 2 neutral
+    positivos = _muestras_sin_reemplazo(rng, n, len(temas_positivos), 3) + INICIO_POSITIVOS
+    negativos = _muestras_sin_reemplazo(rng, n, len(temas_negativos), 3) + INICIO_NEGATIVOS
+    neutrales = _muestras_sin_reemplazo(rng, n, len(temas_neutrales), 4) + INICIO_NEUTRALES
+
+    # 3 temas positivos/negativos + 2 neutrales, o 4 neutrales (la quinta posición queda vacía).
+    palabras = np.empty((n, 5), dtype=np.int16)
+    es_neutral = sentimiento == 2
+    palabras[:, :3] = np.where((sentimiento == 0)[:, None], positivos, negativos)
+    palabras[:, 3:] = neutrales[:, :2]
+    palabras[es_neutral, :4] = neutrales[es_neutral]
+    palabras[es_neutral, 4] = VACIO
+
+    # Barajar las palabras de cada resumen (la posición vacía se queda al final).
+    claves = rng.random((n, 5), dtype=np.float32)
+    claves[es_neutral, 4] = 2.0
+    palabras = np.take_along_axis(palabras, np.argsort(claves, axis=1), axis=1)
+
+    # Insertar un conector en una posición entre 1 y len(palabras) - 2.
+    longitud = np.where(es_neutral, 4, 5)
+    pos_conector = rng.integers(1, longitud - 1)
+    columnas = np.arange(6)
+    origen = np.minimum(columnas - (columnas > pos_conector[:, None]), 4)
+    palabras = np.take_along_axis(palabras, origen, axis=1)
+    es_conector = columnas == pos_conector[:, None]
+    palabras[es_conector] = rng.integers(INICIO_CONECTORES, VACIO, n)
+
+    return {
+        'id_articulo': np.arange(id_inicial, id_inicial + n, dtype=np.int64),
+        'titulo': rng.integers(0, len(TITULOS), n),
+        'palabras': palabras,
+        # Fecha con tendencia a ser más reciente (misma distribución que el generador iterativo).
+        'dias': np.sqrt(rng.uniform(0, DIAS_RANGO ** 2, n)).astype(np.int64),
+        'pais_autor': rng.integers(0, len(paises), n).astype(np.int8),
+        'citas': rng.integers(0, 201, n),
+    }
+
+def _codigos_segmentos(palabras):
+    return [palabras[:, 2 * j] * len(VOCABULARIO) + palabras[:, 2 * j + 1] for j in range(len(SEGMENTOS))]
+
+def _componer_resumenes(palabras):
+    """Compone el texto de los resúmenes a partir de la matriz de índices de palabras."""
+    inicio, medio, final = (tabla[codigos] for tabla, codigos in zip(SEGMENTOS, _codigos_segmentos(palabras)))
+    return inicio + medio + final
+
+def _a_dataframe(columnas):
+    return pd.DataFrame({
+        'id_articulo': columnas['id_articulo'],
+        'titulo': TITULOS[columnas['titulo']],
+        'resumen': _componer_resumenes(columnas['palabras']),
+        'fecha_publicacion': FECHAS[columnas['dias']],
+        'pais_autor': pd.Categorical.from_codes(columnas['pais_autor'], paises),
+        'citas': columnas['citas'],
+    })
+
+def _a_tabla_arrow(columnas):
+    # Mismos tipos que la copia Parquet de carga_datos: date32, diccionario e int32. Los textos
+    # se componen en Arrow (take + concatenación en C++), sin crear objetos str de Python.
+    segmentos = [pa.array(tabla, pa.string()).take(codigos)
+                 for tabla, codigos in zip(SEGMENTOS, _codigos_segmentos(columnas['palabras']))]
+    return pa.table({
+        'id_articulo': pa.array(columnas['id_articulo'], pa.int32()),
+        'titulo': pa.array(TITULOS, pa.string()).take(columnas['titulo']),
+        'resumen': pc.binary_join_element_wise(*segmentos, ''),
+        'fecha_publicacion': pa.array(np.datetime64(FECHA_INICIO.date(), 'D') + columnas['dias']),
+        'pais_autor': pa.DictionaryArray.from_arrays(pa.array(columnas['pais_autor']), pa.array(paises)),
+        'citas': pa.array(columnas['citas'], pa.int32()),
+    })
+
+def generar_datos(n, semilla=None, id_inicial=1000):
+    """Genera el DataFrame completo de forma vectorizada (reproducible con `semilla`)."""
+    return _a_dataframe(_generar_columnas(n, np.random.default_rng(semilla), id_inicial))
+
+def _generar_bloque(n, semilla_bloque, id_inicial, formato, cabecera):
+    """Genera un bloque y lo devuelve ya codificado: bytes CSV o tabla Arrow."""
+    columnas = _generar_columnas(n, np.random.default_rng(semilla_bloque), id_inicial)
+    if formato == 'parquet':
+        return _a_tabla_arrow(columnas)
+    if pcsv is None:
+        return _a_dataframe(columnas).to_csv(index=False, header=cabecera).encode('utf-8')
+    # Ningún texto generado lleva comas, comillas ni saltos de línea, así que se escribe sin
+    # comillas (mismos bytes que pandas); si alguno las necesitara, pyarrow lanzaría un error.
+    tabla = _a_tabla_arrow(columnas)
+    tabla = tabla.set_column(4, 'pais_autor', tabla['pais_autor'].cast(pa.string()))
+    salida = pa.BufferOutputStream()
+    if cabecera:
+        salida.write((','.join(tabla.column_names) + '\n').encode('utf-8'))
+    pcsv.write_csv(tabla, salida, pcsv.WriteOptions(include_header=False, quoting_style='none'))
+    return salida.getvalue().to_pybytes()
+
+def generar_corpus(n, ruta, semilla=None, tamano_bloque=TAMANO_BLOQUE, n_procesos=1, max_pendientes=None):
+    """
+    Genera un corpus de `n` artículos y lo escribe en `ruta` (CSV, o Parquet si la
+    extensión es .parquet) bloque a bloque, sin tenerlo nunca entero en memoria.
+
+    - semilla: el corpus es reproducible. Cada bloque usa su propia semilla derivada
+      (SeedSequence.spawn), así que el resultado es idéntico con cualquier `n_procesos`.
+    - tamano_bloque: filas por bloque.
+    - n_procesos: los bloques se generan y codifican en paralelo en un pool de procesos
+      y se escriben en orden. Con 1 se genera en el propio proceso.
+    - max_pendientes: bloques en vuelo como máximo (por defecto, 2 por proceso).
+
+    Devuelve un diccionario con las filas generadas, los segundos y las filas por segundo.
+    """
+    formato = 'parquet' if ruta.endswith('.parquet') else 'csv'
+    if formato == 'parquet' and pq is None:
+        raise ImportError("Para generar Parquet hace falta instalar pyarrow.")
+    n_procesos = n_procesos or os.cpu_count() or 1
+    max_pendientes = max_pendientes or 2 * n_procesos
+    inicio = time.perf_counter()
+
+    n_bloques = -(-n // tamano_bloque)
+    semillas = np.random.SeedSequence(semilla).spawn(n_bloques)
+    bloques = [(min(tamano_bloque, n - i * tamano_bloque), semillas[i], 1000 + i * tamano_bloque, formato, i == 0)
+               for i in range(n_bloques)]
+
+    escritor = None
+    with open(ruta, 'wb') as salida:
+        def escribir(bloque):
+            nonlocal escritor
+            if formato == 'csv':
+                salida.write(bloque)
+                return
+            if escritor is None:
+                escritor = pq.ParquetWriter(salida, bloque.schema)
+            escritor.write_table(bloque, row_group_size=tamano_bloque)
+
+        if n_procesos == 1:
+            for args in bloques:
+                escribir(_generar_bloque(*args))
+        else:
+            pendientes = deque()
+            with ProcessPoolExecutor(max_workers=n_procesos, mp_context=graficos.contexto_procesos()) as pool:
+                for args in bloques:
+                    pendientes.append(pool.submit(_generar_bloque, *args))
+                    while len(pendientes) >= max_pendientes:
+                        escribir(pendientes.popleft().result())
+                while pendientes:
+                    escribir(pendientes.popleft().result())
+        if escritor is not None:
+            escritor.close()
+
+    segundos = time.perf_counter() - inicio
+    return {'filas': n, 'segundos': segundos, 'filas_por_segundo': n / segundos if segundos else 0.0}
+
+def generar_datos_iterativo(n):
+    """Generador original, fila a fila (se conserva como referencia para comparar)."""
     data = []
     for i in range(n):
         # Generar fecha aleatoria con tendencia a ser más reciente
@@ -51,14 +246,26 @@ def generar_datos(n):
             'titulo': f"Estudio sobre {random.choice(temas_neutrales)} en la era digital",
             'resumen': generar_resumen_aleatorio(),
             'fecha_publicacion': fecha_publicacion.strftime('%Y-%m-%d'),
-            'pais_autor': random.choice(['España', 'México', 'Colombia', 'Argentina', 'Chile', 'Perú']),
+            'pais_autor': random.choice(paises),
             'citas': random.randint(0, 200)
         })
     return pd.DataFrame(data)
 
 # --- Generar y guardar el archivo CSV ---
 if __name__ == "__main__":
-    df_articulos = generar_datos(NUM_ARTICULOS)
-    df_articulos.to_csv('articulos_educacion_online.csv', index=False, encoding='utf-8')
-    print("Archivo 'articulos_educacion_online.csv' generado con éxito.")
-    print(df_articulos.head())
\ No newline at end of file
+    # Uso: python generar_dataset.py [--articulos N] [--salida ruta.csv|ruta.parquet]
+    #                                [--semilla S] [--procesos P] [--bloque B]
+    parser = argparse.ArgumentParser(description="Genera el corpus sintético de artículos.")
+    parser.add_argument('--articulos', type=int, default=NUM_ARTICULOS)
+    parser.add_argument('--salida', default='articulos_educacion_online.csv')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--procesos', type=int, default=1)
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args()
+
+    stats = generar_corpus(args.articulos, args.salida, semilla=args.semilla,
+                           tamano_bloque=args.bloque, n_procesos=args.procesos)
+    print(f"Archivo '{args.salida}' generado con éxito.")
+    print(f"{stats['filas']} artículos en {stats['segundos']:.2f} s ({stats['filas_por_segundo']:,.0f} filas/s)")
+    if not args.salida.endswith('.parquet'):
+        print(pd.read_csv(args.salida, nrows=5))
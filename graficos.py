@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+from instrumentacion import ejecutar_midiendo, incorporar
+
+# Modos de renderizado de los gráficos:
+# - 'interactivo': comportamiento clásico, se guarda el PNG y se muestra con plt.show().
+# - 'headless': backend Agg (sin GUI), se guarda el PNG y se cierra la figura; varios
+#   gráficos se renderizan en paralelo en un pool de procesos.
+# - 'desactivado': no se genera ningún gráfico (sólo salidas de datos).
+MODOS = ('interactivo', 'headless', 'desactivado')
+
+_modo = os.environ.get('ULIBRE_GRAFICOS', 'interactivo')
+if _modo not in MODOS:
+    raise ValueError(f"ULIBRE_GRAFICOS debe ser uno de {MODOS}, no '{_modo}'")
+if _modo != 'interactivo':
+    # Antes de importar pyplot: así nunca se carga un backend con GUI en modo batch.
+    matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+def configurar(modo):
+    """Cambia el modo de renderizado en tiempo de ejecución (ver MODOS)."""
+    global _modo
+    if modo not in MODOS:
+        raise ValueError(f"modo debe ser uno de {MODOS}, no '{modo}'")
+    _modo = modo
+    if modo != 'interactivo':
+        plt.switch_backend('Agg')
+
+
+def modo():
+    return _modo
+
+
+def activados():
+    """Indica si hay que generar gráficos."""
+    return _modo != 'desactivado'
+
+
+def guardar(ruta):
+    """Guarda la figura actual; la muestra en modo interactivo o la cierra para liberar memoria."""
+    plt.savefig(ruta)
+    if _modo == 'interactivo':
+        plt.show()
+    else:
+        plt.close()
+
+
+def contexto_procesos():
+    """
+    Contexto de multiprocessing para los pools de procesos: 'forkserver' donde existe y
+    'spawn' en el resto. Nunca 'fork': los pools se crean también desde hilos del pipeline,
+    y hacer fork de un proceso con varios hilos copia los cerrojos que otros hilos tengan
+    tomados (logging, BLAS, sqlite) y puede bloquear al hijo.
+    """
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+
+
+def _ejecutar(funcion, args):
+    funcion(*args)
+
+
+def renderizar(tareas, n_procesos=None):
+    """
+    Ejecuta una lista de tareas de visualización `(funcion, args)`.
+
+    En modo headless las tareas se reparten en un pool de procesos (cada uno con backend
+    Agg); en modo interactivo se ejecutan una tras otra en este proceso, porque plt.show()
+    necesita la GUI del proceso principal; en modo desactivado no se ejecuta ninguna.
+    Devuelve los segundos empleados.
+    """
+    inicio = time.perf_counter()
+    if not activados() or not tareas:
+        return 0.0
+
+    n_procesos = min(n_procesos or os.cpu_count() or 1, len(tareas))
+    if _modo == 'interactivo' or n_procesos == 1:
+        for funcion, args in tareas:
+            funcion(*args)
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos, mp_context=contexto_procesos(),
+                                 initializer=configurar, initargs=('headless',)) as pool:
+            # Las mediciones de cada worker vuelven con su resultado para el informe de ejecución.
+            for futuro in [pool.submit(ejecutar_midiendo, _ejecutar, funcion, args) for funcion, args in tareas]:
+                incorporar(*futuro.result())
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    # Benchmark: tiempo total de los scripts de análisis en modo headless frente a sin gráficos.
+    scripts = ['analisis_sentimiento.py', 'analisis_descriptivo_clustering.py', 'modelo_prediccion_temporal.py']
+    for modo_benchmark in ('headless', 'desactivado'):
+        inicio = time.perf_counter()
+        for script in scripts:
+            subprocess.run([sys.executable, script], check=True, stdout=subprocess.DEVNULL,
+                           env={**os.environ, 'ULIBRE_GRAFICOS': modo_benchmark})
+        print(f"{modo_benchmark:<12} {time.perf_counter() - inicio:8.2f} s")
@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from carga_datos import obtener_años
+from clustering_escalable import OPCIONES_TEXTO
+from motor_sentimiento import clasificar_sentimiento
+
+DIRECTORIO_INDICE = '.indice_resumenes'
+
+# Se guarda con el índice: si cambia la tokenización o el formato, hay que reconstruirlo.
+VERSION_INDICE = 1
+
+# Columnas por documento que se guardan junto al índice para filtrar y devolver resultados.
+METADATOS = {
+    'id_articulo': np.int32,
+    'pais_autor': np.int16,  # Código de `paises` en meta.json.
+    'año': np.int16,
+    'citas': np.int32,
+    'compound': np.float32,  # NaN si no se ha calculado el sentimiento.
+    'cluster': np.int16,  # -1 si no se ha calculado el clustering.
+}
+
+# Elementos de una consulta: frase entre comillas, operador OR/NOT, negación con '-' o palabra.
+_PATRON_CONSULTA = re.compile(r'(-?)"([^"]*)"|\b(OR|NOT)\b|(-?)(\S+)')
+
+
+def _contiene(ordenado, valores):
+    """Máscara de los `valores` presentes en el array `ordenado` (búsqueda binaria, sin reordenar)."""
+    if len(ordenado) == 0:
+        return np.zeros(len(valores), dtype=bool)
+    posiciones = np.minimum(np.searchsorted(ordenado, valores), len(ordenado) - 1)
+    return ordenado[posiciones] == valores
+
+
+def _interseccion(a, b):
+    """Intersección de dos arrays ordenados y sin repetidos: O(m log n) con m el más corto."""
+    if len(a) > len(b):
+        a, b = b, a
+    return a[_contiene(b, a)]
+
+
+def crear_analizador():
+    """
+    Tokenización del índice: la misma que el TF-IDF de `clustering_tematico` (minúsculas,
+    token_pattern de scikit-learn y stop words en inglés). Devuelve una función que
+    convierte un texto en pares (término, posición); las posiciones cuentan también las
+    stop words, para que las frases respeten las distancias del texto original.
+    """
+    vectorizador = TfidfVectorizer(**OPCIONES_TEXTO)
+    preprocesar, tokenizar = vectorizador.build_preprocessor(), vectorizador.build_tokenizer()
+    stop_words = vectorizador.get_stop_words() or frozenset()
+
+    def analizar(texto):
+        return [(t, i) for i, t in enumerate(tokenizar(preprocesar(texto))) if t not in stop_words]
+    return analizar
+
+
+def construir_indice(df, directorio=DIRECTORIO_INDICE, tamano_lote=100_000):
+    """
+    Construye el índice invertido de `df['resumen']` y lo guarda en `directorio`.
+
+    Las listas de postings son arrays contiguos (formato CSR): para el término t, sus
+    documentos son `docs[inicio_docs[t]:inicio_docs[t + 1]]` (ordenados) y, para el
+    posting k, sus posiciones son `posiciones[inicio_pos[k]:inicio_pos[k + 1]]`. Todo se
+    guarda como .npy para abrirlo con memory-map sin cargarlo en memoria.
+
+    `df` debe tener 'resumen', 'id_articulo', 'pais_autor', 'fecha_publicacion' y 'citas';
+    si trae 'compound' y/o 'cluster' se guardan para devolverlos con los resultados.
+    Devuelve el número de documentos y de términos.
+    """
+    analizar = crear_analizador()
+    vocabulario = {}
+    terminos, documentos, posiciones = [], [], []
+    textos = df['resumen'].fillna('').astype(str)
+    for inicio in range(0, len(textos), tamano_lote):
+        t_lote, d_lote, p_lote = [], [], []
+        for doc, texto in enumerate(textos.iloc[inicio:inicio + tamano_lote], start=inicio):
+            for termino, posicion in analizar(texto):
+                t_lote.append(vocabulario.setdefault(termino, len(vocabulario)))
+                d_lote.append(doc)
+                p_lote.append(posicion)
+        terminos.append(np.array(t_lote, dtype=np.int32))
+        documentos.append(np.array(d_lote, dtype=np.int32))
+        posiciones.append(np.array(p_lote, dtype=np.int32))
+    terminos = np.concatenate(terminos) if terminos else np.array([], dtype=np.int32)
+    documentos = np.concatenate(documentos) if documentos else np.array([], dtype=np.int32)
+    posiciones = np.concatenate(posiciones) if posiciones else np.array([], dtype=np.int32)
+
+    # Ordenar las apariciones por (término, documento, posición) y agrupar en postings.
+    orden = np.lexsort((posiciones, documentos, terminos))
+    terminos, documentos, posiciones = terminos[orden], documentos[orden], posiciones[orden]
+    nuevo_posting = np.ones(len(terminos), dtype=bool)
+    nuevo_posting[1:] = (terminos[1:] != terminos[:-1]) | (documentos[1:] != documentos[:-1])
+    arranques = np.flatnonzero(nuevo_posting)
+    terminos_posting = terminos[arranques]
+
+    tipo_posicion = np.int16 if posiciones.size == 0 or posiciones.max() < 2 ** 15 else np.int32
+    arrays = {
+        'docs': documentos[arranques],
+        'inicio_docs': np.searchsorted(terminos_posting, np.arange(len(vocabulario) + 1)).astype(np.int64),
+        'posiciones': posiciones.astype(tipo_posicion),
+        'inicio_pos': np.append(arranques, len(posiciones)).astype(np.int64),
+    }
+
+    paises = pd.Categorical(df['pais_autor'])
+    columnas = {
+        'id_articulo': df['id_articulo'].to_numpy(),
+        'pais_autor': paises.codes,
+        'año': obtener_años(df).to_numpy(),
+        'citas': df['citas'].to_numpy(),
+        'compound': df['compound'].to_numpy() if 'compound' in df.columns else np.full(len(df), np.nan),
+        'cluster': df['cluster'].to_numpy() if 'cluster' in df.columns else np.full(len(df), -1),
+    }
+    arrays.update({nombre: np.asarray(columnas[nombre]).astype(tipo) for nombre, tipo in METADATOS.items()})
+
+    os.makedirs(directorio, exist_ok=True)
+    for nombre, array in arrays.items():
+        np.save(os.path.join(directorio, f'{nombre}.npy'), array)
+    # Términos en orden de id, para reconstruir el vocabulario al abrir el índice.
+    vocabulario_ordenado = sorted(vocabulario, key=vocabulario.get)
+    with open(os.path.join(directorio, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_INDICE, 'opciones_texto': OPCIONES_TEXTO, 'documentos': len(df),
+                   'paises': [str(p) for p in paises.categories], 'terminos': vocabulario_ordenado},
+                  f, ensure_ascii=False)
+    return {'documentos': len(df), 'terminos': len(vocabulario)}
+
+
+class IndiceInvertido:
+    """
+    Índice invertido (abierto con memory-map) de los resúmenes, con consultas booleanas
+    y de frase y filtros por país, año y citas.
+
+    Sintaxis de las consultas:
+    - `online plataformas`: documentos con ambos términos (AND implícito).
+    - `mooc OR plataformas`: cualquiera de los dos (OR se aplica antes que el AND).
+    - `-fraude` o `NOT fraude`: excluye los documentos con el término.
+    - `"brecha digital"`: frase exacta (términos consecutivos, en ese orden).
+    """
+
+    def __init__(self, directorio=DIRECTORIO_INDICE):
+        with open(os.path.join(directorio, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != VERSION_INDICE:
+            raise ValueError(f"El índice de '{directorio}' es de otra versión; reconstrúyelo con construir_indice.")
+        self.n_documentos = meta['documentos']
+        self.paises = meta['paises']
+        self.vocabulario = {termino: i for i, termino in enumerate(meta['terminos'])}
+        self._arrays = {
+            nombre: np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r')
+            for nombre in ['docs', 'inicio_docs', 'posiciones', 'inicio_pos', *METADATOS]
+        }
+        self._analizar = crear_analizador()
+
+    def __len__(self):
+        return self.n_documentos
+
+    def _termino(self, termino):
+        """Documentos (ordenados) que contienen `termino`."""
+        t = self.vocabulario.get(termino)
+        if t is None:
+            return np.array([], dtype=np.int32)
+        inicio_docs = self._arrays['inicio_docs']
+        return np.asarray(self._arrays['docs'][inicio_docs[t]:inicio_docs[t + 1]])
+
+    def _apariciones(self, termino):
+        """Pares (documento, posición) de todas las apariciones de `termino`."""
+        t = self.vocabulario.get(termino)
+        if t is None:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+        a, b = self._arrays['inicio_docs'][t], self._arrays['inicio_docs'][t + 1]
+        inicio_pos = np.asarray(self._arrays['inicio_pos'][a:b + 1])
+        docs = np.repeat(np.asarray(self._arrays['docs'][a:b]), np.diff(inicio_pos))
+        return docs, np.asarray(self._arrays['posiciones'][inicio_pos[0]:inicio_pos[-1]])
+
+    def _frase(self, terminos):
+        """Documentos en los que los `terminos` (pares término, posición) aparecen con esas distancias."""
+        # Cada aparición se codifica como (documento, posición de inicio de la frase) en un
+        # int64. Los postings están ordenados por documento y posición, así que las claves de
+        # cada término salen ordenadas y la frase es la intersección de todas ellas.
+        claves = None
+        for termino, desplazamiento in terminos:
+            docs, posiciones = self._apariciones(termino)
+            clave = docs.astype(np.int64) << 32 | (posiciones.astype(np.int64) - desplazamiento + 2 ** 31)
+            claves = clave if claves is None else claves[_contiene(clave, claves)]
+            if claves.size == 0:
+                break
+        return np.unique((claves >> 32).astype(np.int32))
+
+    def _union(self, a, b):
+        if len(a) + len(b) < self.n_documentos // 64:
+            return np.union1d(a, b)
+        # Con listas largas es más rápido marcar un mapa de bits de todo el corpus que ordenar.
+        marcas = np.zeros(self.n_documentos, dtype=bool)
+        marcas[a] = True
+        marcas[b] = True
+        return np.flatnonzero(marcas).astype(np.int32)
+
+    def _elemento(self, texto, es_frase):
+        """Documentos de una palabra o frase de la consulta, o None si sólo tiene stop words."""
+        terminos = self._analizar(texto)
+        if not terminos:
+            return None
+        if not es_frase and len(terminos) == 1:
+            return self._termino(terminos[0][0])
+        # Una palabra que se tokeniza en varios términos (p. ej. "modelo-híbrido") es una frase.
+        primera = terminos[0][1]
+        return self._frase([(t, p - primera) for t, p in terminos])
+
+    def documentos(self, consulta):
+        """Posiciones (ordenadas) de los documentos que cumplen la consulta, sin filtros."""
+        grupos, excluidos = [], []
+        negar, unir = False, False
+        for frase, texto_frase, operador, menos, palabra in (
+                (m.group(2) is not None, m.group(2), m.group(3), m.group(1) or m.group(4), m.group(5))
+                for m in _PATRON_CONSULTA.finditer(consulta)):
+            if operador == 'NOT':
+                negar = True
+                continue
+            if operador == 'OR':
+                unir = bool(grupos)
+                continue
+            docs = self._elemento(texto_frase if frase else palabra, frase)
+            if docs is None:
+                negar = unir = False
+                continue
+            if negar or menos:
+                excluidos.append(docs)
+            elif unir:
+                grupos[-1] = self._union(grupos[-1], docs)
+            else:
+                grupos.append(docs)
+            negar = unir = False
+
+        if grupos:
+            grupos.sort(key=len)  # Intersecar primero las listas cortas.
+            resultado = grupos[0]
+            for docs in grupos[1:]:
+                resultado = _interseccion(resultado, docs)
+        elif excluidos:
+            resultado = np.arange(self.n_documentos, dtype=np.int32)
+        else:
+            resultado = np.array([], dtype=np.int32)
+        for docs in excluidos:
+            resultado = resultado[~_contiene(docs, resultado)]
+        return resultado
+
+    def buscar(self, consulta, paises=None, años=None, citas=None, limite=None):
+        """
+        Busca los artículos que cumplen `consulta` (ver la sintaxis en la clase) y los filtros:
+        - paises: lista de países admitidos.
+        - años / citas: rango (mínimo, máximo), ambos inclusive; None en un extremo lo deja abierto.
+        Devuelve un DataFrame con id_articulo, pais_autor, año, citas, compound,
+        sentimiento_general y cluster, en el orden del corpus (hasta `limite` filas).
+        """
+        docs = self.documentos(consulta)
+        meta = self._arrays
+        mascara = np.ones(len(docs), dtype=bool)
+        if paises is not None:
+            codigos = [self.paises.index(p) for p in paises if p in self.paises]
+            mascara &= np.isin(meta['pais_autor'][docs], codigos)
+        for nombre, rango in (('año', años), ('citas', citas)):
+            if rango is not None:
+                minimo, maximo = rango
+                valores = meta[nombre][docs]
+                if minimo is not None:
+                    mascara &= valores >= minimo
+                if maximo is not None:
+                    mascara &= valores <= maximo
+        docs = docs[mascara][:limite]
+
+        compound = np.asarray(meta['compound'][docs])
+        cluster = np.asarray(meta['cluster'][docs])
+        return pd.DataFrame({
+            'id_articulo': np.asarray(meta['id_articulo'][docs]),
+            'pais_autor': pd.Categorical.from_codes(np.asarray(meta['pais_autor'][docs]), self.paises),
+            'año': np.asarray(meta['año'][docs]),
+            'citas': np.asarray(meta['citas'][docs]),
+            'compound': compound,
+            'sentimiento_general': pd.Series(clasificar_sentimiento(compound)).where(~np.isnan(compound)),
+            'cluster': pd.Series(cluster).where(cluster >= 0).astype('Int16'),
+        })
+
+
+if __name__ == "__main__":
+    # Construye el índice con el sentimiento y los clústeres del pipeline (reutilizando su
+    # caché) y compara la latencia de las consultas con el filtrado por `str.contains`.
+    from pipeline import ejecutar_pipeline
+
+    try:
+        salidas, _ = ejecutar_pipeline(['carga', 'sentimiento', 'clustering'])
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        exit()
+    df = salidas['carga'].assign(compound=salidas['sentimiento']['compound'].to_numpy(),
+                                 cluster=salidas['clustering']['cluster'].to_numpy())
+
+    inicio = time.perf_counter()
+    tamano = construir_indice(df)
+    print(f"Índice construido en {time.perf_counter() - inicio:.2f} s: "
+          f"{tamano['documentos']} documentos, {tamano['terminos']} términos")
+
+    indice = IndiceInvertido()
+    consultas = {
+        'plataformas': lambda s: s.str.contains('plataformas'),
+        'deserción fraude': lambda s: s.str.contains('deserción') & s.str.contains('fraude'),
+        'moocs OR costos': lambda s: s.str.contains('moocs') | s.str.contains('costos'),
+        '"brecha digital" -aislamiento': lambda s: s.str.contains('brecha digital') & ~s.str.contains('aislamiento'),
+    }
+    resumenes = df['resumen'].str.lower()
+    print(f"\n{'consulta':<32} {'resultados':>10} {'índice (ms)':>12} {'str.contains (ms)':>18}")
+    for consulta, escaneo in consultas.items():
+        repeticiones = 20
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = indice.documentos(consulta)
+        t_indice = (time.perf_counter() - inicio) / repeticiones
+        inicio = time.perf_counter()
+        escaneo(resumenes)
+        t_escaneo = time.perf_counter() - inicio
+        print(f"{consulta:<32} {len(resultado):>10} {t_indice * 1000:>12.3f} {t_escaneo * 1000:>18.1f}")
+
+    print("\n--- Ejemplo: '\"brecha digital\"' en México, 2020-2023, 50+ citas ---")
+    print(indice.buscar('"brecha digital"', paises=['México'], años=(2020, 2023), citas=(50, None), limite=10))
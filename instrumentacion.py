@@ -0,0 +1,206 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# psutil es opcional: sin él la memoria se lee de /proc (Linux); si tampoco existe, no se mide.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+RUTA_INFORME = 'informe_ejecucion.json'
+
+# Etapas que se perfilan con cProfile, separadas por comas (p. ej. "clustering.kmeans").
+# También se pueden indicar en tiempo de ejecución con `configurar(perfilar=[...])`.
+_perfilar = {e for e in os.environ.get('ULIBRE_PERFILAR', '').split(',') if e}
+_directorio_perfiles = '.'
+
+_mediciones = []
+_perfiles = {}
+_pila = threading.local()  # Etapas abiertas en cada hilo, para saber cuál es la etapa padre.
+_cerrojo_perfil = threading.Lock()  # cProfile no admite dos perfiles activos a la vez.
+
+
+def configurar(perfilar=None, directorio_perfiles=None):
+    """Cambia las etapas a perfilar con cProfile y dónde se guardan sus archivos .prof."""
+    global _perfilar, _directorio_perfiles
+    if perfilar is not None:
+        _perfilar = set(perfilar)
+    if directorio_perfiles is not None:
+        _directorio_perfiles = directorio_perfiles
+
+
+def reiniciar():
+    """Descarta las mediciones y perfiles registrados hasta ahora."""
+    _mediciones.clear()
+    _perfiles.clear()
+
+
+def _memoria_mb():
+    """Memoria residente (RSS) del proceso en MB, o None si no se puede medir."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _contar_filas(objeto):
+    if isinstance(objeto, (pd.DataFrame, pd.Series, np.ndarray, list, tuple)):
+        return len(objeto)
+    return None
+
+
+def _resumen_perfil(perfil, n_funciones=15):
+    # Las funciones con más tiempo acumulado, como texto legible para el informe.
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(n_funciones)
+    return salida.getvalue()
+
+
+@contextmanager
+def medir(nombre, filas=None):
+    """
+    Mide un bloque de código como la etapa `nombre`: tiempo real, tiempo de CPU, filas
+    procesadas y variación de memoria residente. Si la etapa está en la lista de etapas a
+    perfilar, se ejecuta además bajo cProfile y el perfil se guarda en perfil-<nombre>.prof.
+
+    Devuelve el registro de la medición, por si las filas sólo se conocen al final:
+        with medir('carga') as registro:
+            df = ...
+            registro['filas'] = len(df)
+    """
+    pila = _pila.__dict__.setdefault('etapas', [])
+    registro = {'etapa': nombre, 'padre': pila[-1] if pila else None, 'filas': filas}
+    pila.append(nombre)
+
+    perfil = None
+    if nombre in _perfilar and _cerrojo_perfil.acquire(blocking=False):
+        perfil = cProfile.Profile()
+        perfil.enable()
+    memoria = _memoria_mb()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield registro
+    finally:
+        segundos, cpu = time.perf_counter() - inicio, time.process_time() - inicio_cpu
+        memoria_final = _memoria_mb()
+        if perfil is not None:
+            perfil.disable()
+            _cerrojo_perfil.release()
+            perfil.dump_stats(os.path.join(_directorio_perfiles, f'perfil-{nombre}.prof'))
+            _perfiles[nombre] = _resumen_perfil(perfil)
+        pila.pop()
+        registro.update({
+            'segundos': segundos,
+            # Tiempo de CPU de todo el proceso: con hilos en paralelo puede superar al real.
+            'cpu_segundos': cpu,
+            'memoria_delta_mb': (memoria_final - memoria
+                                 if memoria is not None and memoria_final is not None else None),
+        })
+        _mediciones.append(registro)
+
+
+def instrumentar(nombre, filas_del_resultado=False):
+    """
+    Decorador que mide cada llamada a la función como la etapa `nombre` (ver `medir`).
+    Las filas procesadas son la longitud del primer argumento (DataFrame, Series, array o
+    lista) o, con `filas_del_resultado=True`, la del valor devuelto.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with medir(nombre, filas=None if filas_del_resultado or not args else _contar_filas(args[0])) as registro:
+                resultado = funcion(*args, **kwargs)
+                if filas_del_resultado:
+                    registro['filas'] = _contar_filas(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def ejecutar_midiendo(funcion, *args, **kwargs):
+    """
+    Para los pools de procesos: ejecuta `funcion` en el worker y devuelve su resultado junto
+    con las mediciones y perfiles que registró allí, que si no se perderían con el proceso.
+    En el proceso principal se añaden con `incorporar`:
+        resultado = incorporar(*pool.submit(ejecutar_midiendo, funcion, *args).result())
+    """
+    inicio = len(_mediciones)
+    resultado = funcion(*args, **kwargs)
+    registros, perfiles = _mediciones[inicio:], dict(_perfiles)
+    # El worker se reutiliza para otras tareas: lo ya devuelto no se vuelve a enviar.
+    del _mediciones[inicio:]
+    _perfiles.clear()
+    return resultado, registros, perfiles
+
+
+def incorporar(resultado, registros, perfiles):
+    """
+    Añade las mediciones y perfiles devueltos por `ejecutar_midiendo` y devuelve el resultado.
+    Las etapas de primer nivel del worker cuelgan de la etapa abierta en este hilo, si la hay.
+    """
+    pila = _pila.__dict__.get('etapas', [])
+    for registro in registros:
+        if registro['padre'] is None and pila:
+            registro['padre'] = pila[-1]
+        _mediciones.append(registro)
+    _perfiles.update(perfiles)
+    return resultado
+
+
+def mediciones():
+    """Copia de las mediciones individuales registradas (una por llamada)."""
+    return list(_mediciones)
+
+
+def resumen():
+    """
+    Agrega las mediciones por etapa (llamadas, tiempos, filas y memoria) ordenadas por
+    tiempo real. El porcentaje de cada etapa se calcula sobre el tiempo de las etapas de
+    primer nivel, que no se solapan con sus subetapas.
+    """
+    if not _mediciones:
+        return {'segundos_totales': 0.0, 'etapas': []}
+    df = pd.DataFrame(_mediciones)
+    total = df.loc[df['padre'].isna(), 'segundos'].sum()
+    etapas = df.groupby('etapa', sort=False).agg(
+        padre=('padre', 'first'),
+        llamadas=('segundos', 'size'),
+        segundos=('segundos', 'sum'),
+        cpu_segundos=('cpu_segundos', 'sum'),
+        filas=('filas', lambda s: int(s.sum()) if s.notna().any() else None),
+        memoria_delta_mb=('memoria_delta_mb', 'sum'),
+    ).sort_values('segundos', ascending=False).reset_index()
+    etapas['porcentaje'] = 100 * etapas['segundos'] / total if total else 0.0
+    etapas['filas_por_segundo'] = etapas['filas'] / etapas['segundos'].where(etapas['segundos'] > 0)
+    etapas = etapas.astype(object).where(etapas.notna(), None).to_dict(orient='records')
+    for etapa in etapas:
+        if etapa['filas'] is not None:
+            etapa['filas'] = int(etapa['filas'])
+    return {'segundos_totales': float(total), 'etapas': etapas}
+
+
+def guardar_informe(ruta=RUTA_INFORME):
+    """Escribe el informe de la ejecución en JSON: resumen por etapa, mediciones y perfiles."""
+    informe = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        **resumen(),
+        'mediciones': mediciones(),
+        'perfiles': dict(_perfiles),
+    }
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2, default=float)
+    return informe
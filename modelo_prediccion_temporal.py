@@ -1,11 +1,23 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import numpy as np
 import pandas as pd
+import graficos
 import matplotlib.pyplot as plt
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 import warnings
+from carga_datos import cargar_articulos
+from instrumentacion import guardar_informe, instrumentar
 
 warnings.filterwarnings("ignore")
 
+@instrumentar('serie_temporal.preparar')
 def preparar_serie_temporal(df):
     """
     Agrupa las publicaciones por mes para crear una serie temporal.
@@ -22,12 +34,215 @@ def preparar_serie_temporal(df):
     
     return serie_temporal
 
-def analizar_y_predecir(serie):
+def preparar_series_agrupadas(df, columna):
     """
-    Analiza la serie temporal con un modelo ARIMA y predice valores futuros.
+    Construye en una sola pasada (groupby + Grouper mensual) las series de publicaciones
+    por mes de cada valor de `columna` (p. ej. 'pais_autor' o 'cluster').
+    Devuelve un DataFrame ancho: una fila por mes y una columna por grupo, sin huecos.
     """
-    print("--- Análisis de la Serie Temporal ---")
-    
+    fechas = pd.to_datetime(df['fecha_publicacion'])
+    conteos = df.groupby([df[columna].to_numpy(), fechas.dt.to_period('M').dt.to_timestamp()]).size()
+    series = conteos.unstack(level=0, fill_value=0)
+    idx = pd.date_range(series.index.min(), series.index.max(), freq='MS')
+    return series.reindex(idx, fill_value=0)
+
+COLUMNAS_PRONOSTICO = ['grupo', 'fecha', 'prediccion', 'ic_inferior', 'ic_superior', 'estado']
+
+def _pronosticar_bloque(series, orden, orden_estacional, pasos, alpha):
+    """
+    Ajusta y pronostica un bloque de series (dict grupo → serie) en un mismo worker.
+    Un grupo cuyo ajuste falla aparece en una única fila sin pronóstico y con el error
+    en la columna 'estado', en lugar de desaparecer del resultado.
+    """
+    tablas = []
+    for grupo, serie in series.items():
+        try:
+            prediccion = ARIMA(serie, order=orden, seasonal_order=orden_estacional).fit().get_forecast(steps=pasos)
+            intervalo = prediccion.conf_int(alpha=alpha)
+        except Exception as e:
+            tablas.append(pd.DataFrame({'grupo': [grupo], 'fecha': [pd.NaT], 'prediccion': [np.nan],
+                                        'ic_inferior': [np.nan], 'ic_superior': [np.nan],
+                                        'estado': [f'error: {type(e).__name__}: {e}']}))
+            continue
+        tablas.append(pd.DataFrame({
+            'grupo': grupo,
+            'fecha': prediccion.predicted_mean.index,
+            'prediccion': prediccion.predicted_mean.to_numpy(),
+            'ic_inferior': intervalo.iloc[:, 0].to_numpy(),
+            'ic_superior': intervalo.iloc[:, 1].to_numpy(),
+            'estado': 'ok',
+        }))
+    return pd.concat(tablas, ignore_index=True) if tablas else None
+
+@instrumentar('serie_temporal.pronostico_grupos')
+def pronosticar_series(series, orden=(1, 1, 1), orden_estacional=(0, 0, 0, 0), pasos=12, alpha=0.05,
+                       n_procesos=None, series_por_tarea=25):
+    """
+    Ajusta un ARIMA a cada columna de `series` (formato de `preparar_series_agrupadas`) y
+    pronostica `pasos` meses, repartiendo las series en bloques entre procesos.
+
+    Devuelve una tabla ordenada con columnas grupo, fecha, prediccion, ic_inferior,
+    ic_superior (intervalo de confianza al 1 - alpha) y estado. Las series cuyo ajuste
+    falla quedan como una fila sin pronóstico con el error en 'estado' y se avisa por pantalla.
+    """
+    grupos = list(series.columns)
+    bloques = [{g: series[g] for g in grupos[i:i + series_por_tarea]}
+               for i in range(0, len(grupos), series_por_tarea)]
+    pronosticar = partial(_pronosticar_bloque, orden=orden, orden_estacional=orden_estacional,
+                          pasos=pasos, alpha=alpha)
+    n_procesos = n_procesos or os.cpu_count() or 1
+
+    if n_procesos == 1:
+        resultados = [pronosticar(bloque) for bloque in bloques]
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos, mp_context=graficos.contexto_procesos()) as pool:
+            resultados = list(pool.map(pronosticar, bloques))
+
+    resultados = [r for r in resultados if r is not None]
+    if not resultados:
+        return pd.DataFrame(columns=COLUMNAS_PRONOSTICO)
+    tabla = pd.concat(resultados, ignore_index=True)
+    fallidos = tabla.loc[tabla['estado'] != 'ok', ['grupo', 'estado']]
+    if not fallidos.empty:
+        print(f"Aviso: sin pronóstico para {len(fallidos)} serie(s):")
+        for grupo, estado in fallidos.itertuples(index=False):
+            print(f"  {grupo}: {estado}")
+    return tabla
+
+def pronosticar_por_grupo(df, columna, **opciones):
+    """Pronóstico por lotes de las publicaciones mensuales de cada valor de `columna`."""
+    return pronosticar_series(preparar_series_agrupadas(df, columna), **opciones)
+
+def _cribar_candidato(serie, orden, orden_estacional, max_iter):
+    """
+    Ajuste corto (como mucho `max_iter` iteraciones) de un candidato para la criba.
+    Devuelve su AIC aproximado (inf si falla) y los parámetros alcanzados, que sirven de
+    punto de partida al ajuste completo. El optimizador sólo mejora la verosimilitud, así
+    que el AIC final del candidato no será peor que este.
+    """
+    inicio = time.perf_counter()
+    try:
+        ajuste = ARIMA(serie, order=orden, seasonal_order=orden_estacional).fit(
+            method_kwargs={'maxiter': max_iter})
+        aic, parametros = float(ajuste.aic), ajuste.params
+    except Exception:  # Cualquier fallo de statsmodels descarta el candidato, no la búsqueda.
+        aic, parametros = np.inf, None
+    return aic, parametros, time.perf_counter() - inicio
+
+def _evaluar_candidato(serie, orden, orden_estacional, criterio, n_pliegues, horizonte, max_iter,
+                       parametros_iniciales=None):
+    """
+    Ajusta un candidato ARIMA y devuelve su fila de resultados. Los ajustes que no
+    convergen en `max_iter` iteraciones se marcan como 'no_converge' (y el backtest se
+    abandona en ese pliegue); cualquier otro fallo se marca como 'error' con AIC/BIC inf.
+    """
+    inicio = time.perf_counter()
+    fila = {'orden': orden, 'orden_estacional': orden_estacional, 'aic': np.nan, 'bic': np.nan,
+            'rmse_backtest': np.nan, 'estado': 'ok'}
+
+    def ajustar(datos, parametros=None):
+        ajuste = ARIMA(datos, order=orden, seasonal_order=orden_estacional).fit(
+            start_params=parametros, method_kwargs={'maxiter': max_iter})
+        return ajuste, (ajuste.mle_retvals or {}).get('converged', True)
+
+    try:
+        ajuste, convergio = ajustar(serie, parametros_iniciales)
+        if not convergio:
+            fila['estado'] = 'no_converge'
+        else:
+            fila['aic'], fila['bic'] = ajuste.aic, ajuste.bic
+            if criterio == 'backtest':
+                # Backtest con origen móvil: se reentrena hasta cada origen y se predicen
+                # `horizonte` pasos; se abandona en cuanto un pliegue no converge.
+                errores = []
+                for k in range(n_pliegues, 0, -1):
+                    corte = len(serie) - k * horizonte
+                    ajuste_pliegue, convergio = ajustar(serie.iloc[:corte])
+                    if not convergio:
+                        fila['estado'] = 'no_converge'
+                        break
+                    real = serie.iloc[corte:corte + horizonte].to_numpy()
+                    errores.append(real - ajuste_pliegue.forecast(steps=horizonte).to_numpy())
+                else:
+                    fila['rmse_backtest'] = float(np.sqrt(np.mean(np.square(errores))))
+    except Exception as e:  # Un candidato que falla no debe abortar toda la búsqueda.
+        fila.update({'aic': np.inf, 'bic': np.inf, 'rmse_backtest': np.inf,
+                     'estado': f'error: {type(e).__name__}: {e}'})
+
+    fila['segundos'] = time.perf_counter() - inicio
+    return fila
+
+@instrumentar('serie_temporal.busqueda_arima')
+def buscar_orden_arima(serie, p=range(0, 4), d=range(0, 3), q=range(0, 4), estacionales=((0, 0, 0, 0),),
+                       criterio='aic', n_procesos=None, n_pliegues=3, horizonte=6, max_iter=50,
+                       iter_cribado=15, margen_cribado=20.0):
+    """
+    Busca el mejor orden (p,d,q) y estacional (P,D,Q,s) de ARIMA en una rejilla de candidatos.
+
+    - criterio: 'aic', 'bic' o 'backtest' (RMSE medio de un backtest con origen móvil
+      de `n_pliegues` pliegues de `horizonte` meses).
+    - n_procesos: procesos para ajustar candidatos en paralelo (por defecto, todos los núcleos).
+    - max_iter: iteraciones máximas del optimizador; los ajustes que no convergen se descartan.
+    - iter_cribado / margen_cribado: abandono temprano. Todos los candidatos se ajustan
+      primero con sólo `iter_cribado` iteraciones; los que quedan más de `margen_cribado`
+      puntos de AIC por encima del mejor de la criba se descartan (estado 'descartado')
+      sin pagar el ajuste completo ni el backtest, y el resto continúa desde los
+      parámetros de la criba. Con `margen_cribado=None` no hay criba.
+
+    Devuelve el mejor candidato (diccionario) y una tabla con todos los candidatos
+    (criterios, estado y segundos de ajuste), ordenada de mejor a peor.
+    """
+    columna = {'aic': 'aic', 'bic': 'bic', 'backtest': 'rmse_backtest'}[criterio]
+    candidatos = [((pp, dd, qq), est) for pp, dd, qq in product(p, d, q) for est in estacionales]
+    argumentos = (criterio, n_pliegues, horizonte, max_iter)
+    n_procesos = n_procesos or os.cpu_count() or 1
+    pool = (ProcessPoolExecutor(max_workers=n_procesos, mp_context=graficos.contexto_procesos())
+            if n_procesos > 1 else None)
+
+    def en_paralelo(funcion, tareas):
+        # Resultados en el orden de `tareas`, en el pool si lo hay.
+        if pool is None:
+            return [funcion(*tarea) for tarea in tareas]
+        return [futuro.result() for futuro in [pool.submit(funcion, *tarea) for tarea in tareas]]
+
+    try:
+        filas, iniciales, segundos_cribado = [], [None] * len(candidatos), [0.0] * len(candidatos)
+        if margen_cribado is not None:
+            cribado = en_paralelo(_cribar_candidato,
+                                  [(serie, orden, est, iter_cribado) for orden, est in candidatos])
+            mejor_aic = min(aic for aic, _, _ in cribado)
+            continuan = [aic <= mejor_aic + margen_cribado for aic, _, _ in cribado]
+            filas = [{'orden': orden, 'orden_estacional': est, 'aic': aic, 'bic': np.nan,
+                      'rmse_backtest': np.nan, 'estado': 'descartado' if np.isfinite(aic) else 'error',
+                      'segundos': segundos}
+                     for (orden, est), (aic, _, segundos), sigue in zip(candidatos, cribado, continuan)
+                     if not sigue]
+            candidatos = [c for c, sigue in zip(candidatos, continuan) if sigue]
+            iniciales = [parametros for (_, parametros, _), sigue in zip(cribado, continuan) if sigue]
+            segundos_cribado = [segundos for (_, _, segundos), sigue in zip(cribado, continuan) if sigue]
+        evaluadas = en_paralelo(_evaluar_candidato, [(serie, orden, est, *argumentos, parametros)
+                                                     for (orden, est), parametros in zip(candidatos, iniciales)])
+        for fila, segundos in zip(evaluadas, segundos_cribado):
+            fila['segundos'] += segundos
+        filas += evaluadas
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    tabla = pd.DataFrame(filas).sort_values(columna, na_position='last').reset_index(drop=True)
+    validos = tabla[tabla['estado'] == 'ok'].dropna(subset=[columna])
+    if validos.empty:
+        raise ValueError("Ningún candidato ARIMA convergió; amplía max_iter o la rejilla.")
+    return validos.iloc[0].to_dict(), tabla
+
+@instrumentar('serie_temporal.grafico')
+def visualizar_serie_temporal(serie):
+    """
+    Grafica la serie de publicaciones mensuales y sus funciones de autocorrelación.
+    """
+    if not graficos.activados():
+        return
+
     # Visualización de la serie
     plt.figure(figsize=(14, 7))
     plt.plot(serie, label='Publicaciones por Mes')
@@ -35,25 +250,33 @@ def analizar_y_predecir(serie):
     plt.xlabel('Fecha')
     plt.ylabel('Cantidad de Publicaciones')
     plt.legend()
-    plt.savefig('serie_temporal_publicaciones.png')
-    plt.show()
+    graficos.guardar('serie_temporal_publicaciones.png')
 
     # Gráficos de autocorrelación para ayudar a elegir los parámetros p, d, q de ARIMA
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
     plot_acf(serie, ax=ax1, lags=24)
     plot_pacf(serie, ax=ax2, lags=24)
     plt.tight_layout()
-    plt.savefig('acf_pacf_plots.png')
-    plt.show()
+    graficos.guardar('acf_pacf_plots.png')
+
+@instrumentar('serie_temporal.arima')
+def analizar_y_predecir(serie, orden=(5, 1, 0), orden_estacional=(0, 0, 0, 0)):
+    """
+    Analiza la serie temporal con un modelo ARIMA y predice valores futuros.
+    El orden puede elegirse automáticamente con `buscar_orden_arima`.
+    Devuelve la predicción media y su intervalo de confianza para `visualizar_prediccion`.
+    """
+    print("--- Análisis de la Serie Temporal ---")
 
     print("\n--- Ajustando Modelo ARIMA y Realizando Predicción ---")
     # Parámetros (p,d,q) para el modelo ARIMA.
     # p: orden auto-regresivo (lags de ACF)
     # d: orden de diferenciación (para hacer la serie estacionaria)
     # q: orden de media móvil (lags de PACF)
-    # Estos valores son un punto de partida y requerirían un análisis más profundo.
-    # Usamos (5,1,0) como un ejemplo común.
-    modelo = ARIMA(serie, order=(5, 1, 0))
+    # Por defecto se usa (5,1,0) como ejemplo común; `buscar_orden_arima` permite
+    # elegirlo evaluando una rejilla de candidatos por AIC/BIC o backtest.
+    print(f"Orden ARIMA: {orden}, estacional: {orden_estacional}")
+    modelo = ARIMA(serie, order=orden, seasonal_order=orden_estacional)
     modelo_ajustado = modelo.fit()
     
     print(modelo_ajustado.summary())
@@ -61,11 +284,23 @@ def analizar_y_predecir(serie):
     # Realizar predicción para los próximos 24 meses (2 años)
     prediccion = modelo_ajustado.get_forecast(steps=24)
     pred_ci = prediccion.conf_int() # Intervalos de confianza
+    
+    print("\nPredicción para los próximos 12 meses:")
+    print(prediccion.predicted_mean.head(12))
+
+    return prediccion.predicted_mean, pred_ci
+
+@instrumentar('serie_temporal.grafico_prediccion')
+def visualizar_prediccion(serie, prediccion_media, pred_ci):
+    """
+    Grafica la serie observada junto con la predicción de ARIMA y su intervalo de confianza.
+    """
+    if not graficos.activados():
+        return
 
-    # Visualizar la predicción
     plt.figure(figsize=(14, 7))
     ax = serie.plot(label='Observado', color='royalblue')
-    prediccion.predicted_mean.plot(ax=ax, label='Predicción', color='darkorange', linestyle='--')
+    prediccion_media.plot(ax=ax, label='Predicción', color='darkorange', linestyle='--')
     
     ax.fill_between(pred_ci.index,
                     pred_ci.iloc[:, 0],
@@ -76,25 +311,59 @@ def analizar_y_predecir(serie):
     plt.title('Predicción de Publicaciones Futuras con ARIMA')
     plt.legend()
     plt.grid(True)
-    plt.savefig('prediccion_arima.png')
-    plt.show()
-    
-    print("\nPredicción para los próximos 12 meses:")
-    print(prediccion.predicted_mean.head(12))
+    graficos.guardar('prediccion_arima.png')
 
 
 if __name__ == "__main__":
     # Cargar los datos
     try:
-        df = pd.read_csv('articulos_educacion_online.csv')
+        df = cargar_articulos(['id_articulo', 'fecha_publicacion', 'pais_autor'])
     except FileNotFoundError:
         print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
         print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
         exit()
 
     # 1. Preparar la serie temporal
-    serie_publicaciones = preparar_serie_temporal(df)
+    serie_publicaciones = preparar_serie_temporal(df.copy())
     
-    # 2. Analizar y predecir
-    analizar_y_predecir(serie_publicaciones)
-    print("\nGráficos guardados como 'serie_temporal_publicaciones.png', 'acf_pacf_plots.png' y 'prediccion_arima.png'")
\ No newline at end of file
+    # 2. Seleccionar el orden del modelo ARIMA
+    print("--- Búsqueda del orden ARIMA (AIC) ---")
+    mejor, candidatos = buscar_orden_arima(serie_publicaciones, criterio='aic')
+    print(candidatos.head(10).to_string())
+    print(f"Tiempo total de ajuste: {candidatos['segundos'].sum():.1f} s en {len(candidatos)} candidatos")
+
+    # 3. Analizar y predecir
+    prediccion_media, pred_ci = analizar_y_predecir(serie_publicaciones, mejor['orden'], mejor['orden_estacional'])
+
+    # Los gráficos se renderizan al final (en paralelo en modo headless, ver graficos.py)
+    graficos.renderizar([
+        (visualizar_serie_temporal, (serie_publicaciones,)),
+        (visualizar_prediccion, (serie_publicaciones, prediccion_media, pred_ci)),
+    ])
+    if graficos.activados():
+        print("\nGráficos guardados como 'serie_temporal_publicaciones.png', 'acf_pacf_plots.png' y 'prediccion_arima.png'")
+
+    # 4. Pronóstico por país (un modelo por serie, en paralelo)
+    inicio = time.perf_counter()
+    pronostico_paises = pronosticar_por_grupo(df, 'pais_autor', pasos=12)
+    segundos = time.perf_counter() - inicio
+    print("\n--- Pronóstico por país (12 meses) ---")
+    correctos = pronostico_paises[pronostico_paises['estado'] == 'ok']
+    print(correctos.groupby('grupo')['prediccion'].sum().round(1))
+    print(f"{correctos['grupo'].nunique()} de {pronostico_paises['grupo'].nunique()} series en {segundos:.2f} s")
+
+    guardar_informe()
+    print("\nInforme de ejecución guardado en 'informe_ejecucion.json'")
+
+    # 5. Benchmark de throughput con series sintéticas (conteos de Poisson mensuales),
+    # sólo con --benchmark para no alargar cada ejecución del análisis.
+    if '--benchmark' in sys.argv:
+        rng = np.random.default_rng(42)
+        meses = pd.date_range('2014-01-01', periods=120, freq='MS')
+        sinteticas = pd.DataFrame(rng.poisson(lam=np.linspace(2, 10, 120)[:, None], size=(120, 200)), index=meses)
+        for n_procesos in sorted({1, os.cpu_count() or 1}):
+            inicio = time.perf_counter()
+            pronosticar_series(sinteticas, n_procesos=n_procesos)
+            segundos = time.perf_counter() - inicio
+            print(f"Benchmark: {sinteticas.shape[1]} series con {n_procesos} proceso(s): "
+                  f"{sinteticas.shape[1] / segundos:.1f} series/s")
\ No newline at end of file
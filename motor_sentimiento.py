@@ -0,0 +1,292 @@
+import re
+import string
+import time
+from importlib.metadata import version
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from vaderSentiment.vaderSentiment import (
+    BOOSTER_DICT, C_INCR, N_SCALAR, NEGATE, SPECIAL_CASES, SentimentIntensityAnalyzer
+)
+
+# Tolerancia frente a `SentimentIntensityAnalyzer.polarity_scores`.
+# Las reglas de VADER se reproducen en el mismo orden, con la misma aritmética y el
+# mismo redondeo final, así que en la práctica los resultados son idénticos; la
+# tolerancia admite una unidad en el último decimal por si cambia el orden de las sumas.
+TOLERANCIA = {'neg': 1e-3, 'neu': 1e-3, 'pos': 1e-3, 'compound': 1e-4}
+
+COLUMNAS_SENTIMIENTO = ['neg', 'neu', 'pos', 'compound']
+
+# Versión de las puntuaciones: cambia si cambia VADER (léxico/reglas) o este motor.
+# Las cachés de puntuaciones la usan como parte de la clave para invalidarse solas.
+VERSION_MOTOR = f"vader-{version('vaderSentiment')}/motor-1"
+
+# Palabras de control que las reglas de VADER comparan literalmente.
+PALABRAS_CONTROL = ['no', 'least', 'at', 'very', 'never', 'so', 'this',
+                    'without', 'doubt', 'or', 'nor', 'but']
+
+# Frases de varias palabras (idioms y boosters como "kind of") cuya regla depende
+# del contexto completo: las filas que las contienen se puntúan con VADER directamente.
+FRASES_ESPECIALES = [k.split() for k in list(SPECIAL_CASES) + list(BOOSTER_DICT) if ' ' in k]
+
+_vocabulario = None
+
+
+def compilar_vocabulario(analyzer=None):
+    """
+    Precompila el léxico de VADER en un índice de vocabulario y arrays de NumPy.
+
+    El índice 0 queda reservado para las palabras que no aparecen en ninguna lista,
+    de forma que cualquier token desconocido tiene valencia y modificadores nulos.
+    """
+    if analyzer is None:
+        analyzer = SentimentIntensityAnalyzer()
+
+    palabras = set(analyzer.lexicon) | set(BOOSTER_DICT) | set(NEGATE) | set(PALABRAS_CONTROL)
+    palabras |= {p for frase in FRASES_ESPECIALES for p in frase}
+    palabras = [''] + sorted(palabras)
+    indice = {p: i for i, p in enumerate(palabras)}
+
+    return {
+        'analyzer': analyzer,
+        'indice': indice,
+        'valencia': np.array([analyzer.lexicon.get(p, 0.0) for p in palabras]),
+        'en_lexico': np.array([p in analyzer.lexicon for p in palabras]),
+        'booster': np.array([BOOSTER_DICT.get(p, 0.0) for p in palabras]),
+        'es_booster': np.array([p in BOOSTER_DICT for p in palabras]),
+        'negacion': np.array([p in NEGATE or "n't" in p for p in palabras]),
+        'emojis': re.compile('[' + re.escape(''.join(k for k in analyzer.emojis if len(k) == 1)) + ']'),
+    }
+
+
+def obtener_vocabulario():
+    """Devuelve el vocabulario compilado del proceso, construyéndolo la primera vez."""
+    global _vocabulario
+    if _vocabulario is None:
+        _vocabulario = compilar_vocabulario()
+    return _vocabulario
+
+
+def _limpiar_token(token):
+    # Misma regla que SentiText._strip_punc_if_word: si al quitar la puntuación
+    # quedan dos caracteres o menos, probablemente era un emoticono.
+    limpio = token.strip(string.punctuation)
+    return token if len(limpio) <= 2 else limpio
+
+
+def _desplazar(arr, k, relleno):
+    """Desplaza `arr` k posiciones hacia la derecha (k > 0) o izquierda (k < 0)."""
+    salida = np.full_like(arr, relleno)
+    if k > 0:
+        salida[k:] = arr[:-k]
+    else:
+        salida[:k] = arr[-k:]
+    return salida
+
+
+def _redondear(valores, decimales):
+    # round() de Python redondea sobre la representación decimal exacta, igual que VADER;
+    # np.round puede diferir en una unidad del último decimal en los casos frontera.
+    return np.array([round(v, decimales) for v in valores.tolist()])
+
+
+def puntuar_textos(textos, vocabulario=None):
+    """
+    Calcula las puntuaciones VADER (neg, neu, pos, compound) de una colección de textos
+    en bloque y devuelve un DataFrame con una fila por texto.
+
+    Todos los textos se tokenizan de una sola vez; cada token distinto se resuelve una
+    única vez contra el vocabulario compilado y el resto de reglas (boosters, negaciones,
+    mayúsculas, "least", puntuación) se aplican con operaciones vectorizadas.
+    """
+    voc = vocabulario if vocabulario is not None else obtener_vocabulario()
+    serie = pd.Series(textos, dtype=object).fillna('').astype(str).reset_index(drop=True)
+    n = len(serie)
+
+    # --- Tokenización de todo el corpus ---
+    listas = [t.split() for t in serie]
+    longitudes = np.fromiter(map(len, listas), dtype=np.int64, count=n)
+    codigos, unicos = pd.factorize(pd.Series(list(chain.from_iterable(listas)), dtype=object))
+
+    # Cada token distinto se limpia y busca en el vocabulario una sola vez.
+    limpios = [_limpiar_token(t) for t in unicos]
+    minusculas = [t.lower() for t in limpios]
+    idx_unico = np.array([voc['indice'].get(t, 0) for t in minusculas], dtype=np.int64)
+    mayus_unico = np.array([t.isupper() for t in limpios], dtype=bool)
+    neg_unico = np.array(["n't" in t for t in minusculas], dtype=bool)
+
+    idx = idx_unico[codigos]
+    mayus = mayus_unico[codigos]
+    negado = voc['negacion'][idx] | neg_unico[codigos]
+    fila = np.repeat(np.arange(n), longitudes)
+    inicio = np.cumsum(longitudes) - longitudes
+    posicion = np.arange(len(idx)) - np.repeat(inicio, longitudes)
+    ultima = posicion == np.repeat(longitudes, longitudes) - 1
+
+    ids = {p: voc['indice'][p] for p in PALABRAS_CONTROL}
+    en_lex = voc['en_lexico'][idx]
+    lexico = voc['valencia'][idx]
+
+    def previo(arr, k, relleno):
+        return np.where(posicion >= k, _desplazar(arr, k, relleno), relleno)
+
+    prev_idx = {k: previo(idx, k, 0) for k in (1, 2, 3)}
+    prev_en_lex = {k: previo(en_lex, k, False) for k in (1, 2, 3)}
+    prev_negado = {k: previo(negado, k, False) for k in (1, 2, 3)}
+    prev_mayus = {k: previo(mayus, k, False) for k in (1, 2, 3)}
+    siguiente_en_lex = np.where(ultima, False, _desplazar(en_lex, -1, False))
+
+    # Diferencial de mayúsculas: algunas palabras (pero no todas) en MAYÚSCULAS.
+    n_mayus = np.bincount(fila, weights=mayus, minlength=n)
+    cap_diff = ((n_mayus > 0) & (n_mayus < longitudes))[fila]
+
+    # --- Valencia base y negación con "no" ---
+    valencia = lexico.copy()
+    valencia[(idx == ids['no']) & siguiente_en_lex] = 0.0
+    con_no = ((prev_idx[1] == ids['no']) | (prev_idx[2] == ids['no'])
+              | ((prev_idx[3] == ids['no']) & np.isin(prev_idx[1], [ids['or'], ids['nor']])))
+    valencia = np.where(con_no, lexico * N_SCALAR, valencia)
+
+    # --- Énfasis por MAYÚSCULAS ---
+    enfasis = mayus & cap_diff
+    valencia = np.where(enfasis, np.where(valencia > 0, valencia + C_INCR, valencia - C_INCR), valencia)
+
+    # --- Boosters y negaciones en las tres palabras anteriores ---
+    so_this = [ids['so'], ids['this']]
+    for k, amortiguacion in ((1, 1.0), (2, 0.95), (3, 0.9)):
+        aplica = (posicion >= k) & ~prev_en_lex[k]
+
+        escalar = voc['booster'][prev_idx[k]]
+        escalar = np.where(valencia < 0, -escalar, escalar)
+        caps = voc['es_booster'][prev_idx[k]] & prev_mayus[k] & cap_diff
+        escalar = np.where(caps, np.where(valencia > 0, escalar + C_INCR, escalar - C_INCR), escalar)
+        escalar = escalar * amortiguacion
+        valencia = np.where(aplica, valencia + escalar, valencia)
+
+        if k == 1:
+            negar = prev_negado[1]
+            reforzar = np.zeros_like(negar)
+        elif k == 2:
+            reforzar = (prev_idx[2] == ids['never']) & np.isin(prev_idx[1], so_this)
+            sin_duda = (prev_idx[2] == ids['without']) & (prev_idx[1] == ids['doubt'])
+            negar = ~reforzar & ~sin_duda & prev_negado[2]
+        else:
+            reforzar = (((prev_idx[3] == ids['never']) & np.isin(prev_idx[2], so_this))
+                        | np.isin(prev_idx[1], so_this))
+            sin_duda = (prev_idx[3] == ids['without']) & ((prev_idx[2] == ids['doubt'])
+                                                          | (prev_idx[1] == ids['doubt']))
+            negar = ~reforzar & ~sin_duda & prev_negado[3]
+        valencia = np.where(aplica & reforzar, valencia * 1.25, valencia)
+        valencia = np.where(aplica & negar, valencia * N_SCALAR, valencia)
+
+    # --- Negación con "least" (salvo "at least" / "very least") ---
+    least = (prev_idx[1] == ids['least']) & ~prev_en_lex[1]
+    least_neg = (least & (posicion > 1) & ~np.isin(prev_idx[2], [ids['at'], ids['very']])) \
+        | (least & (posicion == 1))
+    valencia = np.where(least_neg, valencia * N_SCALAR, valencia)
+
+    # Los boosters no aportan valencia propia; el resto de palabras fuera del léxico tampoco.
+    sentimientos = np.where(en_lex & ~voc['es_booster'][idx], valencia, 0.0)
+
+    # --- Agregación por texto ---
+    suma = np.bincount(fila, weights=sentimientos, minlength=n)
+    pos_suma = np.bincount(fila, weights=np.where(sentimientos > 0, sentimientos + 1, 0.0), minlength=n)
+    neg_suma = np.bincount(fila, weights=np.where(sentimientos < 0, sentimientos - 1, 0.0), minlength=n)
+    neu_cuenta = np.bincount(fila, weights=sentimientos == 0, minlength=n)
+
+    exclamaciones = np.minimum(serie.str.count('!').to_numpy(), 4) * 0.292
+    interrogaciones = serie.str.count(r'\?').to_numpy()
+    interrogaciones = np.where(interrogaciones > 3, 0.96,
+                               np.where(interrogaciones > 1, interrogaciones * 0.18, 0.0))
+    amplificador = exclamaciones + interrogaciones
+
+    suma = np.where(suma > 0, suma + amplificador, np.where(suma < 0, suma - amplificador, suma))
+    compound = np.clip(suma / np.sqrt(suma * suma + 15), -1.0, 1.0)
+
+    domina_pos = pos_suma > np.abs(neg_suma)
+    domina_neg = pos_suma < np.abs(neg_suma)
+    pos_suma = np.where(domina_pos, pos_suma + amplificador, pos_suma)
+    neg_suma = np.where(domina_neg, neg_suma - amplificador, neg_suma)
+    total = pos_suma + np.abs(neg_suma) + neu_cuenta
+    vacio = longitudes == 0
+    total = np.where(vacio, 1.0, total)
+
+    resultado = pd.DataFrame({
+        'neg': _redondear(np.where(vacio, 0.0, np.abs(neg_suma / total)), 3),
+        'neu': _redondear(np.where(vacio, 0.0, np.abs(neu_cuenta / total)), 3),
+        'pos': _redondear(np.where(vacio, 0.0, np.abs(pos_suma / total)), 3),
+        'compound': _redondear(np.where(vacio, 0.0, compound), 4),
+    })
+
+    # --- Filas con reglas dependientes del contexto completo: VADER fila a fila ---
+    especial = np.zeros(len(idx), dtype=bool)
+    for frase in FRASES_ESPECIALES:
+        coincide = idx == voc['indice'][frase[0]]
+        for desfase, palabra in enumerate(frase[1:], start=1):
+            coincide &= (posicion + desfase < np.repeat(longitudes, longitudes)) \
+                & (_desplazar(idx, -desfase, 0) == voc['indice'][palabra])
+        especial |= coincide
+    especial |= idx == ids['but']
+    filas_especiales = np.bincount(fila, weights=especial, minlength=n) > 0
+    filas_especiales |= serie.str.contains(voc['emojis']).to_numpy()
+
+    for i in np.flatnonzero(filas_especiales):
+        puntuacion = voc['analyzer'].polarity_scores(serie.iat[i])
+        resultado.iloc[i] = [puntuacion[c] for c in COLUMNAS_SENTIMIENTO]
+
+    return resultado
+
+
+def clasificar_sentimiento(compound, etiquetas=('positivo', 'negativo', 'neutral')):
+    """Clasifica un array de scores 'compound' con los mismos umbrales que VADER (±0.05)."""
+    positivo, negativo, neutral = etiquetas
+    compound = np.asarray(compound)
+    return np.where(compound > 0.05, positivo, np.where(compound < -0.05, negativo, neutral))
+
+
+def comparar_con_vader(textos, n_muestra=None):
+    """
+    Compara el motor por lotes con `polarity_scores` y devuelve la diferencia máxima
+    absoluta por columna, junto con las filas por segundo de cada implementación.
+    """
+    textos = pd.Series(textos, dtype=object).reset_index(drop=True)
+    if n_muestra is not None:
+        textos = textos.head(n_muestra)
+
+    analyzer = SentimentIntensityAnalyzer()
+    inicio = time.perf_counter()
+    referencia = textos.apply(lambda res: pd.Series(analyzer.polarity_scores(res)))[COLUMNAS_SENTIMIENTO]
+    t_referencia = time.perf_counter() - inicio
+
+    obtener_vocabulario()
+    inicio = time.perf_counter()
+    lote = puntuar_textos(textos)
+    t_lote = time.perf_counter() - inicio
+
+    diferencias = (referencia.reset_index(drop=True) - lote).abs().max()
+    return {
+        'filas': len(textos),
+        'filas_por_segundo_apply': len(textos) / t_referencia,
+        'filas_por_segundo_lote': len(textos) / t_lote,
+        'diferencia_maxima': diferencias.to_dict(),
+        'dentro_de_tolerancia': bool(all(diferencias[c] <= TOLERANCIA[c] for c in COLUMNAS_SENTIMIENTO)),
+    }
+
+
+if __name__ == "__main__":
+    # Benchmark: ruta actual (.apply + polarity_scores) frente al motor por lotes.
+    try:
+        df = pd.read_csv('articulos_educacion_online.csv')
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        exit()
+
+    for repeticiones in (1, 20):
+        textos = pd.concat([df['resumen']] * repeticiones, ignore_index=True)
+        r = comparar_con_vader(textos)
+        print(f"--- {r['filas']} filas ---")
+        print(f"  .apply + polarity_scores: {r['filas_por_segundo_apply']:>12,.0f} filas/s")
+        print(f"  motor por lotes:          {r['filas_por_segundo_lote']:>12,.0f} filas/s")
+        print(f"  diferencia máxima: {r['diferencia_maxima']} (dentro de tolerancia: {r['dentro_de_tolerancia']})")
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import graficos
+from agregados_citas import calcular_agregados_citas, guardar_agregados_citas, tablas_citas
+import instrumentacion
+from analisis_descriptivo_clustering import (
+    analisis_exploratorio, clustering_tematico, clustering_tematico_escalable, visualizar_clusters
+)
+from analisis_sentimiento import visualizar_sentimiento_temporal
+from cache_sentimiento import CacheSentimiento
+from carga_datos import RUTA_CSV, RUTA_PARQUET, cargar_articulos, fechas_desde_dias
+from clustering_escalable import muestra_estratificada, transformar
+from deduplicacion import UMBRAL_JACCARD, colapsar_duplicados, firmas_minhash, grupos_duplicados
+from generar_dashboard import calcular_agregados, datos_desde_agregados, generar_html, guardar_agregados
+from modelo_prediccion_temporal import (
+    analizar_y_predecir, buscar_orden_arima, preparar_serie_temporal, visualizar_prediccion,
+    visualizar_serie_temporal
+)
+from motor_sentimiento import VERSION_MOTOR, clasificar_sentimiento
+
+DIRECTORIO_CACHE = '.cache_pipeline'
+# Agregados de la vista sin casi duplicados que muestra el dashboard del pipeline.
+RUTA_AGREGADOS_UNICOS = 'dashboard_agregados_unicos.json'
+RUTA_CITAS_UNICOS = 'dashboard_citas_unicos.json'
+
+# Se incluye en todas las huellas: subirla invalida las salidas guardadas de todas las etapas.
+VERSION_PIPELINE = 1
+
+PARAMETROS = {
+    'num_clusters': 4,
+    # A partir de este número de artículos el clustering usa el modo escalable (hashing + mini-lotes).
+    'umbral_clustering_escalable': 200_000,
+    'max_puntos_por_cluster': 2_000,
+    'criterio_arima': 'aic',
+    # Similitud de Jaccard estimada a partir de la cual dos resúmenes son casi duplicados.
+    'umbral_duplicados': UMBRAL_JACCARD,
+}
+
+
+# --- Etapas ---
+# Cada etapa recibe las salidas de sus dependencias y los parámetros, y devuelve su salida.
+
+def _etapa_carga(entradas, parametros):
+    # Formato compacto: todas las etapas parten de este DataFrame y se mantiene en memoria
+    # durante toda la ejecución.
+    return cargar_articulos(ruta_csv=parametros['ruta_csv'], ruta_parquet=parametros['ruta_parquet'],
+                            compacto=True)
+
+def _etapa_fechas(entradas, parametros):
+    fechas = fechas_desde_dias(entradas['carga']['dia_publicacion'])
+    return pd.DataFrame({'fecha_publicacion': fechas, 'año': fechas.dt.year})
+
+def _etapa_sentimiento(entradas, parametros):
+    # La caché se abre dentro de la etapa: la conexión SQLite no puede cambiar de hilo.
+    with CacheSentimiento() as cache:
+        puntuaciones = cache.puntuar(entradas['carga']['resumen'])
+    puntuaciones.index = entradas['carga'].index
+    etiquetas = ('positivo', 'negativo', 'neutral')
+    puntuaciones['sentimiento_general'] = pd.Categorical(
+        clasificar_sentimiento(puntuaciones['compound'], etiquetas), categories=etiquetas)
+    return puntuaciones
+
+def _etapa_clustering(entradas, parametros):
+    # Se agrupa un resumen por grupo de casi duplicados (así las copias de un mismo texto no
+    # arrastran los centroides) y después cada copia hereda el clúster de su representante.
+    grupos = entradas['duplicados'].to_numpy()
+    representantes = np.flatnonzero(grupos == np.arange(len(grupos)))
+    df = colapsar_duplicados(entradas['carga'][['resumen']], grupos)
+    num_clusters = parametros['num_clusters']
+    if len(df) >= parametros['umbral_clustering_escalable']:
+        df, modelo = clustering_tematico_escalable(df, num_clusters=num_clusters)
+        indices = muestra_estratificada(df['cluster'], parametros['max_puntos_por_cluster'])
+        X_muestra = transformar(modelo, df['resumen'].iloc[indices])
+    else:
+        df, X = clustering_tematico(df, num_clusters=num_clusters)
+        indices = muestra_estratificada(df['cluster'], parametros['max_puntos_por_cluster'])
+        X_muestra = X[indices]
+    fila_representante = np.empty(len(grupos), dtype=np.int64)
+    fila_representante[representantes] = np.arange(len(representantes))
+    cluster = pd.Series(df['cluster'].to_numpy()[fila_representante[grupos]], index=entradas['carga'].index,
+                        name='cluster')
+    # Sólo se conserva la muestra estratificada de la matriz TF-IDF, suficiente para el gráfico
+    # (sus posiciones se traducen de la tabla de representantes a la de todos los artículos).
+    return {'cluster': cluster, 'indices_muestra': representantes[indices], 'X_muestra': X_muestra}
+
+def _etapa_duplicados(entradas, parametros):
+    # Grupo de casi duplicados de cada artículo; el clustering y el dashboard los colapsan
+    # con `deduplicacion.colapsar_duplicados`.
+    grupos = grupos_duplicados(firmas_minhash(entradas['carga']['resumen']), parametros['umbral_duplicados'])
+    return pd.Series(grupos, index=entradas['carga'].index, name='grupo_duplicados')
+
+def _etapa_serie_temporal(entradas, parametros):
+    df = pd.DataFrame({'id_articulo': entradas['carga']['id_articulo'],
+                       'fecha_publicacion': entradas['fechas']['fecha_publicacion']})
+    serie = preparar_serie_temporal(df)
+    mejor, _ = buscar_orden_arima(serie, criterio=parametros['criterio_arima'])
+    prediccion_media, pred_ci = analizar_y_predecir(serie, mejor['orden'], mejor['orden_estacional'])
+    return {'serie': serie, 'orden': mejor['orden'], 'orden_estacional': mejor['orden_estacional'],
+            'prediccion_media': prediccion_media, 'pred_ci': pred_ci}
+
+def _etapa_dashboard(entradas, parametros):
+    carga = entradas['carga']
+    df = pd.DataFrame({'id_articulo': carga['id_articulo'], 'titulo': carga['titulo'],
+                       'pais_autor': carga['pais_autor'], 'citas': carga['citas'],
+                       'año': entradas['fechas']['año'],
+                       'compound': entradas['sentimiento']['compound'],
+                       'cluster': entradas['clustering']['cluster'].to_numpy()})
+    # Los agregados de todas las filas del CSV van a los archivos de siempre, con 'filas_csv':
+    # el punto desde el que sigue `generar_dashboard.py --incremental`.
+    guardar_agregados(calcular_agregados(df), filas_csv=len(df))
+    guardar_agregados_citas(calcular_agregados_citas(df), filas_csv=len(df))
+    # El dashboard muestra la vista sin casi duplicados (como `servidor_dashboard`): cada grupo
+    # cuenta una vez y su representante acumula las citas de todo el grupo.
+    unicos = colapsar_duplicados(df, entradas['duplicados'].to_numpy(), sumar=('citas',))
+    agregados = calcular_agregados(unicos)
+    guardar_agregados(agregados, RUTA_AGREGADOS_UNICOS)
+    agregados_citas = calcular_agregados_citas(unicos)
+    guardar_agregados_citas(agregados_citas, RUTA_CITAS_UNICOS)
+    datos = datos_desde_agregados(agregados)
+    generar_html(datos, citas=tablas_citas(agregados_citas))
+    return datos
+
+def _etapa_graficos(entradas, parametros):
+    carga, fechas = entradas['carga'], entradas['fechas']
+    clustering, serie = entradas['clustering'], entradas['serie_temporal']
+    df_sentimiento = pd.DataFrame({'fecha_publicacion': fechas['fecha_publicacion'],
+                                   'compound': entradas['sentimiento']['compound']})
+    df_exploratorio = pd.DataFrame({'pais_autor': carga['pais_autor'],
+                                    'fecha_publicacion': fechas['fecha_publicacion']})
+    df_clusters = pd.DataFrame({'cluster': clustering['cluster'].to_numpy()[clustering['indices_muestra']]})
+    graficos.renderizar([
+        (visualizar_sentimiento_temporal, (df_sentimiento,)),
+        (analisis_exploratorio, (df_exploratorio,)),
+        (visualizar_clusters, (df_clusters, clustering['X_muestra'])),
+        (visualizar_serie_temporal, (serie['serie'],)),
+        (visualizar_prediccion, (serie['serie'], serie['prediccion_media'], serie['pred_ci'])),
+    ])
+
+# nombre: (dependencias, función, versión propia, ¿se guarda en disco?, archivos que genera)
+ETAPAS = {
+    'carga': ([], _etapa_carga, 1, False, []),
+    'fechas': (['carga'], _etapa_fechas, 1, True, []),
+    'sentimiento': (['carga'], _etapa_sentimiento, VERSION_MOTOR, True, []),
+    'duplicados': (['carga'], _etapa_duplicados, 1, True, []),
+    'clustering': (['carga', 'duplicados'], _etapa_clustering, 2, True, []),
+    'serie_temporal': (['carga', 'fechas'], _etapa_serie_temporal, 1, True, []),
+    'dashboard': (['carga', 'fechas', 'sentimiento', 'clustering', 'duplicados'], _etapa_dashboard, 4, True,
+                  ['dashboard.html', 'dashboard_agregados.json', 'dashboard_citas.json', RUTA_AGREGADOS_UNICOS,
+                   RUTA_CITAS_UNICOS]),
+    'graficos': (['carga', 'fechas', 'sentimiento', 'clustering', 'serie_temporal'], _etapa_graficos, 1, True,
+                 ['evolucion_sentimiento.png', 'publicaciones_por_pais.png', 'publicaciones_por_año.png',
+                  'visualizacion_clusters.png', 'serie_temporal_publicaciones.png', 'acf_pacf_plots.png',
+                  'prediccion_arima.png']),
+}
+
+
+def _huella_archivo(ruta):
+    """Hash del contenido de un archivo, leído por bloques."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def calcular_huellas(parametros):
+    """
+    Huella de cada etapa: combina su nombre, versión y parámetros con las huellas de sus
+    dependencias (y, en la etapa de carga, con el contenido del CSV). Si no cambia
+    ninguna de sus entradas, la huella es la misma y su salida guardada sigue siendo válida.
+    """
+    huellas = {}
+    for nombre, (dependencias, _, version, _, _) in ETAPAS.items():  # ETAPAS está en orden topológico
+        contenido = {
+            'etapa': nombre,
+            'version': [VERSION_PIPELINE, version],
+            'parametros': parametros,
+            'dependencias': [huellas[d] for d in dependencias],
+        }
+        if nombre == 'carga':
+            contenido['csv'] = _huella_archivo(parametros['ruta_csv'])
+        texto = json.dumps(contenido, sort_keys=True, default=str)
+        huellas[nombre] = hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+    return huellas
+
+
+def ejecutar_pipeline(objetivos=None, ruta_csv=RUTA_CSV, ruta_parquet=RUTA_PARQUET,
+                      directorio_cache=DIRECTORIO_CACHE, n_hilos=None, **parametros):
+    """
+    Ejecuta el pipeline completo (o sólo lo necesario para `objetivos`) calculando cada
+    resultado intermedio una única vez:
+
+        carga → fechas, sentimiento, duplicados
+        carga, duplicados → clustering
+        carga, fechas → serie_temporal
+        carga, fechas, sentimiento, clustering, duplicados → dashboard
+        carga, fechas, sentimiento, clustering, serie_temporal → graficos
+
+    Las etapas cuyas dependencias ya están disponibles se ejecutan en paralelo (hilos).
+    La salida de cada etapa se guarda en `directorio_cache` con su huella, junto con el hash
+    de los archivos que genera; en ejecuciones posteriores sólo se ejecutan las etapas cuyas
+    entradas han cambiado o cuyos archivos de salida faltan o ya no son los que generaron
+    (p. ej. porque otro script los sobrescribió). Devuelve las salidas de los objetivos y un
+    informe por etapa.
+    """
+    parametros = {**PARAMETROS, **parametros, 'ruta_csv': ruta_csv, 'ruta_parquet': ruta_parquet}
+    if objetivos is None:
+        # La carga no se guarda en disco: sólo se ejecuta si alguna etapa la necesita.
+        objetivos = [n for n in ETAPAS if n != 'carga' and (n != 'graficos' or graficos.activados())]
+    # Los hilos no pueden abrir ventanas: el pipeline siempre renderiza sin GUI.
+    if graficos.modo() == 'interactivo':
+        graficos.configurar('headless')
+
+    os.makedirs(directorio_cache, exist_ok=True)
+    huellas = calcular_huellas(parametros)
+
+    def ruta_salida(nombre):
+        return os.path.join(directorio_cache, f'{nombre}-{huellas[nombre]}.pkl')
+
+    def ruta_archivos(nombre):
+        # Hash de cada archivo generado por la ejecución de la etapa con esta huella.
+        return os.path.join(directorio_cache, f'{nombre}-{huellas[nombre]}.archivos.json')
+
+    def archivos_vigentes(nombre):
+        archivos = ETAPAS[nombre][4]
+        if not archivos:
+            return True
+        try:
+            with open(ruta_archivos(nombre), encoding='utf-8') as f:
+                generados = json.load(f)
+        except FileNotFoundError:
+            return False
+        return all(os.path.exists(a) and generados.get(a) == _huella_archivo(a) for a in archivos)
+
+    decisiones = {}
+
+    def en_cache(nombre):
+        # Se decide una sola vez por ejecución (y sin volver a leer los archivos en cada consulta).
+        if nombre not in decisiones:
+            persistente = ETAPAS[nombre][3]
+            decisiones[nombre] = persistente and os.path.exists(ruta_salida(nombre)) and archivos_vigentes(nombre)
+        return decisiones[nombre]
+
+    # Etapas necesarias: los objetivos y, para las que hay que ejecutar, sus dependencias.
+    necesarias, pendientes_revisar = set(), list(objetivos)
+    while pendientes_revisar:
+        nombre = pendientes_revisar.pop()
+        if nombre not in necesarias:
+            necesarias.add(nombre)
+            if not en_cache(nombre):
+                pendientes_revisar.extend(ETAPAS[nombre][0])
+
+    resultados, informe = {}, {}
+
+    def tarea(nombre):
+        inicio = time.perf_counter()
+        if en_cache(nombre):
+            with open(ruta_salida(nombre), 'rb') as f:
+                salida, accion = pickle.load(f), 'caché'
+        else:
+            dependencias, funcion, _, persistente, _ = ETAPAS[nombre]
+            with instrumentacion.medir(f'pipeline.{nombre}'):
+                salida, accion = funcion({d: resultados[d] for d in dependencias}, parametros), 'ejecutada'
+            if persistente:
+                with open(ruta_salida(nombre), 'wb') as f:
+                    pickle.dump(salida, f, protocol=pickle.HIGHEST_PROTOCOL)
+                archivos = [a for a in ETAPAS[nombre][4] if os.path.exists(a)]
+                with open(ruta_archivos(nombre), 'w', encoding='utf-8') as f:
+                    json.dump({a: _huella_archivo(a) for a in archivos}, f, ensure_ascii=False)
+        return salida, {'accion': accion, 'segundos': time.perf_counter() - inicio}
+
+    pendientes, en_curso = [n for n in ETAPAS if n in necesarias], {}
+    with ThreadPoolExecutor(max_workers=n_hilos or os.cpu_count() or 1) as pool:
+        while pendientes or en_curso:
+            for nombre in list(pendientes):
+                dependencias = [] if en_cache(nombre) else ETAPAS[nombre][0]
+                if all(d in resultados for d in dependencias):
+                    en_curso[pool.submit(tarea, nombre)] = nombre
+                    pendientes.remove(nombre)
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre = en_curso.pop(futuro)
+                resultados[nombre], informe[nombre] = futuro.result()
+
+    return {n: resultados[n] for n in objetivos}, informe
+
+
+if __name__ == "__main__":
+    # Uso: python pipeline.py [etapa ...]   (por defecto, todas)
+    objetivos = sys.argv[1:] or None
+    inicio = time.perf_counter()
+    try:
+        _, informe = ejecutar_pipeline(objetivos)
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        exit()
+
+    print("\n--- Informe del pipeline ---")
+    for nombre in ETAPAS:
+        if nombre in informe:
+            print(f"{nombre:<16} {informe[nombre]['accion']:<10} {informe[nombre]['segundos']:8.2f} s")
+    print(f"{'total':<16} {'':<10} {time.perf_counter() - inicio:8.2f} s")
+    instrumentacion.guardar_informe()
+    print("\nInforme de ejecución guardado en 'informe_ejecucion.json'")
@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+from carga_datos import obtener_años
+from deduplicacion import colapsar_duplicados
+from generar_dashboard import datos_desde_agregados, renderizar_html
+from motor_sentimiento import clasificar_sentimiento
+
+HOST = '127.0.0.1'
+PUERTO = 8000
+TTL_SEGUNDOS = 60
+MAX_RESPUESTAS = 1_024
+
+ETIQUETAS_SENTIMIENTO = ('Positivo', 'Negativo', 'Neutral')
+
+# Endpoint JSON de cada gráfico del dashboard: ruta → clave en los datos de `datos_desde_agregados`.
+GRAFICOS = {
+    '/api/publicaciones_por_año': 'publicaciones_por_año',
+    '/api/publicaciones_por_pais': 'publicaciones_por_pais',
+    '/api/distribucion_sentimiento': 'distribucion_sentimiento',
+    '/api/evolucion_sentimiento': 'evolucion_sentimiento',
+}
+
+RAZONES = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class CuboAgregados:
+    """
+    Cubo precalculado de artículos por (año, país, sentimiento) con el número de artículos
+    y la suma del 'compound' (en unidades de 1e-4, como `calcular_agregados`).
+
+    Filtrar es aplicar una máscara sobre las celdas del cubo (unos cientos) en lugar de
+    recorrer los artículos; los agregados que devuelve tienen el mismo formato que
+    `generar_dashboard.calcular_agregados`, y sin filtros coinciden exactamente con ellos.
+    """
+
+    def __init__(self, df):
+        años = obtener_años(df)
+        compound = df['compound'].to_numpy()
+        celdas = pd.DataFrame({
+            'año': años.to_numpy(),
+            'pais': df['pais_autor'].astype(str).to_numpy(),
+            'sentimiento': clasificar_sentimiento(compound, etiquetas=ETIQUETAS_SENTIMIENTO),
+            'compound_1e4': (compound * 10_000).round().astype('int64'),
+        }).groupby(['año', 'pais', 'sentimiento'], observed=True)['compound_1e4'].agg(['size', 'sum']).reset_index()
+
+        self.años = celdas['año'].to_numpy(dtype=np.int64)
+        self.paises, self.codigos_pais = np.unique(celdas['pais'].to_numpy(dtype=object), return_inverse=True)
+        self.sentimientos, self.codigos_sentimiento = np.unique(celdas['sentimiento'].to_numpy(dtype=object),
+                                                                return_inverse=True)
+        self.articulos = celdas['size'].to_numpy(dtype=np.int64)
+        self.compound_1e4 = celdas['sum'].to_numpy(dtype=np.int64)
+
+    def __len__(self):
+        return len(self.articulos)
+
+    def agregados(self, paises=None, desde=None, hasta=None, sentimientos=None):
+        """Agregados (formato de `calcular_agregados`) de los artículos que cumplen los filtros."""
+        mascara = np.ones(len(self), dtype=bool)
+        if paises:
+            mascara &= np.isin(self.paises[self.codigos_pais], list(paises))
+        if sentimientos:
+            mascara &= np.isin(self.sentimientos[self.codigos_sentimiento], list(sentimientos))
+        if desde is not None:
+            mascara &= self.años >= desde
+        if hasta is not None:
+            mascara &= self.años <= hasta
+
+        articulos, compound = self.articulos[mascara], self.compound_1e4[mascara]
+        años, indice_año = np.unique(self.años[mascara], return_inverse=True)
+        por_pais = np.bincount(self.codigos_pais[mascara], weights=articulos, minlength=len(self.paises))
+        por_sentimiento = np.bincount(self.codigos_sentimiento[mascara], weights=articulos,
+                                      minlength=len(self.sentimientos))
+        # Sumas enteras con np.add.at: bincount con pesos pasaría por float64.
+        por_año = np.zeros(len(años), dtype=np.int64)
+        compound_por_año = np.zeros(len(años), dtype=np.int64)
+        np.add.at(por_año, indice_año, articulos)
+        np.add.at(compound_por_año, indice_año, compound)
+        return {
+            'filas': int(articulos.sum()),
+            'por_año': dict(zip(años.tolist(), por_año.tolist())),
+            'por_pais': {str(p): int(n) for p, n in zip(self.paises, por_pais) if n},
+            'por_sentimiento': {str(s): int(n) for s, n in zip(self.sentimientos, por_sentimiento) if n},
+            'compound_por_año': dict(zip(años.tolist(), compound_por_año.tolist())),
+        }
+
+
+class CacheRespuestas:
+    """
+    Caché en memoria de respuestas ya generadas, con caducidad (`ttl` segundos) y tamaño
+    acotado: al superar `max_entradas` se expulsa la usada hace más tiempo (LRU).
+    Con `ttl=0` la caché queda desactivada.
+    """
+
+    def __init__(self, ttl=TTL_SEGUNDOS, max_entradas=MAX_RESPUESTAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obtener(self, clave, generar):
+        """Devuelve la respuesta de `clave`, generándola con `generar()` si falta o ha caducado."""
+        ahora = time.monotonic()
+        entrada = self._entradas.get(clave)
+        if entrada is not None and entrada[0] > ahora:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+        self.fallos += 1
+        respuesta = generar()
+        if self.ttl > 0:
+            self._entradas[clave] = (ahora + self.ttl, respuesta)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+        return respuesta
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos y expulsiones, y entradas almacenadas."""
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'expulsiones': self.expulsiones,
+            'entradas': len(self),
+        }
+
+
+def leer_filtros(consulta):
+    """
+    Filtros de la query string: `pais` y `sentimiento` (varios, separados por comas o
+    repetidos) y el rango de años `desde`/`hasta`. Lanza ValueError si un año no es entero.
+    """
+    parametros = parse_qs(consulta)
+
+    def lista(nombre):
+        valores = sorted({v.strip() for valor in parametros.get(nombre, []) for v in valor.split(',') if v.strip()})
+        return tuple(valores) or None
+
+    def año(nombre):
+        valor = parametros.get(nombre, [None])[-1]
+        return int(valor) if valor not in (None, '') else None
+
+    return {'paises': lista('pais'), 'desde': año('desde'), 'hasta': año('hasta'),
+            'sentimientos': lista('sentimiento')}
+
+
+class ServidorDashboard:
+    """
+    Servicio HTTP local (asyncio, sin dependencias externas) del dashboard:
+
+    - `/`: el dashboard HTML con los datos filtrados (p. ej. `/?pais=Chile&desde=2020`).
+    - `/api/datos`: todos los datos del dashboard en JSON.
+    - `/api/publicaciones_por_año`, `/api/publicaciones_por_pais`,
+      `/api/distribucion_sentimiento`, `/api/evolucion_sentimiento`: un gráfico cada uno.
+    - `/api/estadisticas`: estado de la caché de respuestas.
+
+    Todos los endpoints aceptan los filtros de `leer_filtros`. Las respuestas se calculan
+    desde el cubo de agregados y se guardan en una `CacheRespuestas`.
+    """
+
+    def __init__(self, cubo, ttl=TTL_SEGUNDOS, max_entradas=MAX_RESPUESTAS):
+        self.cubo = cubo
+        self.cache = CacheRespuestas(ttl, max_entradas)
+        self._servidor = None
+
+    def responder(self, ruta, filtros):
+        """Genera (tipo de contenido, cuerpo) de una ruta; None si la ruta no existe."""
+        if ruta == '/api/estadisticas':
+            return 'application/json', json.dumps(self.cache.estadisticas()).encode('utf-8')
+        if ruta not in ('/', '/api/datos', *GRAFICOS):
+            return None
+
+        def generar():
+            datos = datos_desde_agregados(self.cubo.agregados(**filtros))
+            if ruta == '/':
+                return 'text/html; charset=utf-8', renderizar_html(datos).encode('utf-8')
+            contenido = datos if ruta == '/api/datos' else datos[GRAFICOS[ruta]]
+            return 'application/json', json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+        return self.cache.obtener((ruta, *filtros.values()), generar)
+
+    async def _atender(self, lector, escritor):
+        # Conexiones persistentes (HTTP/1.1 keep-alive): varias peticiones por conexión.
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                cabeceras = {}
+                while (cabecera := await lector.readline()) not in (b'\r\n', b'\n', b''):
+                    nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip().lower()
+                partes = linea.decode('utf-8', errors='replace').split()
+                cerrar = cabeceras.get('connection') == 'close' or (len(partes) == 3 and partes[2] == 'HTTP/1.0')
+
+                if len(partes) != 3:
+                    estado, tipo, cuerpo, cerrar = 400, 'text/plain', b'Peticion mal formada', True
+                elif partes[0] != 'GET':
+                    estado, tipo, cuerpo, cerrar = 405, 'text/plain', b'Solo se admite GET', True
+                else:
+                    url = urlsplit(partes[1])
+                    try:
+                        respuesta = self.responder(unquote(url.path), leer_filtros(url.query))
+                    except ValueError:
+                        respuesta = 400, ('text/plain', b'Filtro no valido: desde/hasta deben ser anios enteros')
+                    else:
+                        respuesta = (404, ('text/plain', b'No encontrado')) if respuesta is None else (200, respuesta)
+                    estado, (tipo, cuerpo) = respuesta
+
+                escritor.write(
+                    f"HTTP/1.1 {estado} {RAZONES[estado]}\r\nContent-Type: {tipo}\r\n"
+                    f"Content-Length: {len(cuerpo)}\r\nConnection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+                    .encode('latin-1') + cuerpo
+                )
+                await escritor.drain()
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host=HOST, puerto=PUERTO):
+        """Empieza a escuchar (puerto 0: uno libre cualquiera) y devuelve el puerto usado."""
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def servir_siempre(self):
+        await self._servidor.serve_forever()
+
+    async def detener(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+
+async def prueba_carga(host, puerto, rutas, n_peticiones=2_000, concurrencia=20):
+    """
+    Cliente de carga: `concurrencia` conexiones keep-alive que reparten `n_peticiones`
+    GET sobre `rutas` (en rotación). Devuelve las peticiones por segundo y la latencia
+    p50/p99 en milisegundos.
+    """
+    latencias = []
+    siguiente = iter(range(n_peticiones))
+
+    async def cliente():
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        for i in siguiente:
+            inicio = time.perf_counter()
+            escritor.write(f"GET {rutas[i % len(rutas)]} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('utf-8'))
+            await escritor.drain()
+            longitud = 0
+            while (cabecera := await lector.readline()) not in (b'\r\n', b''):
+                if cabecera.lower().startswith(b'content-length:'):
+                    longitud = int(cabecera.split(b':')[1])
+            await lector.readexactly(longitud)
+            latencias.append(time.perf_counter() - inicio)
+        escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+    return {'peticiones': len(latencias), 'peticiones_por_segundo': len(latencias) / segundos,
+            'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+
+def cargar_cubo():
+    """
+    Cubo de agregados del corpus, con el sentimiento y los grupos de casi duplicados de la
+    caché del pipeline. Como el dashboard del pipeline, cuenta cada grupo una sola vez.
+    """
+    from pipeline import ejecutar_pipeline
+    salidas, _ = ejecutar_pipeline(['carga', 'fechas', 'sentimiento', 'duplicados'])
+    df = pd.DataFrame({
+        'año': salidas['fechas']['año'].to_numpy(),
+        'pais_autor': salidas['carga']['pais_autor'].to_numpy(),
+        'compound': salidas['sentimiento']['compound'].to_numpy(),
+    })
+    return CuboAgregados(colapsar_duplicados(df, salidas['duplicados'].to_numpy()))
+
+
+async def _comparar_cache(cubo, rutas, n_peticiones, concurrencia):
+    for nombre, ttl in (('sin caché', 0), ('con caché', TTL_SEGUNDOS)):
+        servidor = ServidorDashboard(cubo, ttl=ttl)
+        puerto = await servidor.iniciar(HOST, 0)
+        r = await prueba_carga(HOST, puerto, rutas, n_peticiones, concurrencia)
+        await servidor.detener()
+        print(f"{nombre:<10} {r['peticiones_por_segundo']:10.0f} pet/s   p50 {r['p50_ms']:7.2f} ms   "
+              f"p99 {r['p99_ms']:7.2f} ms   caché {servidor.cache.estadisticas()['tasa_aciertos']:.0%}")
+
+
+if __name__ == "__main__":
+    # Uso: python servidor_dashboard.py [--host H] [--puerto P] [--ttl S]
+    #      python servidor_dashboard.py --prueba-carga [--peticiones N] [--concurrencia C]
+    parser = argparse.ArgumentParser(description="Servicio HTTP local del dashboard.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--ttl', type=float, default=TTL_SEGUNDOS)
+    parser.add_argument('--prueba-carga', action='store_true')
+    parser.add_argument('--peticiones', type=int, default=2_000)
+    parser.add_argument('--concurrencia', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        cubo = cargar_cubo()
+    except FileNotFoundError:
+        print("Error: El archivo 'articulos_educacion_online.csv' no fue encontrado.")
+        print("Por favor, ejecuta primero 'generar_dataset.py' para crearlo.")
+        exit()
+
+    if args.prueba_carga:
+        # Mezcla de endpoints y filtros, como la que generaría el dashboard al filtrar.
+        paises = list(cubo.paises[:3])
+        rutas = [quote(f"{ruta}?{filtro}", safe='/?=&,') for ruta in ('/api/datos', *GRAFICOS)
+                 for filtro in ('', f'pais={paises[0]}', f'pais={",".join(paises)}&desde=2018',
+                                'desde=2016&hasta=2020', 'sentimiento=Positivo')]
+        asyncio.run(_comparar_cache(cubo, rutas, args.peticiones, args.concurrencia))
+    else:
+        async def servir():
+            servidor = ServidorDashboard(cubo, ttl=args.ttl)
+            puerto = await servidor.iniciar(args.host, args.puerto)
+            print(f"Dashboard disponible en http://{args.host}:{puerto}/ (Ctrl+C para detener)")
+            await servidor.servir_siempre()
+        try:
+            asyncio.run(servir())
+        except KeyboardInterrupt:
+            pass
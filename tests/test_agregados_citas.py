@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from agregados_citas import (
+    actualizar_agregados_citas, calcular_agregados_citas, combinar_agregados_citas, guardar_agregados_citas,
+    tablas_citas
+)
+from generar_dataset import generar_datos
+
+
+@pytest.fixture(scope='module')
+def df():
+    df = generar_datos(1_000, semilla=0)
+    rng = np.random.default_rng(0)
+    df['compound'] = np.round(rng.uniform(-1, 1, len(df)), 4)
+    df['cluster'] = rng.integers(0, 4, len(df))
+    return df
+
+
+def test_combinar_parciales_coincide_con_el_calculo_completo(df):
+    completo = tablas_citas(calcular_agregados_citas(df))
+    parciales = [calcular_agregados_citas(df.iloc[i:i + 137]) for i in range(0, len(df), 137)]
+
+    for orden in (parciales, parciales[::-1]):
+        combinado = calcular_agregados_citas(df.iloc[:0])
+        for parcial in orden:
+            combinado = combinar_agregados_citas(combinado, parcial)
+        assert tablas_citas(combinado) == completo
+
+
+def test_top_con_empates_prefiere_el_menor_id():
+    df = pd.DataFrame({
+        'id_articulo': np.arange(100, 0, -1),
+        'titulo': 'T', 'pais_autor': 'Perú', 'año': 2020, 'compound': 0.0,
+        'citas': [50] * 30 + [10] * 70,
+    })
+    esperado = list(range(71, 81))  # Los ids 71..100 tienen 50 citas: ganan los 10 menores.
+
+    completo = tablas_citas(calcular_agregados_citas(df, k=10))['top']
+    combinado = calcular_agregados_citas(df.iloc[:0], k=10)
+    for i in range(0, len(df), 7):
+        combinado = combinar_agregados_citas(combinado, calcular_agregados_citas(df.iloc[i:i + 7], k=10))
+
+    assert [a['id_articulo'] for a in completo] == esperado
+    assert tablas_citas(combinado)['top'] == completo
+
+
+def test_histograma_con_un_valor_atipico():
+    citas = np.array([0, 1, 1, 2, 3, 10 ** 9])
+    df = pd.DataFrame({'id_articulo': np.arange(len(citas)), 'titulo': 'T', 'pais_autor': 'Perú',
+                       'año': 2020, 'compound': 0.0, 'citas': citas})
+
+    total = tablas_citas(calcular_agregados_citas(df))['total']
+
+    assert total['citas'] == int(citas.sum())
+    assert (total['p50'], total['p90'], total['p99']) == (1, 10 ** 9, 10 ** 9)
+
+
+def test_incremental_recalcula_sin_punto_de_partida_en_el_csv(df, tmp_path):
+    ruta_csv, ruta_agregados = tmp_path / 'articulos.csv', tmp_path / 'citas.json'
+    columnas = ['id_articulo', 'titulo', 'resumen', 'fecha_publicacion', 'pais_autor', 'citas']
+    df[columnas].to_csv(ruta_csv, index=False)
+    # Agregados de otra vista (menos filas que el CSV) guardados sin 'filas_csv'.
+    guardar_agregados_citas(calcular_agregados_citas(df.iloc[:300]), ruta_agregados)
+
+    agregados = actualizar_agregados_citas(ruta_csv, ruta_agregados)
+
+    assert agregados['filas'] == len(df)
+    esperado = tablas_citas(calcular_agregados_citas(df[columnas]))
+    assert tablas_citas(agregados) == esperado
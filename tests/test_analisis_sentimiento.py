@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+from analisis_sentimiento import analizar_sentimiento, analizar_sentimiento_streaming
+from generar_dataset import generar_datos
+
+
+@pytest.fixture(scope='module')
+def corpus(tmp_path_factory):
+    ruta = tmp_path_factory.mktemp('streaming') / 'entrada.csv'
+    generar_datos(1_000, semilla=0).to_csv(ruta, index=False)
+    esperado = analizar_sentimiento(pd.read_csv(ruta))
+    return ruta, esperado[['id_articulo', 'compound']].assign(
+        sentimiento_general=esperado['sentimiento_general'].astype(str))
+
+
+@pytest.mark.parametrize('ordenado', [True, False])
+def test_streaming_produce_las_mismas_filas(corpus, tmp_path, ordenado):
+    entrada, esperado = corpus
+    salida = tmp_path / 'salida.csv'
+
+    r = analizar_sentimiento_streaming(entrada, salida, n_procesos=2, tamano_bloque=150, ordenado=ordenado)
+
+    resultado = pd.read_csv(salida)[['id_articulo', 'compound', 'sentimiento_general']]
+    assert r['filas'] == len(esperado) == len(resultado)
+    if not ordenado:
+        # Según terminan los bloques: mismas filas, en cualquier orden.
+        resultado = resultado.sort_values('id_articulo', ignore_index=True)
+        esperado = esperado.sort_values('id_articulo', ignore_index=True)
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
@@ -0,0 +1,64 @@
+import pytest
+from cache_sentimiento import CacheSentimiento, clave_texto
+from motor_sentimiento import puntuar_textos
+
+
+def _claves(cache):
+    return {fila[0] for fila in cache.conexion.execute("SELECT clave FROM puntuaciones")}
+
+
+def _contar(cache):
+    return cache.conexion.execute("SELECT COUNT(*) FROM puntuaciones").fetchone()[0]
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    return str(tmp_path / 'cache.sqlite')
+
+
+def test_aciertos_y_fallos(ruta):
+    with CacheSentimiento(ruta) as cache:
+        primera = cache.puntuar(['good course', 'bad course', 'good course'])
+        segunda = cache.puntuar(['good course', 'awful platform'])
+
+        assert (cache.aciertos, cache.fallos) == (1, 3)
+        assert primera.equals(puntuar_textos(['good course', 'bad course', 'good course']))
+        assert segunda.equals(puntuar_textos(['good course', 'awful platform']))
+        assert len(cache) == _contar(cache) == 3
+
+
+def test_expulsa_la_entrada_usada_hace_mas_tiempo(ruta):
+    with CacheSentimiento(ruta, max_entradas=2) as cache:
+        cache.puntuar(['a'])
+        cache.puntuar(['b'])
+        cache.puntuar(['a'])  # 'a' pasa a ser la más reciente.
+        cache.puntuar(['c'])
+
+        assert _claves(cache) == {clave_texto('a', cache.version), clave_texto('c', cache.version)}
+        assert cache.expulsiones == 1
+        assert len(cache) == _contar(cache) == 2
+
+
+def test_purga_las_entradas_de_otra_version(ruta):
+    with CacheSentimiento(ruta, version='v1') as cache:
+        cache.puntuar(['a', 'b'])
+    with CacheSentimiento(ruta, version='v1') as cache:
+        assert len(cache) == 2
+    with CacheSentimiento(ruta, version='v2') as cache:
+        assert len(cache) == _contar(cache) == 0
+        cache.puntuar(['a'])
+        assert (cache.aciertos, cache.fallos) == (0, 1)
+
+
+def test_invalidar_reinicia_el_contador_y_el_reloj(ruta):
+    with CacheSentimiento(ruta, max_entradas=2) as cache:
+        cache.puntuar(['a'])
+        cache.puntuar(['b'])
+        cache.invalidar()
+        assert len(cache) == _contar(cache) == 0
+
+        cache.puntuar(['c'])
+        cache.puntuar(['d'])
+        cache.puntuar(['e'])
+        assert _claves(cache) == {clave_texto('d', cache.version), clave_texto('e', cache.version)}
+        assert len(cache) == _contar(cache) == 2
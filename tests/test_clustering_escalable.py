@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from clustering_escalable import ajustar_clustering_escalable, predecir
+from generar_dataset import generar_datos
+
+
+def test_lotes_menores_que_el_numero_de_clusters():
+    textos = generar_datos(60, semilla=0)['resumen']
+
+    modelo, etiquetas = ajustar_clustering_escalable(textos, num_clusters=4, tamano_lote=3)
+
+    assert len(etiquetas) == len(textos)
+    assert set(np.unique(etiquetas)) <= set(range(4))
+    assert np.array_equal(predecir(modelo, textos, tamano_lote=3), etiquetas)
+
+
+def test_menos_documentos_que_clusters():
+    with pytest.raises(ValueError):
+        ajustar_clustering_escalable(generar_datos(3, semilla=0)['resumen'], num_clusters=4)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from clustering_online import actualizar, ajustar_modelo_online, asignar_articulos, procesar_flujo
+from generar_dataset import generar_datos
+
+
+@pytest.fixture(scope='module')
+def modelo():
+    modelo, _ = ajustar_modelo_online(generar_datos(500, semilla=0)['resumen'], num_clusters=3)
+    return modelo
+
+
+def test_microlote_vacio_no_cambia_el_modelo(modelo):
+    centroides = modelo['kmeans'].cluster_centers_.copy()
+    conteos, documentos = modelo['conteos'].copy(), modelo['documentos']
+
+    etiquetas, estado = actualizar(modelo, [])
+
+    assert len(etiquetas) == 0
+    assert not estado['reajustar']
+    np.testing.assert_array_equal(modelo['kmeans'].cluster_centers_, centroides)
+    np.testing.assert_array_equal(modelo['conteos'], conteos)
+    assert modelo['documentos'] == documentos
+    assert modelo['deriva']['microlotes'] == 0
+
+
+def test_flujo_vacio(modelo):
+    etiquetas, latencias, _ = procesar_flujo(modelo, [])
+    assert len(etiquetas) == 0 and len(latencias) == 0
+
+
+def test_microlote_asigna_y_actualiza(modelo):
+    textos = generar_datos(50, semilla=1)['resumen']
+    documentos = modelo['documentos']
+    etiquetas, _ = actualizar(modelo, textos)
+    assert len(etiquetas) == 50 and etiquetas.max() < 3
+    assert modelo['documentos'] == documentos + 50
+
+
+def test_asignar_articulos_desde_csv(modelo, tmp_path):
+    entrada, salida = tmp_path / 'nuevos.csv', tmp_path / 'asignados.csv'
+    nuevos = generar_datos(40, semilla=2)
+    nuevos.to_csv(entrada, index=False)
+
+    n, latencias, _ = asignar_articulos(modelo, str(entrada), str(salida), tamano_microlote=16)
+
+    assert n == 40 and len(latencias) == 3
+    assert (tmp_path / 'nuevos.parquet').exists()
+    asignados = pd.read_csv(salida)
+    assert list(asignados.columns) == list(nuevos.columns) + ['cluster']
+    assert (asignados['fecha_publicacion'] == nuevos['fecha_publicacion'].astype(str)).all()
+    assert asignados['cluster'].between(0, 2).all()
@@ -0,0 +1,32 @@
+from generar_dashboard import actualizar_agregados, calcular_agregados, comprobar_incremental, guardar_agregados
+from generar_dataset import generar_datos
+
+
+def test_agregados_por_lotes_coinciden_con_el_calculo_completo():
+    assert comprobar_incremental(generar_datos(600, semilla=0), n_lotes=4)
+
+
+def test_actualizar_agregados_incorpora_solo_las_filas_nuevas(tmp_path):
+    df = generar_datos(600, semilla=0)
+    ruta_csv, ruta_agregados = tmp_path / 'articulos.csv', tmp_path / 'agregados.json'
+    df.iloc[:400].to_csv(ruta_csv, index=False)
+    actualizar_agregados(ruta_csv, ruta_agregados)
+    df.iloc[400:].to_csv(ruta_csv, mode='a', header=False, index=False)
+
+    agregados, nuevas = actualizar_agregados(ruta_csv, ruta_agregados)
+
+    assert nuevas == 200
+    assert agregados == calcular_agregados(df)
+
+
+def test_actualizar_agregados_recalcula_sin_punto_de_partida_en_el_csv(tmp_path):
+    df = generar_datos(600, semilla=0)
+    ruta_csv, ruta_agregados = tmp_path / 'articulos.csv', tmp_path / 'agregados.json'
+    df.to_csv(ruta_csv, index=False)
+    # Agregados de otra vista (menos filas que el CSV) guardados sin 'filas_csv'.
+    guardar_agregados(calcular_agregados(df.iloc[:500]), ruta_agregados)
+
+    agregados, nuevas = actualizar_agregados(ruta_csv, ruta_agregados)
+
+    assert nuevas == 600
+    assert agregados == calcular_agregados(df)
@@ -0,0 +1,9 @@
+from generar_dataset import generar_corpus
+
+
+def test_corpus_con_pool_igual_que_en_serie(tmp_path):
+    serie, pool = tmp_path / 'serie.csv', tmp_path / 'pool.csv'
+    generar_corpus(2_500, str(serie), semilla=3, tamano_bloque=1_000, n_procesos=1)
+    r = generar_corpus(2_500, str(pool), semilla=3, tamano_bloque=1_000, n_procesos=2)
+    assert r['filas'] == 2_500
+    assert pool.read_bytes() == serie.read_bytes()
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from indice_invertido import IndiceInvertido, construir_indice
+
+RESUMENES = [
+    'Online learning platforms improve access',
+    'The digital divide limits online learning',
+    'Dropout and fraud remain problems in online courses',
+    'A hybrid-model course reduces dropout',
+    'Platforms for digital learning, beyond the divide',
+    'The divide digital is reversed here',
+    'MOOCs and hybrid model courses',
+    '',
+]
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    n = len(RESUMENES)
+    return pd.DataFrame({
+        'id_articulo': np.arange(100, 100 + n),
+        'resumen': RESUMENES,
+        'pais_autor': ['Perú', 'México', 'Perú', 'Chile', 'México', 'Chile', 'Perú', 'México'],
+        'fecha_publicacion': pd.to_datetime([f'{2016 + i}-06-01' for i in range(n)]),
+        'citas': [5, 50, 0, 12, 80, 3, 7, 1],
+    })
+
+
+@pytest.fixture(scope='module')
+def directorio(corpus, tmp_path_factory):
+    directorio = str(tmp_path_factory.mktemp('indice'))
+    construir_indice(corpus, directorio=directorio, tamano_lote=3)
+    return directorio
+
+
+@pytest.mark.parametrize('consulta, esperado', [
+    ('online learning', [0, 1]),
+    ('dropout OR fraud', [2, 3]),
+    ('digital OR moocs learning', [1, 4]),
+    ('online -dropout', [0, 1]),
+    ('online NOT dropout', [0, 1]),
+    ('-online', [3, 4, 5, 6, 7]),
+    ('"digital divide"', [1]),
+    ('"divide digital"', [5]),
+    ('hybrid-model', [3, 6]),
+    ('"hybrid model" -dropout', [6]),
+    ('PLATFORMS', [0, 4]),
+    ('the', []),
+    ('inexistente', []),
+])
+def test_consultas(directorio, consulta, esperado):
+    assert IndiceInvertido(directorio).documentos(consulta).tolist() == esperado
+
+
+def test_reabre_el_indice_con_memory_map(directorio):
+    primero, segundo = IndiceInvertido(directorio), IndiceInvertido(directorio)
+
+    assert isinstance(segundo._arrays['docs'], np.memmap)
+    assert len(segundo) == len(RESUMENES)
+    for consulta in ('online learning', '"digital divide"', 'dropout OR fraud -courses'):
+        assert np.array_equal(primero.documentos(consulta), segundo.documentos(consulta))
+
+
+def test_buscar_con_filtros(directorio):
+    resultado = IndiceInvertido(directorio).buscar('learning OR platforms', paises=['México'], citas=(10, None))
+
+    assert resultado['id_articulo'].tolist() == [101, 104]
+    assert resultado['año'].tolist() == [2017, 2020]
+
+
+def test_indice_de_otra_version(tmp_path, corpus):
+    construir_indice(corpus, directorio=str(tmp_path))
+    ruta_meta = tmp_path / 'meta.json'
+    meta = json.loads(ruta_meta.read_text(encoding='utf-8'))
+    ruta_meta.write_text(json.dumps({**meta, 'version': -1}), encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        IndiceInvertido(str(tmp_path))
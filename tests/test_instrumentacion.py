@@ -0,0 +1,41 @@
+import graficos
+import instrumentacion
+import pytest
+from analisis_sentimiento import analizar_sentimiento_streaming
+from generar_dataset import generar_datos
+from instrumentacion import instrumentar, mediciones, reiniciar
+
+
+@instrumentar('prueba.tarea')
+def _tarea(n):
+    return sum(range(n))
+
+
+@pytest.fixture
+def modo_headless():
+    anterior = graficos.modo()
+    graficos.configurar('headless')
+    reiniciar()
+    yield
+    graficos.configurar(anterior)
+    reiniciar()
+
+
+def test_renderizar_conserva_las_mediciones_de_los_workers(modo_headless):
+    with instrumentacion.medir('prueba.render'):
+        graficos.renderizar([(_tarea, (1_000,)), (_tarea, (2_000,)), (_tarea, (3_000,))], n_procesos=2)
+
+    tareas = [m for m in mediciones() if m['etapa'] == 'prueba.tarea']
+    assert len(tareas) == 3
+    assert all(m['padre'] == 'prueba.render' for m in tareas)
+
+
+def test_streaming_conserva_las_mediciones_de_los_workers(modo_headless, tmp_path):
+    entrada, salida = tmp_path / 'entrada.csv', tmp_path / 'salida.csv'
+    generar_datos(300, semilla=0).to_csv(entrada, index=False)
+
+    analizar_sentimiento_streaming(entrada, salida, n_procesos=2, tamano_bloque=100)
+
+    bloques = [m for m in mediciones() if m['etapa'] == 'sentimiento']
+    assert [m['filas'] for m in bloques] == [100, 100, 100]
+    assert all(m['padre'] == 'sentimiento.streaming' for m in bloques)
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from modelo_prediccion_temporal import pronosticar_series
+
+
+def test_serie_fallida_queda_marcada():
+    meses = pd.date_range('2014-01-01', periods=48, freq='MS')
+    rng = np.random.default_rng(0)
+    series = pd.DataFrame({'valida': rng.poisson(5, 48).astype(float), 'invalida': ['x'] * 48}, index=meses)
+
+    tabla = pronosticar_series(series, pasos=3)
+
+    assert (tabla.loc[tabla['grupo'] == 'valida', 'estado'] == 'ok').sum() == 3
+    fallida = tabla[tabla['grupo'] == 'invalida']
+    assert len(fallida) == 1
+    assert fallida['estado'].iloc[0].startswith('error: ')
+    assert fallida['prediccion'].isna().all()
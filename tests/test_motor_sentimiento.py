@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from generar_dataset import generar_datos
+from motor_sentimiento import COLUMNAS_SENTIMIENTO, TOLERANCIA, puntuar_textos
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+CASOS_LIMITE = [
+    '',
+    '   ',
+    'The course is good.',
+    'The course is not good.',
+    'The course is not bad at all.',
+    'The platform was never really helpful.',
+    'The content was great, but the platform was awful.',
+    'The content was awful but the tutors were great!',
+    'The results are GREAT compared with the BAD baseline.',
+    'ALL CAPS TEXT IS LOUD AND HAPPY',
+    'Amazing!!! Students loved it!!!',
+    'Is this useful???',
+    'Online learning :) is fun :( sometimes',
+    'I love it 😀 but hate the lag 😡',
+    'The course was kind of good and sort of useful.',
+    'Without a doubt, the best course ever.',
+    'It is extremely, incredibly, very good.',
+    'no',
+    'Not bad, not great, just ok.',
+    'La educación online es buena, but the dropout rate is a serious problem.',
+]
+
+
+def _vader(textos):
+    analizador = SentimentIntensityAnalyzer()
+    return pd.DataFrame([analizador.polarity_scores(t) for t in textos])[COLUMNAS_SENTIMIENTO]
+
+
+@pytest.mark.parametrize('textos', [
+    pd.Series(CASOS_LIMITE),
+    generar_datos(2_000, semilla=0)['resumen'],
+], ids=['casos_limite', 'corpus'])
+def test_puntuaciones_coinciden_con_vader(textos):
+    textos = textos.reset_index(drop=True)
+    puntuaciones = puntuar_textos(textos)
+    assert len(puntuaciones) == len(textos) and not puntuaciones.isna().any().any()
+    diferencias = (_vader(textos) - puntuaciones).abs().max()
+    for columna in COLUMNAS_SENTIMIENTO:
+        assert diferencias[columna] <= TOLERANCIA[columna], columna
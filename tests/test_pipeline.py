@@ -0,0 +1,42 @@
+import numpy as np
+from agregados_citas import actualizar_agregados_citas, calcular_agregados_citas, tablas_citas
+from carga_datos import RUTA_CSV
+from generar_dashboard import actualizar_agregados, calcular_agregados
+from generar_dataset import generar_datos
+from pipeline import ejecutar_pipeline
+
+
+def test_incremental_tras_el_pipeline_coincide_con_recalculo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = generar_datos(600, semilla=0)
+    df.iloc[:500].to_csv(RUTA_CSV, index=False)
+    salidas, _ = ejecutar_pipeline(['duplicados', 'dashboard'], n_hilos=1)
+    grupos = salidas['duplicados'].to_numpy()
+    assert (grupos != np.arange(len(grupos))).any()  # El corpus tiene casi duplicados.
+
+    df.iloc[500:].to_csv(RUTA_CSV, mode='a', header=False, index=False)
+    agregados, nuevas = actualizar_agregados(RUTA_CSV)
+    citas = tablas_citas(actualizar_agregados_citas(RUTA_CSV))
+
+    assert nuevas == 100
+    assert agregados == calcular_agregados(df)
+    completo = tablas_citas(calcular_agregados_citas(df))
+    for tabla in ('total', 'por_pais', 'por_año', 'top'):
+        assert citas[tabla] == completo[tabla]
+
+
+def test_archivo_sobrescrito_fuera_del_pipeline_repite_la_etapa(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generar_datos(300, semilla=0).to_csv(RUTA_CSV, index=False)
+    ejecutar_pipeline(['dashboard'], n_hilos=1)
+    _, informe = ejecutar_pipeline(['dashboard'], n_hilos=1)
+    assert informe['dashboard']['accion'] == 'caché'
+
+    # Otro script (p. ej. generar_dashboard.py) reescribe una de sus salidas.
+    with open('dashboard.html', 'w', encoding='utf-8') as f:
+        f.write('<html></html>')
+    _, informe = ejecutar_pipeline(['dashboard'], n_hilos=1)
+    assert informe['dashboard']['accion'] == 'ejecutada'
+    assert informe['sentimiento']['accion'] == 'caché'
+    with open('dashboard.html', encoding='utf-8') as f:
+        assert f.read() != '<html></html>'